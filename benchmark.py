@@ -0,0 +1,242 @@
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from case_splitter import iter_test_cases
+from dataset_writer import JsonlWriter
+from entity_dedup import EntityDeduplicator
+from entity_index import EntityIndex
+from main import append_to_json_file
+from process_file import run_batch
+from process_test import search_keywords
+
+DEFAULT_BASELINE_PATH = 'benchmark_baseline.json'
+
+
+def _entity_name(rng: random.Random, index: int, language: str) -> str:
+    prefix = rng.choice(['get', 'load', 'parse', 'build', 'save', 'check'])
+    suffix = rng.choice(['user', 'item', 'order', 'config', 'token', 'report'])
+    if language == 'javascript':
+        return f"{prefix}{suffix.capitalize()}{index}"
+    return f"{prefix}_{suffix}_{index}"
+
+
+def _entity_code(rng: random.Random, name: str, lines: int, language: str, shared: List[str]) -> str:
+    """Генерирует код сущности; часть сущностей ссылается на общие вспомогательные определения."""
+    body = [f"    value_{i} = {rng.randint(0, 1000)} + len('{name}')" for i in range(lines)]
+    if language == 'javascript':
+        body = [f"    const value{i} = {rng.randint(0, 1000)} + '{name}'.length;" for i in range(lines)]
+        code = "const helpers = require('./helpers');\n\n" + \
+               f"function {name}(data) {{\n" + '\n'.join(body) + "\n    return data;\n}\n"
+        return code + ''.join(f"\n{block}" for block in shared)
+    code = "import os\n\n" + f"def {name}(data):\n" + '\n'.join(body) + "\n    return data\n"
+    return code + ''.join(f"\n{block}" for block in shared)
+
+
+def generate_corpus(directory: str, n_tests: int, k_entities: int, language: str = 'python', entity_lines: int = 10,
+                    entities_per_test: int = 3, overlap: float = 0.3, seed: int = 0) -> Tuple[str, str]:
+    """
+    Генерирует воспроизводимый корпус: файл с n_tests тестами и директорию с k_entities сущностями.
+
+    Аргументы:
+    directory (str): Директория, в которой создаётся корпус.
+    n_tests (int): Количество тестовых случаев.
+    k_entities (int): Количество файлов сущностей.
+    language (str): Язык ('python' или 'javascript').
+    entity_lines (int): Количество строк в теле сущности.
+    entities_per_test (int): Сколько сущностей упоминает один тест.
+    overlap (float): Доля сущностей, содержащих общие определения (дубликаты для дедупликации).
+    seed (int): Начальное значение генератора случайных чисел.
+
+    Возвращает:
+    tuple: (путь к файлу тестов, путь к директории сущностей).
+    """
+    rng = random.Random(seed)
+    code_directory = os.path.join(directory, 'entities')
+    os.makedirs(code_directory, exist_ok=True)
+
+    names = [_entity_name(rng, index, language) for index in range(k_entities)]
+    if language == 'javascript':
+        shared = [f"function sharedHelper{i}(x) {{\n    return x * {i};\n}}\n" for i in range(5)]
+    else:
+        shared = [f"def shared_helper_{i}(x):\n    return x * {i}\n" for i in range(5)]
+    for name in names:
+        blocks = rng.sample(shared, 2) if rng.random() < overlap else []
+        with open(os.path.join(code_directory, f"{name}.txt"), 'w', encoding='utf-8') as file:
+            file.write(_entity_code(rng, name, entity_lines, language, blocks))
+
+    tests_path = os.path.join(directory, 'tests.js' if language == 'javascript' else 'tests.py')
+    with open(tests_path, 'w', encoding='utf-8') as file:
+        for index in range(n_tests):
+            used = rng.sample(names, min(entities_per_test, len(names)))
+            if language == 'javascript':
+                calls = ''.join(f"    expect({name}({index})).toBe({index});\n" for name in used)
+                file.write(f"test('case {index}', () => {{\n{calls}}});\n\n")
+            else:
+                calls = ''.join(f"    assert {name}({index}) == {index}\n" for name in used)
+                file.write(f"def test_case_{index}():\n{calls}\n")
+    return tests_path, code_directory
+
+
+def _measure(function: Callable[[], int], measure_memory: bool) -> Dict[str, float]:
+    started = time.perf_counter()
+    items = function()
+    seconds = time.perf_counter() - started
+    result = {'seconds': seconds, 'items': items, 'throughput': items / seconds if seconds else float('inf')}
+    if measure_memory:
+        # Отдельный прогон под tracemalloc, чтобы его накладные расходы не искажали время
+        tracemalloc.start()
+        function()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmark(n_tests: int, k_entities: int, language: str = 'python', legacy_limit: int = 500,
+                  measure_memory: bool = True, seed: int = 0, **corpus_options) -> Dict[str, Dict[str, float]]:
+    """
+    Замеряет каждый этап конвейера отдельно и весь конвейер целиком на сгенерированном корпусе.
+
+    Этапы: split (разбиение), match (поиск ключевых слов), entity_load (загрузка сущностей),
+    dedup (сборка без дубликатов), write (JSON Lines), write_legacy_json (старый
+    main.append_to_json_file на первых legacy_limit записях) и end_to_end (process_file.run_batch).
+    """
+    directory = tempfile.mkdtemp(prefix='autoworker_bench_')
+    try:
+        tests_path, code_directory = generate_corpus(directory, n_tests, k_entities, language, seed=seed,
+                                                     **corpus_options)
+        test_cases = list(iter_test_cases(tests_path, language))
+        keywords = EntityIndex(code_directory).keywords()
+        found = [search_keywords(test_case.text, keywords) for test_case in test_cases]
+        index = EntityIndex(code_directory)
+        entities = [[(name, index.get(name), index.version(name)) for name in names] for names in found]
+        json_objects = [{"prompt": "", "framework": "pytest", "code": "x" * 200, "result": test_case.text}
+                        for test_case in test_cases]
+
+        def split():
+            return sum(1 for _ in iter_test_cases(tests_path, language))
+
+        def match():
+            for test_case in test_cases:
+                search_keywords(test_case.text, keywords)
+            return len(test_cases)
+
+        def entity_load():
+            fresh_index = EntityIndex(code_directory)
+            for names in found:
+                for name in names:
+                    fresh_index.get(name)
+            return len(found)
+
+        def dedup():
+            deduplicator = EntityDeduplicator(language)
+            for case_entities in entities:
+                deduplicator.assemble(case_entities)
+            return len(entities)
+
+        def write():
+            output_path = os.path.join(directory, 'write.jsonl')
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            with JsonlWriter(output_path, fsync_interval=0) as writer:
+                for json_object in json_objects:
+                    writer.write(json_object)
+            return len(json_objects)
+
+        def write_legacy_json():
+            output_path = os.path.join(directory, 'legacy.json')
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            for json_object in json_objects[:legacy_limit]:
+                append_to_json_file(json_object['result'], json_object['code'], 'pytest', output_path)
+            return min(legacy_limit, len(json_objects))
+
+        def end_to_end():
+            output_path = os.path.join(directory, 'dataset.jsonl')
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return run_batch(tests_path, code_directory, 'pytest', output_path, language)
+
+        stages = [('split', split), ('match', match), ('entity_load', entity_load), ('dedup', dedup),
+                  ('write', write), ('write_legacy_json', write_legacy_json), ('end_to_end', end_to_end)]
+        return {name: _measure(function, measure_memory) for name, function in stages}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Dict[str, float]],
+                          tolerance: float = 0.25) -> List[str]:
+    """Возвращает описания регрессий: этапы, ставшие медленнее базовой линии больше чем на tolerance."""
+    regressions = []
+    for run_name, stages in results.items():
+        for stage, result in stages.items():
+            expected = baseline.get(run_name, {}).get(stage)
+            if expected and result['seconds'] > expected * (1 + tolerance):
+                regressions.append(f"{run_name} {stage}: {result['seconds']:.3f} с против {expected:.3f} с")
+    return regressions
+
+
+def format_report(results: Dict[str, Dict[str, Dict[str, float]]]) -> str:
+    lines = [f"{'запуск':<24}{'этап':<20}{'время, с':>10}{'элем./с':>12}{'пик памяти, КБ':>16}"]
+    for run_name, stages in results.items():
+        for stage, result in stages.items():
+            peak = result.get('peak_bytes')
+            lines.append(f"{run_name:<24}{stage:<20}{result['seconds']:>10.3f}{result['throughput']:>12.0f}"
+                         f"{(peak / 1024 if peak is not None else float('nan')):>16.0f}")
+    return '\n'.join(lines)
+
+
+def main(sizes: List[Tuple[int, int]], languages: List[str], baseline_path: Optional[str], update_baseline: bool,
+         tolerance: float, measure_memory: bool, seed: int) -> int:
+    results = {}
+    for language in languages:
+        for n_tests, k_entities in sizes:
+            run_name = f"{language}:{n_tests}x{k_entities}"
+            results[run_name] = run_benchmark(n_tests, k_entities, language, measure_memory=measure_memory,
+                                              seed=seed)
+    print(format_report(results))
+
+    if not baseline_path:
+        return 0
+    if update_baseline:
+        baseline = {run_name: {stage: result['seconds'] for stage, result in stages.items()}
+                    for run_name, stages in results.items()}
+        with open(baseline_path, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, ensure_ascii=False, indent=4)
+        print(f'Базовая линия сохранена: {baseline_path}')
+        return 0
+    if not os.path.exists(baseline_path):
+        # Без базовой линии регрессии не обнаружить: это ошибка, а не успешный запуск
+        print(f'Базовая линия не найдена: {baseline_path}. Создайте её запуском с --update-baseline',
+              file=sys.stderr)
+        return 2
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        regressions = compare_with_baseline(results, json.load(file), tolerance)
+    for regression in regressions:
+        print(f'РЕГРЕССИЯ: {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Бенчмарк этапов конвейера на синтетическом корпусе.')
+    parser.add_argument('--sizes', default='1000x200,4000x800',
+                        help='Размеры корпуса через запятую: <тестов>x<сущностей>')
+    parser.add_argument('--languages', default='python,javascript')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='Файл базовой линии')
+    parser.add_argument('--update-baseline', action='store_true', help='Сохранить результаты как базовую линию')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Допустимое замедление (доля)')
+    parser.add_argument('--no-memory', action='store_true', help='Не замерять пиковую память')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [tuple(int(part) for part in size.split('x')) for size in args.sizes.split(',')]
+    sys.exit(main(sizes, args.languages.split(','), args.baseline, args.update_baseline, args.tolerance,
+                  not args.no_memory, args.seed))
@@ -0,0 +1,62 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from benchmark import compare_with_baseline, generate_corpus, main, run_benchmark
+from case_splitter import iter_test_cases
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_generate_corpus_is_reproducible(self):
+        # Проверяет, что корпус с одним seed одинаков и содержит заданное количество тестов и сущностей
+        contents = []
+        for name in ('first', 'second'):
+            directory = os.path.join(self.test_dir, name)
+            tests_path, code_directory = generate_corpus(directory, 20, 5, 'javascript', seed=7)
+            self.assertEqual(len(os.listdir(code_directory)), 5)
+            self.assertEqual(len(list(iter_test_cases(tests_path, 'javascript'))), 20)
+            with open(tests_path, 'r', encoding='utf-8') as file:
+                contents.append(file.read())
+        self.assertEqual(contents[0], contents[1])
+
+    def test_run_benchmark_reports_all_stages(self):
+        # Проверяет, что на маленьком корпусе замеряются все этапы
+        results = run_benchmark(10, 4, 'python', legacy_limit=3, measure_memory=False)
+        self.assertListEqual(list(results), ['split', 'match', 'entity_load', 'dedup', 'write',
+                                             'write_legacy_json', 'end_to_end'])
+        self.assertEqual(results['split']['items'], 10)
+        self.assertEqual(results['end_to_end']['items'], 10)
+        self.assertEqual(results['write_legacy_json']['items'], 3)
+
+    def test_compare_with_baseline(self):
+        # Проверяет, что регрессией считается только замедление сверх допуска
+        results = {'python:10x4': {'split': {'seconds': 1.2}, 'match': {'seconds': 2.0}}}
+        baseline = {'python:10x4': {'split': 1.0, 'match': 1.0}}
+        regressions = compare_with_baseline(results, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('match', regressions[0])
+
+    def test_missing_baseline_fails(self):
+        # Проверяет, что отсутствие базовой линии — ошибка, пока её не создали через --update-baseline
+        baseline_path = os.path.join(self.test_dir, 'baseline.json')
+        with redirect_stdout(io.StringIO()), mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            self.assertEqual(main([(10, 4)], ['python'], baseline_path, False, 0.25, False, 0), 2)
+            self.assertIn('--update-baseline', stderr.getvalue())
+            self.assertEqual(main([(10, 4)], ['python'], baseline_path, True, 0.25, False, 0), 0)
+            self.assertTrue(os.path.exists(baseline_path))
+            self.assertEqual(main([(10, 4)], ['python'], baseline_path, False, 100.0, False, 0), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+from typing import Iterable, Iterator, Optional
+
+from segmenter import get_segmenter
+
+
+def get_test_case_pattern(language):
+    """Возвращает регулярное выражение начала тестового случая для указанного языка."""
+    return get_segmenter(language).test_case_pattern
+
+
+class TestCase:
+    """Тестовый случай: имя, диапазон строк во входном файле (с 1, включительно) и текст."""
+    __slots__ = ('name', 'start_line', 'end_line', 'text')
+    # Не тестовый класс для pytest, несмотря на имя
+    __test__ = False
+
+    def __init__(self, name: Optional[str], start_line: int, end_line: int, text: str):
+        self.name = name
+        self.start_line = start_line
+        self.end_line = end_line
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"TestCase({self.name!r}, {self.start_line}-{self.end_line})"
+
+
+def _match_name(match) -> Optional[str]:
+    groups = match.groupdict()
+    return groups.get('name') or groups.get('class_name')
+
+
+def iter_test_cases_from_lines(lines: Iterable[str], language: str) -> Iterator[TestCase]:
+    """
+    Разбивает поток строк на тестовые случаи за один проход.
+
+    Тестовый случай начинается со строки, подходящей под шаблон языка, и продолжается
+    до начала следующего. Строки сканируются сегментатором языка (segmenter.py), поэтому
+    строки внутри многострочных литералов и комментариев не начинают новый случай.
+    В памяти хранятся только строки текущего случая.
+    """
+    segmenter = get_segmenter(language)
+    test_case_pattern = segmenter.test_case_pattern
+
+    name = None
+    start_line = 0
+    test_case_lines = []  # Строки текущего теста
+    line_number = 0
+    for source_line in segmenter.iter_lines(lines, nesting=False):
+        line_number = source_line.number
+        # Строки внутри многострочных литералов и комментариев (code=False) не проверяются
+        match = source_line.code and test_case_pattern.match(source_line.text.lstrip())
+        if match:
+            if test_case_lines:
+                yield TestCase(name, start_line, line_number - 1, ''.join(test_case_lines))
+                test_case_lines = []
+            name = _match_name(match)
+            start_line = line_number
+        if start_line:
+            test_case_lines.append(source_line.text)
+
+    if test_case_lines:
+        yield TestCase(name, start_line, line_number, ''.join(test_case_lines))
+
+
+def iter_test_cases(input_file_path: str, language: str) -> Iterator[TestCase]:
+    """Читает входной файл построчно и по одному отдаёт тестовые случаи."""
+    with open(input_file_path, 'r', encoding='utf-8') as infile:
+        yield from iter_test_cases_from_lines(infile, language)
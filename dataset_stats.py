@@ -0,0 +1,208 @@
+import json
+import math
+import os
+from array import array
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from dataset_writer import JsonlWriter
+from process_test import extract_entities
+from record_dedup import iter_dataset, record_language
+from segmenter import SEGMENTERS
+
+# Числовые колонки, собираемые при чтении датасета
+COLUMNS = ('code_lines', 'code_chars', 'result_lines', 'result_chars', 'entities')
+# Колонки, вычисляемые из собранных: приблизительное число токенов
+TOKEN_COLUMNS = ('code_tokens', 'result_tokens', 'total_tokens')
+PERCENTILES = (50, 90, 95, 99)
+# Среднее число символов кода на токен (приближение для токенизаторов BPE)
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+
+def count_lines(text: str) -> int:
+    return text.count('\n') + 1 if text else 0
+
+
+def approximate_tokens(chars, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+    """Приблизительное число токенов по числу символов (работает и для чисел, и для массивов NumPy)."""
+    if isinstance(chars, np.ndarray):
+        return np.ceil(chars / chars_per_token).astype(np.int64)
+    return math.ceil(chars / chars_per_token)
+
+
+class DatasetColumns:
+    """
+    Колоночное представление датасета: по массиву NumPy на каждую колонку COLUMNS
+    и номер фреймворка каждой записи (framework_ids) с таблицей названий (frameworks).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], framework_ids: np.ndarray, frameworks: List[str],
+                 chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.columns = dict(columns)
+        self.framework_ids = framework_ids
+        self.frameworks = frameworks
+        self.columns['code_tokens'] = approximate_tokens(self.columns['code_chars'], chars_per_token)
+        self.columns['result_tokens'] = approximate_tokens(self.columns['result_chars'], chars_per_token)
+        self.columns['total_tokens'] = self.columns['code_tokens'] + self.columns['result_tokens']
+
+    def __len__(self) -> int:
+        return len(self.framework_ids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def budget_mask(self, max_tokens: int) -> np.ndarray:
+        """Маска записей, укладывающихся в бюджет токенов (code + result)."""
+        return self.columns['total_tokens'] <= max_tokens
+
+
+def scan_dataset(input_path: str, max_tokens: Optional[int] = None, output_path: Optional[str] = None,
+                 chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, language: Optional[str] = None) -> DatasetColumns:
+    """
+    Читает датасет за один проход в колонки и, если указан output_path, сразу пишет в него записи,
+    укладывающиеся в бюджет max_tokens.
+
+    Значения копятся в компактных array.array и в конце без копирования превращаются в массивы
+    NumPy, поэтому в памяти держатся только числа, а не JSON-объекты.
+
+    Аргументы:
+    input_path (str): Датасет (.jsonl, JSON-массив или директория шардов).
+    max_tokens (int): Бюджет токенов записи (None — без фильтрации).
+    output_path (str): Файл .jsonl для записей, укладывающихся в бюджет; пишется заново (None — не писать).
+    chars_per_token (float): Среднее число символов на токен.
+    language (str): Язык поля code (None — определять по фреймворку записи). Сущности считаются
+        сегментатором языка так же, как в конвейере (process_test.extract_entities).
+    """
+    values = {name: array('i') for name in COLUMNS}
+    framework_ids = array('H')
+    frameworks: Dict[str, int] = {}
+    if output_path and os.path.abspath(output_path) == os.path.abspath(input_path):
+        raise ValueError("Выходной файл должен отличаться от входного")
+    writer = JsonlWriter(output_path, fsync_interval=0, truncate=True) if output_path else None
+    try:
+        for json_object in iter_dataset(input_path):
+            code = json_object.get('code', '')
+            result = json_object.get('result', '')
+            framework = json_object.get('framework', '')
+            values['code_lines'].append(count_lines(code))
+            values['code_chars'].append(len(code))
+            values['result_lines'].append(count_lines(result))
+            values['result_chars'].append(len(result))
+            values['entities'].append(len(extract_entities(code, language or record_language(json_object))))
+            framework_ids.append(frameworks.setdefault(framework, len(frameworks)))
+            if writer is not None and (max_tokens is None or approximate_tokens(len(code), chars_per_token)
+                                       + approximate_tokens(len(result), chars_per_token) <= max_tokens):
+                writer.write(json_object)
+    finally:
+        if writer is not None:
+            writer.close()
+    columns = {name: np.frombuffer(column, dtype=np.int32) if column else np.zeros(0, dtype=np.int32)
+               for name, column in values.items()}
+    ids = np.frombuffer(framework_ids, dtype=np.uint16) if framework_ids else np.zeros(0, dtype=np.uint16)
+    return DatasetColumns(columns, ids, list(frameworks), chars_per_token)
+
+
+def power_of_two_histogram(values: np.ndarray) -> Dict[str, int]:
+    """Гистограмма с корзинами [0, 1), [1, 2), [2, 4), ... до ближайшей степени двойки выше максимума."""
+    top = int(values.max()) if len(values) else 0
+    edges = np.concatenate(([0], 2 ** np.arange(0, max(top, 1).bit_length() + 1)))
+    counts, _ = np.histogram(values, bins=edges)
+    return {f"{int(low)}-{int(high) - 1}": int(count) for low, high, count in zip(edges[:-1], edges[1:], counts)
+            if count}
+
+
+def column_stats(values: np.ndarray) -> Dict[str, Any]:
+    if not len(values):
+        return {'count': 0}
+    percentiles = np.percentile(values, PERCENTILES)
+    stats = {'count': int(len(values)), 'min': int(values.min()), 'max': int(values.max()),
+             'mean': float(values.mean()), 'sum': int(values.sum(dtype=np.int64))}
+    stats.update({f"p{percentile}": float(value) for percentile, value in zip(PERCENTILES, percentiles)})
+    stats['histogram'] = power_of_two_histogram(values)
+    return stats
+
+
+def compute_stats(data: DatasetColumns, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Считает статистику по колонкам: минимум, максимум, среднее, процентили и гистограмму каждой
+    колонки, а также разбивку по фреймворкам и (если задан max_tokens) число записей вне бюджета.
+    """
+    stats: Dict[str, Any] = {'records': len(data),
+                             'columns': {name: column_stats(data[name]) for name in COLUMNS + TOKEN_COLUMNS}}
+    minlength = len(data.frameworks)
+    counts = np.bincount(data.framework_ids, minlength=minlength)
+    tokens = np.bincount(data.framework_ids, weights=data['total_tokens'], minlength=minlength)
+    entities = np.bincount(data.framework_ids, weights=data['entities'], minlength=minlength)
+    breakdown = {framework: {'records': int(counts[index]), 'total_tokens': int(tokens[index]),
+                             'mean_tokens': float(tokens[index] / counts[index]) if counts[index] else 0.0,
+                             'entities': int(entities[index])}
+                 for index, framework in enumerate(data.frameworks)}
+    if max_tokens is not None:
+        over = ~data.budget_mask(max_tokens)
+        stats['budget'] = {'max_tokens': max_tokens, 'kept': int(len(data) - over.sum()), 'dropped': int(over.sum())}
+        dropped = np.bincount(data.framework_ids[over], minlength=minlength)
+        for index, framework in enumerate(data.frameworks):
+            breakdown[framework]['dropped'] = int(dropped[index])
+    stats['frameworks'] = breakdown
+    return stats
+
+
+def write_index(data: DatasetColumns, index_path: str, max_tokens: int) -> int:
+    """
+    Записывает номера записей, укладывающихся в бюджет, в файл .npy (uint64). По номерам записи
+    читаются из шардированного датасета через ShardedReader за O(1). Возвращает количество номеров.
+    """
+    positions = np.flatnonzero(data.budget_mask(max_tokens)).astype(np.uint64)
+    np.save(index_path, positions)
+    return len(positions)
+
+
+def format_report(stats: Dict[str, Any]) -> str:
+    """Текстовый отчёт по статистике датасета."""
+    lines = [f"Записей: {stats['records']}", '']
+    header = f"{'колонка':<16}{'min':>10}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}{'mean':>12}"
+    lines.append(header)
+    for name, column in stats['columns'].items():
+        if not column['count']:
+            continue
+        lines.append(f"{name:<16}{column['min']:>10}{column['p50']:>10.0f}{column['p90']:>10.0f}"
+                     f"{column['p95']:>10.0f}{column['p99']:>10.0f}{column['max']:>10}{column['mean']:>12.1f}")
+    if 'budget' in stats:
+        budget = stats['budget']
+        lines += ['', f"Бюджет {budget['max_tokens']} токенов: оставлено {budget['kept']}, "
+                      f"отброшено {budget['dropped']}"]
+    lines += ['', 'Фреймворки:']
+    for framework, values in stats['frameworks'].items():
+        line = f"  {framework}: {values['records']} записей, в среднем {values['mean_tokens']:.1f} токенов"
+        if 'dropped' in values:
+            line += f", отброшено {values['dropped']}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Статистика датасета и фильтрация по бюджету токенов.')
+    parser.add_argument('input_path', help='Датасет (.jsonl, JSON-массив или директория шардов)')
+    parser.add_argument('--max-tokens', type=int, default=None, help='Бюджет токенов записи (code + result)')
+    parser.add_argument('--output', default=None, help='Файл .jsonl для записей, укладывающихся в бюджет')
+    parser.add_argument('--index', default=None, help='Файл .npy с номерами записей, укладывающихся в бюджет')
+    parser.add_argument('--chars-per-token', type=float, default=DEFAULT_CHARS_PER_TOKEN,
+                        help='Среднее число символов на токен')
+    parser.add_argument('--report', default=None, help='Файл для статистики в формате JSON')
+    parser.add_argument('--language', default=None, choices=sorted(SEGMENTERS),
+                        help='Язык поля code (по умолчанию определяется по фреймворку записи)')
+    args = parser.parse_args()
+    if (args.output or args.index) and args.max_tokens is None:
+        parser.error('--output и --index требуют --max-tokens')
+
+    data = scan_dataset(args.input_path, args.max_tokens, args.output, args.chars_per_token, args.language)
+    stats = compute_stats(data, args.max_tokens)
+    if args.index:
+        write_index(data, args.index, args.max_tokens)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(stats, file, ensure_ascii=False, indent=4)
+    print(format_report(stats))
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dataset_writer import JsonlWriter, iter_jsonl
+
+try:
+    import numpy as np
+    from dataset_stats import compute_stats, format_report, scan_dataset, write_index
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy не установлен')
+class TestDatasetStats(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dataset_path = os.path.join(self.test_dir, 'dataset.jsonl')
+        self.records = [
+            {"prompt": "p", "framework": "pytest", "code": "def f():\n    return 1\n\nclass A:\n    pass",
+             "result": "assert f() == 1"},
+            {"prompt": "p", "framework": "jest", "code": "function g() {\n  return 2;\n}",
+             "result": "test('g', () => expect(g()).toBe(2));"},
+            {"prompt": "p", "framework": "pytest", "code": "def h():\n    return '" + 'x' * 200 + "'",
+             "result": "assert h()"},
+        ]
+        with JsonlWriter(self.dataset_path) as writer:
+            for record in self.records:
+                writer.write(record)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_columns(self):
+        # Проверяет колонки: строки, символы, сущности, токены и номера фреймворков
+        data = scan_dataset(self.dataset_path)
+        self.assertEqual(len(data), 3)
+        self.assertListEqual(data['code_lines'].tolist(), [5, 3, 2])
+        self.assertListEqual(data['entities'].tolist(), [2, 1, 1])
+        self.assertListEqual(data['code_chars'].tolist(), [len(record['code']) for record in self.records])
+        self.assertEqual(int(data['code_tokens'][1]), -(-len(self.records[1]['code']) // 4))
+        self.assertListEqual(data.framework_ids.tolist(), [0, 1, 0])
+        self.assertListEqual(data.frameworks, ['pytest', 'jest'])
+
+    def test_entities_match_pipeline(self):
+        # Проверяет, что сущности считаются как в конвейере: методы учитываются, __init__ и текст в строках — нет
+        records = [{"framework": "pytest", "code": "class B:\n    def __init__(self):\n        pass\n\n"
+                                                   "    def run(self):\n        pass"},
+                   {"framework": "pytest", "code": "doc = '''\ndef fake():\n'''"},
+                   {"framework": "junit", "code": "public class C {\n    public void run() {\n    }\n}"}]
+        dataset_path = os.path.join(self.test_dir, 'entities.jsonl')
+        with JsonlWriter(dataset_path) as writer:
+            for record in records:
+                writer.write(record)
+        self.assertListEqual(scan_dataset(dataset_path)['entities'].tolist()[:2], [2, 0])
+        self.assertEqual(int(scan_dataset(dataset_path, language='java')['entities'][2]), 2)
+
+    def test_stats_and_budget(self):
+        # Проверяет процентили, гистограмму, разбивку по фреймворкам и фильтрацию по бюджету
+        output_path = os.path.join(self.test_dir, 'filtered.jsonl')
+        data = scan_dataset(self.dataset_path, max_tokens=30, output_path=output_path)
+        stats = compute_stats(data, max_tokens=30)
+        self.assertEqual(stats['columns']['code_lines']['p50'], 3.0)
+        self.assertEqual(sum(stats['columns']['code_lines']['histogram'].values()), 3)
+        self.assertDictEqual(stats['budget'], {'max_tokens': 30, 'kept': 2, 'dropped': 1})
+        self.assertEqual(stats['frameworks']['pytest']['records'], 2)
+        self.assertEqual(stats['frameworks']['pytest']['dropped'], 1)
+        self.assertListEqual(list(iter_jsonl(output_path)), self.records[:2])
+        # Повторная фильтрация переписывает выходной файл
+        scan_dataset(self.dataset_path, max_tokens=30, output_path=output_path)
+        self.assertListEqual(list(iter_jsonl(output_path)), self.records[:2])
+        with self.assertRaises(ValueError):
+            scan_dataset(self.dataset_path, max_tokens=30, output_path=self.dataset_path)
+        self.assertIn('Бюджет 30 токенов', format_report(stats))
+        json.dumps(stats)
+
+        index_path = os.path.join(self.test_dir, 'kept.npy')
+        self.assertEqual(write_index(data, index_path, 30), 2)
+        self.assertListEqual(np.load(index_path).tolist(), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import os
+from typing import Any, Dict, Iterator, Optional
+
+from metrics import get_registry
+
+JSONL_EXTENSION = '.jsonl'
+
+
+def is_jsonl_path(file_path: str) -> bool:
+    """Проверяет, нужно ли писать датасет в построчном формате JSON Lines."""
+    return file_path.lower().endswith(JSONL_EXTENSION)
+
+
+class JsonlWriter:
+    """
+    Буферизованный писатель датасета в формате JSON Lines (одна запись — одна строка).
+
+    Файл открывается один раз в режиме дозаписи (или с очисткой, если truncate) и остаётся
+    открытым на весь пакет, поэтому добавление N-й записи стоит O(1) и не зависит от размера файла.
+
+    Аргументы:
+    file_path (str): Путь к файлу .jsonl.
+    fsync_interval (int): Через сколько записей сбрасывать данные на диск через os.fsync
+        (0 — только при закрытии).
+    buffer_size (int): Размер буфера записи в байтах.
+    truncate (bool): Очистить файл при открытии (для выходных файлов, которые пишутся целиком заново).
+    """
+
+    def __init__(self, file_path: str, fsync_interval: int = 1000, buffer_size: int = 1 << 16,
+                 truncate: bool = False):
+        self.file_path = file_path
+        self.fsync_interval = fsync_interval
+        # Двоичный режим: смещения в файле точно соответствуют байтам (нужно для манифеста и индексов)
+        self._file = open(file_path, 'wb' if truncate else 'ab', buffering=buffer_size)
+        self._pending = 0
+        self.records_written = 0
+
+    def write(self, json_object: Dict[str, Any]) -> None:
+        """Дописывает одну запись в конец файла."""
+        metrics = get_registry()
+        with metrics.timer('write'):
+            line = json.dumps(json_object, ensure_ascii=False).encode('utf-8') + b'\n'
+            self._file.write(line)
+        self._written(metrics, len(line))
+
+    def write_raw(self, line: bytes) -> None:
+        """Дописывает уже сериализованную запись (строка JSON с переводом строки в конце)."""
+        metrics = get_registry()
+        with metrics.timer('write'):
+            self._file.write(line)
+        self._written(metrics, len(line))
+
+    def _written(self, metrics, size: int) -> None:
+        metrics.inc('bytes_written', size)
+        self.records_written += 1
+        self._pending += 1
+        if self.fsync_interval and self._pending >= self.fsync_interval:
+            self.sync()
+
+    def tell(self) -> int:
+        """Возвращает размер файла в байтах с учётом ещё не сброшенного буфера."""
+        return self._file.tell()
+
+    def flush(self) -> None:
+        """Сбрасывает буфер в ОС без fsync."""
+        self._file.flush()
+
+    def sync(self) -> None:
+        """Сбрасывает буфер и гарантирует запись данных на диск."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Построчно читает записи из файла JSON Lines, пропуская пустые строки."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def export_to_json_array(jsonl_path: str, json_path: str, indent: Optional[int] = 4) -> int:
+    """
+    Конвертирует JSON Lines в старый формат (JSON-массив) за один проход.
+
+    Результат побайтно совпадает с тем, что записал бы json.dump(data, indent=indent)
+    в main.append_to_json_file. Возвращает количество записей.
+    """
+    count = 0
+    prefix = ' ' * indent if indent else ''
+    with open(json_path, 'w', encoding='utf-8') as outfile:
+        outfile.write('[')
+        for json_object in iter_jsonl(jsonl_path):
+            outfile.write(',' if count else '')
+            if indent is None:
+                outfile.write(' ' if count else '')
+                outfile.write(json.dumps(json_object, ensure_ascii=False))
+            else:
+                dumped = json.dumps(json_object, ensure_ascii=False, indent=indent)
+                outfile.write('\n' + prefix + dumped.replace('\n', '\n' + prefix))
+            count += 1
+        if count and indent is not None:
+            outfile.write('\n')
+        outfile.write(']')
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Экспорт датасета JSON Lines в формат JSON-массива.')
+    parser.add_argument('jsonl_path', help='Путь к входному файлу .jsonl')
+    parser.add_argument('json_path', help='Путь к выходному JSON-файлу')
+    args = parser.parse_args()
+
+    exported = export_to_json_array(args.jsonl_path, args.json_path)
+    print(f'Экспортировано записей: {exported}')
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dataset_writer import JsonlWriter, export_to_json_array, iter_jsonl
+from main import append_to_json_file
+
+
+class TestDatasetWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.jsonl_path = os.path.join(self.test_dir, 'dataset.jsonl')
+        self.records = [
+            {"prompt": "p", "framework": "pytest", "code": "def f():\n    return 'ё'", "result": "assert f()"},
+            {"prompt": "p", "framework": "jest", "code": "const a = 1;", "result": "test('a', () => {});"},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_write_and_iter(self):
+        # Проверяет, что записи дописываются построчно и читаются обратно
+        with JsonlWriter(self.jsonl_path, fsync_interval=1) as writer:
+            writer.write(self.records[0])
+        with JsonlWriter(self.jsonl_path) as writer:
+            writer.write(self.records[1])
+        self.assertListEqual(list(iter_jsonl(self.jsonl_path)), self.records)
+
+    def test_export_matches_legacy_format(self):
+        # Проверяет, что экспорт побайтно совпадает со старым форматом json.dump(indent=4)
+        with JsonlWriter(self.jsonl_path) as writer:
+            for record in self.records:
+                writer.write(record)
+        json_path = os.path.join(self.test_dir, 'dataset.json')
+        self.assertEqual(export_to_json_array(self.jsonl_path, json_path), 2)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            exported = f.read()
+        self.assertEqual(exported, json.dumps(self.records, ensure_ascii=False, indent=4))
+
+    def test_export_empty(self):
+        # Проверяет экспорт пустого датасета
+        open(self.jsonl_path, 'w').close()
+        json_path = os.path.join(self.test_dir, 'dataset.json')
+        export_to_json_array(self.jsonl_path, json_path)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '[]')
+
+    def test_append_to_json_file_jsonl(self):
+        # Проверяет, что append_to_json_file дописывает строку в .jsonl без перезаписи файла
+        append_to_json_file('assert f()', 'def f(): pass', 'pytest', self.jsonl_path)
+        append_to_json_file('assert g()', 'def g(): pass', 'pytest', self.jsonl_path)
+        records = list(iter_jsonl(self.jsonl_path))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1]['code'], 'def g(): pass')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from segmenter import Segment, get_segmenter
+
+
+def parse_python(code: str) -> List[Segment]:
+    """Разбивает код Python на верхнеуровневые фрагменты."""
+    return get_segmenter('python').segments(code)
+
+
+def parse_javascript(code: str) -> List[Segment]:
+    """Разбивает код JavaScript на верхнеуровневые фрагменты."""
+    return get_segmenter('javascript').segments(code)
+
+
+class EntityDeduplicator:
+    """
+    Дедупликация сущностей по структуре кода с кэшем разбора.
+
+    Каждый файл сущности разбирается один раз сегментатором языка (segmenter.py);
+    верхнеуровневые определения и их тексты кэшируются. Код для тестового случая собирается
+    слиянием кэшированных фрагментов: определение с уже встреченным именем и повторяющийся
+    прочий код (например, одинаковые импорты) пропускаются. Стоимость растёт с числом
+    различных сущностей, а не с числом строк в склеенном коде.
+
+    Аргументы:
+    language (str): Язык программирования (любой, для которого зарегистрирован сегментатор).
+    """
+
+    def __init__(self, language: str):
+        self.language = language
+        # Для неподдерживаемого языка get_segmenter выбрасывает ValueError
+        self._segmenter = get_segmenter(language)
+        # Имя сущности -> (версия или текст, фрагменты)
+        self._cache: Dict[str, Tuple[Hashable, List[Segment]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def segments(self, name: str, code: str, version: Optional[Hashable] = None) -> List[Segment]:
+        """Возвращает фрагменты кода сущности, разбирая его только при изменении версии."""
+        key = code if version is None else version
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        segments = self._segmenter.segments(code)
+        self._cache[name] = (key, segments)
+        return segments
+
+    def invalidate(self, name: str) -> None:
+        self._cache.pop(name, None)
+
+    def assemble(self, entities: Iterable[Tuple[str, str, Optional[Hashable]]]) -> str:
+        """
+        Собирает код сущностей без дублирующихся определений.
+
+        Аргументы:
+        entities: Тройки (имя сущности, код, версия файла или None).
+        """
+        seen_names = set()
+        seen_texts = set()
+        parts = []
+        for name, code, version in entities:
+            entity_parts = []
+            for segment in self.segments(name, code, version):
+                if segment.name is not None:
+                    if segment.name in seen_names:
+                        continue
+                    seen_names.add(segment.name)
+                else:
+                    key = segment.text.strip()
+                    if key in seen_texts:
+                        continue
+                    seen_texts.add(key)
+                entity_parts.append(segment.text)
+            if entity_parts:
+                parts.append(''.join(entity_parts).strip('\n'))
+        return '\n'.join(parts).strip()
+
+
+_deduplicators: Dict[str, EntityDeduplicator] = {}
+
+
+def get_deduplicator(language: str) -> EntityDeduplicator:
+    """Возвращает общий для процесса дедупликатор для языка (с его кэшем разбора)."""
+    deduplicator = _deduplicators.get(language)
+    if deduplicator is None:
+        deduplicator = _deduplicators[language] = EntityDeduplicator(language)
+    return deduplicator
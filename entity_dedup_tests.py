@@ -0,0 +1,71 @@
+import unittest
+
+from entity_dedup import EntityDeduplicator, parse_javascript, parse_python
+from process_test import remove_duplicate_entities
+
+
+class TestEntityDedup(unittest.TestCase):
+
+    def test_parse_python(self):
+        # Проверяет разбор Python на верхнеуровневые определения с декораторами
+        code = ('import os\n\n'
+                '@decorator\n'
+                'def my_function():\n'
+                '    return os.sep\n\n'
+                'class MyClass:\n'
+                '    def __init__(self):\n'
+                '        pass\n')
+        segments = parse_python(code)
+        self.assertListEqual([segment.name for segment in segments], [None, 'my_function', 'MyClass'])
+        self.assertIn('@decorator\ndef my_function', segments[1].text)
+
+    def test_parse_javascript(self):
+        # Проверяет разбор JavaScript с учётом вложенных скобок и строк
+        code = ('const x = require("x");\n'
+                'function add(a, b) {\n'
+                '    const s = "}";\n'
+                '    return a + b;\n'
+                '}\n'
+                'export class Item {\n'
+                '    get() { return 1; }\n'
+                '}\n')
+        segments = parse_javascript(code)
+        self.assertListEqual([segment.name for segment in segments], ['x', 'add', 'Item'])
+
+    def test_assemble_removes_duplicates(self):
+        # Проверяет удаление повторяющихся определений и импортов при сборке
+        deduplicator = EntityDeduplicator('python')
+        first = 'import os\n\nclass MyClass:\n    def get(self):\n        return 1\n'
+        second = 'import os\n\nclass MyClass:\n    def get(self):\n        return 1\n\ndef helper():\n    pass\n'
+        code = deduplicator.assemble([('MyClass', first, None), ('helper', second, None)])
+        self.assertEqual(code.count('import os'), 1)
+        self.assertEqual(code.count('class MyClass'), 1)
+        self.assertIn('def helper', code)
+        # Методы с одинаковыми именами в разных классах не считаются дубликатами
+        code = deduplicator.assemble([('A', 'class A:\n    def get(self):\n        pass\n', None),
+                                      ('B', 'class B:\n    def get(self):\n        pass\n', None)])
+        self.assertEqual(code.count('def get'), 2)
+
+    def test_segments_are_cached(self):
+        # Проверяет, что сущность разбирается один раз для одной версии файла
+        deduplicator = EntityDeduplicator('python')
+        for _ in range(3):
+            deduplicator.assemble([('f', 'def f():\n    pass\n', (16, 1))])
+        self.assertEqual((deduplicator.misses, deduplicator.hits), (1, 2))
+        deduplicator.assemble([('f', 'def f():\n    return 1\n', (19, 2))])
+        self.assertEqual(deduplicator.misses, 2)
+
+    def test_remove_duplicate_entities(self):
+        # Проверяет удаление дублирующихся реализаций из склеенного кода
+        code = ('def my_function():\n    return 1\n'
+                'def my_function():\n    return 1\n')
+        self.assertEqual(remove_duplicate_entities(code, 'python'), 'def my_function():\n    return 1')
+
+    def test_unknown_language(self):
+        # Проверяет понятную ошибку для неподдерживаемого языка
+        with self.assertRaises(ValueError):
+            EntityDeduplicator('cobol')
+
+
+if __name__ == '__main__':
+    unittest.main()
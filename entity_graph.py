@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from keyword_matcher import get_keyword_matcher
+
+
+class EntityGraph:
+    """
+    Граф зависимостей между сущностями: какие другие сущности упоминаются в коде каждой.
+
+    Ссылки ищутся тем же автоматом Ахо — Корасик, что и ключевые слова в тестах, один раз на
+    сущность. Транзитивные замыкания мемоизируются, поэтому для тестового случая разрешение
+    зависимостей сводится к объединению уже посчитанных множеств.
+
+    Аргументы:
+    entity_index: Источник сущностей (EntityIndex или EntityStore).
+    word_boundary (bool): Считать ссылкой только целый идентификатор (по умолчанию — да,
+        чтобы `get` не тянул за собой все сущности с `get_` в коде).
+    """
+
+    def __init__(self, entity_index, word_boundary: bool = True):
+        self.entity_index = entity_index
+        self.word_boundary = word_boundary
+        self._keywords = tuple(entity_index.keywords())
+        self._edges: Dict[str, Tuple[str, ...]] = {}
+        self._closures: Dict[str, Tuple[str, ...]] = {}
+
+    def references(self, name: str) -> Tuple[str, ...]:
+        """Возвращает сущности, на которые напрямую ссылается код сущности name."""
+        edges = self._edges.get(name)
+        if edges is None:
+            code = self.entity_index.get(name) or ''
+            matcher = get_keyword_matcher(self._keywords, self.word_boundary)
+            edges = self._edges[name] = tuple(keyword for keyword in matcher.search(code) if keyword != name)
+        return edges
+
+    def build(self) -> None:
+        """Заранее вычисляет прямые ссылки для всех сущностей."""
+        for name in self._keywords:
+            self.references(name)
+
+    def closure(self, name: str) -> Tuple[str, ...]:
+        """Возвращает сущность и все её транзитивные зависимости в порядке обхода в ширину."""
+        closure = self._closures.get(name)
+        if closure is not None:
+            return closure
+
+        order = [name]
+        seen = {name}
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            known = self._closures.get(current) if current != name else None
+            # Уже посчитанное замыкание подставляется целиком, без повторного обхода
+            dependencies = known if known is not None else self.references(current)
+            for dependency in dependencies:
+                if dependency not in seen:
+                    seen.add(dependency)
+                    order.append(dependency)
+                    if known is None:
+                        queue.append(dependency)
+        closure = self._closures[name] = tuple(order)
+        return closure
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """Дополняет найденные в тесте сущности их транзитивными зависимостями, сохраняя порядок."""
+        names = list(names)
+        resolved = []
+        seen = set()
+        for name in names:
+            if name not in seen:
+                seen.add(name)
+                resolved.append(name)
+        for name in names:
+            if name not in self.entity_index:
+                continue
+            for dependency in self.closure(name):
+                if dependency not in seen:
+                    seen.add(dependency)
+                    resolved.append(dependency)
+        return resolved
+
+    def invalidate(self, names: Iterable[str]) -> None:
+        """Сбрасывает ссылки изменившихся сущностей и все замыкания."""
+        keywords = tuple(self.entity_index.keywords())
+        if set(keywords) != set(self._keywords):
+            # Новая или удалённая сущность может менять ссылки в коде любой другой
+            self._edges.clear()
+        else:
+            for name in names:
+                self._edges.pop(name, None)
+        self._keywords = keywords
+        self._closures.clear()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from entity_graph import EntityGraph
+from entity_index import EntityIndex
+from process_test import build_entity_code
+
+
+class TestEntityGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.create_entity_file('MyClass.txt', 'class MyClass:\n    def run(self):\n        return helper_fn()\n')
+        self.create_entity_file('helper_fn.txt', 'def helper_fn():\n    return low_level()\n')
+        self.create_entity_file('low_level.txt', 'def low_level():\n    return MyClass\n')
+        self.create_entity_file('unused.txt', 'def unused():\n    pass\n')
+        self.index = EntityIndex(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content):
+        with open(os.path.join(self.test_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_closure_with_cycle(self):
+        # Проверяет транзитивное замыкание при циклической зависимости
+        graph = EntityGraph(self.index)
+        self.assertTupleEqual(graph.closure('MyClass'), ('MyClass', 'helper_fn', 'low_level'))
+        self.assertTupleEqual(graph.closure('helper_fn'), ('helper_fn', 'low_level', 'MyClass'))
+        self.assertTupleEqual(graph.closure('unused'), ('unused',))
+
+    def test_resolve_keeps_found_first(self):
+        # Проверяет, что найденные в тесте сущности идут первыми, а зависимости — после них
+        graph = EntityGraph(self.index)
+        self.assertListEqual(graph.resolve(['helper_fn', 'missing']),
+                             ['helper_fn', 'missing', 'low_level', 'MyClass'])
+
+    def test_build_entity_code_transitive(self):
+        # Проверяет, что код зависимостей попадает в запись, даже если тест их не упоминает
+        test_code = 'def test_run():\n    assert MyClass().run()\n'
+        keywords = self.index.keywords()
+        direct = build_entity_code(test_code, keywords, self.test_dir, 'python', entity_index=self.index)
+        transitive = build_entity_code(test_code, keywords, self.test_dir, 'python', entity_index=self.index,
+                                       dependency_graph=EntityGraph(self.index))
+        self.assertNotIn('def helper_fn', direct)
+        self.assertIn('def helper_fn', transitive)
+        self.assertIn('def low_level', transitive)
+        self.assertNotIn('def unused', transitive)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+ENTITY_EXTENSION = '.txt'
+
+
+def default_sidecar_path(code_directory: str) -> str:
+    """Путь к файлу индекса рядом с директорией сущностей (не внутри неё, чтобы не менять её mtime)."""
+    return os.path.normpath(code_directory) + '.index.json'
+
+
+class EntityIndex:
+    """
+    Индекс директории сущностей: имена, размеры и mtime файлов `<keyword>.txt` плюс LRU-кэш их содержимого.
+
+    Директория сканируется один раз; содержимое файла читается при первом обращении и хранится
+    в кэше, ограниченном по объёму. refresh() повторно проверяет mtime и сбрасывает из кэша только
+    изменившиеся файлы. Индекс можно сохранить в файл рядом с директорией: при холодном старте,
+    если mtime директории не изменился, директория не перечитывается и файлы не проверяются.
+    Правка файла на месте не меняет mtime директории, поэтому запись из сохранённого индекса
+    перепроверяется stat при первом обращении к сущности (get() или version()).
+
+    Аргументы:
+    code_directory (str): Директория с файлами сущностей.
+    max_cache_bytes (int): Ограничение объёма кэша содержимого в байтах.
+    sidecar_path (str): Путь к файлу индекса (None — не сохранять индекс).
+    """
+
+    def __init__(self, code_directory: str, max_cache_bytes: int = 64 * 1024 * 1024,
+                 sidecar_path: Optional[str] = None):
+        self.code_directory = code_directory
+        self.max_cache_bytes = max_cache_bytes
+        self.sidecar_path = sidecar_path
+        # Имя сущности -> (размер в байтах, mtime в наносекундах), в порядке os.listdir
+        self._entries: Dict[str, Tuple[int, int]] = {}
+        self._directory_mtime = 0
+        # Сущности из сохранённого индекса, ещё не перепроверенные stat
+        self._unverified: Set[str] = set()
+        # Имя сущности -> (mtime, размер, содержимое)
+        self._cache: 'OrderedDict[str, Tuple[int, int, str]]' = OrderedDict()
+        self._cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+
+        if not (sidecar_path and self._load_sidecar()):
+            self._scan()
+            if sidecar_path:
+                self.save()
+
+    def _scan(self) -> None:
+        self._directory_mtime = os.stat(self.code_directory).st_mtime_ns
+        entries = {}
+        with os.scandir(self.code_directory) as iterator:
+            for entry in iterator:
+                if entry.name.endswith(ENTITY_EXTENSION):
+                    stat = entry.stat()
+                    entries[os.path.splitext(entry.name)[0]] = (stat.st_size, stat.st_mtime_ns)
+        self._entries = entries
+        self._unverified = set()
+
+    def _load_sidecar(self) -> bool:
+        try:
+            with open(self.sidecar_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            directory_mtime = os.stat(self.code_directory).st_mtime_ns
+        except (OSError, ValueError):
+            return False
+        if data.get('directory') != os.path.abspath(self.code_directory) or data.get('mtime') != directory_mtime:
+            return False
+        self._directory_mtime = directory_mtime
+        self._entries = {name: (size, mtime) for name, size, mtime in data['entries']}
+        # Записи проверяются лениво: холодный старт стоит одного stat директории
+        self._unverified = set(self._entries)
+        return True
+
+    def _verify(self, name: str) -> None:
+        """Перепроверяет stat сущности из сохранённого индекса при первом обращении к ней."""
+        self._unverified.discard(name)
+        try:
+            stat = os.stat(self.path(name))
+        except FileNotFoundError:
+            self._entries.pop(name, None)
+            self._evict(name)
+            return
+        if (stat.st_size, stat.st_mtime_ns) != self._entries.get(name):
+            self._entries[name] = (stat.st_size, stat.st_mtime_ns)
+            self._evict(name)
+
+    def save(self) -> None:
+        """Сохраняет индекс (без содержимого файлов) в файл рядом с директорией."""
+        data = {
+            'directory': os.path.abspath(self.code_directory),
+            'mtime': self._directory_mtime,
+            'entries': [[name, size, mtime] for name, (size, mtime) in self._entries.items()],
+        }
+        temp_path = self.sidecar_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temp_path, self.sidecar_path)
+
+    def refresh(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Перепроверяет файлы сущностей по mtime и сбрасывает кэш изменившихся файлов.
+
+        Аргументы:
+        names (iterable): Сущности для перепроверки. Если указаны и mtime директории не изменился
+            (файлы не добавлялись и не удалялись), stat выполняется только для них; иначе
+            директория перечитывается целиком.
+
+        Возвращает имена добавленных, изменённых и удалённых сущностей.
+        """
+        if names is not None and os.stat(self.code_directory).st_mtime_ns == self._directory_mtime:
+            changed = self._restat(names)
+        else:
+            changed = self._rescan(self._entries)
+        for name in changed:
+            self._evict(name)
+        if changed and self.sidecar_path:
+            self.save()
+        return changed
+
+    def _rescan(self, old_entries: Dict[str, Tuple[int, int]]) -> List[str]:
+        """Перечитывает директорию; возвращает сущности, отличающиеся от old_entries."""
+        self._scan()
+        changed = [name for name, entry in self._entries.items() if old_entries.get(name) != entry]
+        changed.extend(name for name in old_entries if name not in self._entries)
+        return changed
+
+    def _restat(self, names: Iterable[str]) -> List[str]:
+        """Перепроверяет stat указанных известных сущностей; возвращает изменившиеся."""
+        changed = []
+        # Прежние записи уже обновлённых сущностей: нужны, если придётся перечитать директорию
+        previous = {}
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is None:
+                continue
+            self._unverified.discard(name)
+            try:
+                stat = os.stat(self.path(name))
+            except FileNotFoundError:
+                # Файл удалён в пределах разрешения mtime директории: директория перечитывается,
+                # и все изменения считаются относительно записей до начала проверки
+                old_entries = dict(self._entries)
+                old_entries.update(previous)
+                return self._rescan(old_entries)
+            if (stat.st_size, stat.st_mtime_ns) != entry:
+                previous[name] = entry
+                self._entries[name] = (stat.st_size, stat.st_mtime_ns)
+                changed.append(name)
+        return changed
+
+    def keywords(self) -> List[str]:
+        """Возвращает имена сущностей (ключевые слова)."""
+        return list(self._entries)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.code_directory, f"{name}{ENTITY_EXTENSION}")
+
+    def version(self, name: str) -> Optional[Tuple[int, int]]:
+        """Возвращает (размер, mtime) файла сущности или None, если сущности нет."""
+        if name in self._unverified:
+            self._verify(name)
+        return self._entries.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str) -> Optional[str]:
+        """Возвращает код сущности из кэша или читает его с диска; None, если сущности нет."""
+        if name in self._unverified:
+            self._verify(name)
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == entry[1]:
+            self._cache.move_to_end(name)
+            self.hits += 1
+            return cached[2]
+
+        self.misses += 1
+        try:
+            with open(self.path(name), 'r', encoding='utf-8') as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+        self.bytes_read += entry[0]
+        self._store(name, entry, content)
+        return content
+
+    def _store(self, name: str, entry: Tuple[int, int], content: str) -> None:
+        self._evict(name)
+        size = entry[0]
+        if size > self.max_cache_bytes:
+            return
+        self._cache[name] = (entry[1], size, content)
+        self._cache_bytes += size
+        while self._cache_bytes > self.max_cache_bytes:
+            _, (_, evicted_size, _) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted_size
+
+    def _evict(self, name: str) -> None:
+        cached = self._cache.pop(name, None)
+        if cached is not None:
+            self._cache_bytes -= cached[1]
+
+    def __getstate__(self):
+        # В рабочие процессы передаётся только индекс, без кэша содержимого
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_cache_bytes'] = 0
+        return state
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from entity_index import EntityIndex, default_sidecar_path
+
+
+class TestEntityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        self.create_entity_file('MyClass.txt', 'class MyClass:\n    pass\n')
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 1\n')
+        self.create_entity_file('notes.md', 'не сущность')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content, mtime_ns=None):
+        file_path = os.path.join(self.code_directory, file_name)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+    def test_keywords_and_get(self):
+        # Проверяет список сущностей и чтение кода с кэшированием
+        index = EntityIndex(self.code_directory)
+        self.assertSetEqual(set(index.keywords()), {'MyClass', 'my_function'})
+        self.assertEqual(index.get('my_function'), 'def my_function():\n    return 1\n')
+        self.assertEqual(index.get('my_function'), 'def my_function():\n    return 1\n')
+        self.assertEqual((index.hits, index.misses), (1, 1))
+        self.assertIsNone(index.get('missing'))
+
+    def test_cache_respects_memory_cap(self):
+        # Проверяет, что LRU-кэш не превышает заданный объём
+        index = EntityIndex(self.code_directory, max_cache_bytes=40)
+        index.get('MyClass')
+        index.get('my_function')
+        self.assertLessEqual(index._cache_bytes, 40)
+        self.assertEqual(list(index._cache), ['my_function'])
+
+    def test_refresh_invalidates_changed_files(self):
+        # Проверяет, что refresh перечитывает только изменившиеся файлы
+        index = EntityIndex(self.code_directory)
+        index.get('MyClass')
+        index.get('my_function')
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 2\n', mtime_ns=10 ** 18)
+        self.assertListEqual(index.refresh(), ['my_function'])
+        self.assertIn('MyClass', index._cache)
+        self.assertEqual(index.get('my_function'), 'def my_function():\n    return 2\n')
+
+    def test_refresh_names_with_deleted_file(self):
+        # Проверяет, что удаление одного файла при неизменном mtime директории не скрывает правку другого
+        for order in (['MyClass', 'my_function'], ['my_function', 'MyClass']):
+            self.create_entity_file('MyClass.txt', 'class MyClass:\n    pass\n')
+            index = EntityIndex(self.code_directory)
+            directory_mtime = os.stat(self.code_directory).st_mtime_ns
+            os.remove(os.path.join(self.code_directory, 'MyClass.txt'))
+            self.create_entity_file('my_function.txt', f'def my_function():\n    return {len(order[0])}\n',
+                                    mtime_ns=10 ** 18 + len(order[0]))
+            os.utime(self.code_directory, ns=(directory_mtime, directory_mtime))
+            self.assertSetEqual(set(index.refresh(order)), {'MyClass', 'my_function'})
+            self.assertNotIn('MyClass', index)
+
+    def test_sidecar_skips_rescan(self):
+        # Проверяет, что сохранённый индекс используется при холодном старте
+        sidecar_path = default_sidecar_path(self.code_directory)
+        EntityIndex(self.code_directory, sidecar_path=sidecar_path)
+        self.assertTrue(os.path.exists(sidecar_path))
+
+        # Холодный старт не сканирует директорию и не проверяет файлы: один stat самой директории
+        with mock.patch.object(EntityIndex, '_scan', side_effect=AssertionError('повторное сканирование')), \
+                mock.patch('entity_index.os.stat', wraps=os.stat) as stat:
+            index = EntityIndex(self.code_directory, sidecar_path=sidecar_path)
+            self.assertSetEqual(set(index.keywords()), {'MyClass', 'my_function'})
+        self.assertEqual(stat.call_count, 1)
+
+    def test_sidecar_detects_in_place_edit(self):
+        # Проверяет, что правка файла на месте (mtime директории не меняется) видна при холодном старте
+        sidecar_path = default_sidecar_path(self.code_directory)
+        EntityIndex(self.code_directory, sidecar_path=sidecar_path)
+        directory_mtime = os.stat(self.code_directory).st_mtime_ns
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 222\n', mtime_ns=10 ** 18)
+        os.utime(self.code_directory, ns=(directory_mtime, directory_mtime))
+        index = EntityIndex(self.code_directory, sidecar_path=sidecar_path)
+        self.assertEqual(index.get('my_function'), 'def my_function():\n    return 222\n')
+        self.assertEqual(index.version('my_function')[1], 10 ** 18)
+
+
+if __name__ == '__main__':
+    unittest.main()
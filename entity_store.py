@@ -0,0 +1,198 @@
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from entity_index import ENTITY_EXTENSION, EntityIndex
+
+# Заголовок: сигнатура, смещение и длина JSON-оглавления
+STORE_MAGIC = b'AWPACK1\0'
+HEADER = struct.Struct('<8sQQ')
+
+
+class EntityStore:
+    """
+    Упакованное хранилище сущностей: один файл вместо тысяч `<keyword>.txt`.
+
+    Формат: заголовок, подряд идущие тексты сущностей в UTF-8 и JSON-оглавление
+    (имя -> смещение, длина, mtime исходного файла). Файл открывается одним вызовом open/mmap,
+    поиск сущности — O(1) по оглавлению, get_bytes() возвращает memoryview без копирования.
+    Интерфейс совпадает с EntityIndex, поэтому хранилище можно передавать вместо директории.
+
+    Аргументы:
+    store_path (str): Путь к файлу хранилища.
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        self.code_directory = store_path
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.store_path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != STORE_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Файл не является хранилищем сущностей: {self.store_path}")
+        entries = json.loads(self._mmap[index_offset:index_offset + index_length].decode('utf-8'))
+        # Имя сущности -> (смещение, длина, mtime), в порядке упаковки
+        self._entries: Dict[str, Tuple[int, int, int]] = {
+            name: (offset, length, mtime) for name, offset, length, mtime in entries
+        }
+        self._view = memoryview(self._mmap)
+
+    def keywords(self) -> List[str]:
+        """Возвращает имена сущностей (ключевые слова)."""
+        return list(self._entries)
+
+    def version(self, name: str) -> Optional[Tuple[int, int]]:
+        """Возвращает (размер, mtime) исходного файла сущности или None, если сущности нет."""
+        entry = self._entries.get(name)
+        return None if entry is None else (entry[1], entry[2])
+
+    def refresh(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Хранилище неизменяемо: перепаковка создаёт новый файл."""
+        return []
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_bytes(self, name: str) -> Optional[memoryview]:
+        """Возвращает код сущности как memoryview над mmap без копирования."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        self.hits += 1
+        self.bytes_read += length
+        return self._view[offset:offset + length]
+
+    def get(self, name: str) -> Optional[str]:
+        """Возвращает код сущности; None, если сущности нет."""
+        data = self.get_bytes(name)
+        if data is None:
+            return None
+        content = str(data, 'utf-8')
+        # Как при чтении файла в текстовом режиме: переводы строк приводятся к '\n'
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Выданные get_bytes() memoryview держат mmap открытым, пока их не освободят
+            pass
+
+    def __enter__(self) -> 'EntityStore':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __getstate__(self):
+        # В рабочий процесс передаётся только путь, mmap открывается заново
+        return {'store_path': self.store_path}
+
+    def __setstate__(self, state):
+        self.__init__(state['store_path'])
+
+
+def is_entity_store(path: str) -> bool:
+    """Проверяет, указывает ли путь на упакованное хранилище (а не на директорию)."""
+    return os.path.isfile(path)
+
+
+# Абсолютный путь -> ((размер, mtime) файла, открытое хранилище)
+_stores: Dict[str, Tuple[Tuple[int, int], EntityStore]] = {}
+
+
+def get_entity_store(store_path: str) -> EntityStore:
+    """
+    Возвращает общее для процесса открытое хранилище: оглавление разбирается и mmap открывается
+    один раз, а не на каждый тестовый случай. После перепаковки файла открывается новое хранилище.
+    """
+    key = os.path.abspath(store_path)
+    stat = os.stat(store_path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    cached = _stores.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    # Прежнее хранилище не закрывается явно: его ещё могут использовать; mmap закроется при сборке мусора
+    store = EntityStore(store_path)
+    _stores[key] = (version, store)
+    return store
+
+
+def open_entity_source(path: str, **kwargs) -> Union[EntityIndex, EntityStore]:
+    """Открывает источник сущностей: упакованное хранилище или директорию с файлами `<keyword>.txt`."""
+    if is_entity_store(path):
+        return EntityStore(path)
+    return EntityIndex(path, **kwargs)
+
+
+def pack_directory(code_directory: str, store_path: str) -> int:
+    """Упаковывает директорию сущностей в один файл. Возвращает количество сущностей."""
+    entries = []
+    temp_path = store_path + '.tmp'
+    with open(temp_path, 'wb') as outfile:
+        outfile.write(HEADER.pack(STORE_MAGIC, 0, 0))
+        offset = HEADER.size
+        with os.scandir(code_directory) as iterator:
+            for entry in iterator:
+                if not entry.name.endswith(ENTITY_EXTENSION):
+                    continue
+                with open(entry.path, 'rb') as infile:
+                    data = infile.read()
+                outfile.write(data)
+                entries.append([os.path.splitext(entry.name)[0], offset, len(data), entry.stat().st_mtime_ns])
+                offset += len(data)
+        index = json.dumps(entries, ensure_ascii=False).encode('utf-8')
+        outfile.write(index)
+        outfile.seek(0)
+        outfile.write(HEADER.pack(STORE_MAGIC, offset, len(index)))
+    os.replace(temp_path, store_path)
+    return len(entries)
+
+
+def unpack_store(store_path: str, code_directory: str) -> int:
+    """Распаковывает хранилище обратно в директорию файлов `<keyword>.txt`. Возвращает количество сущностей."""
+    os.makedirs(code_directory, exist_ok=True)
+    with EntityStore(store_path) as store:
+        for name in store.keywords():
+            file_path = os.path.join(code_directory, f"{name}{ENTITY_EXTENSION}")
+            with open(file_path, 'wb') as outfile:
+                outfile.write(store.get_bytes(name))
+            _, mtime = store.version(name)
+            os.utime(file_path, ns=(mtime, mtime))
+        return len(store)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Упаковка директории сущностей в один файл и обратно.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    pack_parser = subparsers.add_parser('pack', help='Упаковать директорию в хранилище')
+    pack_parser.add_argument('code_directory')
+    pack_parser.add_argument('store_path')
+    unpack_parser = subparsers.add_parser('unpack', help='Распаковать хранилище в директорию')
+    unpack_parser.add_argument('store_path')
+    unpack_parser.add_argument('code_directory')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        count = pack_directory(args.code_directory, args.store_path)
+    else:
+        count = unpack_store(args.store_path, args.code_directory)
+    print(f'Обработано сущностей: {count}')
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from entity_store import EntityStore, get_entity_store, pack_directory, unpack_store
+from pipeline import get_keywords_from_directory
+from process_file import run_batch
+from process_test import build_entity_code
+
+
+class TestEntityStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        self.create_entity_file('MyClass.txt', 'class MyClass:\n    name = "Класс"\n')
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 1\n')
+        self.store_path = os.path.join(self.test_dir, 'entities.pack')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content):
+        with open(os.path.join(self.code_directory, file_name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_pack_and_get(self):
+        # Проверяет упаковку директории и чтение сущностей из хранилища
+        self.assertEqual(pack_directory(self.code_directory, self.store_path), 2)
+        with EntityStore(self.store_path) as store:
+            self.assertSetEqual(set(store.keywords()), {'MyClass', 'my_function'})
+            self.assertEqual(store.get('MyClass'), 'class MyClass:\n    name = "Класс"\n')
+            self.assertEqual(bytes(store.get_bytes('my_function')), b'def my_function():\n    return 1\n')
+            self.assertIsNone(store.get('missing'))
+        self.assertEqual(get_keywords_from_directory(self.store_path), get_keywords_from_directory(self.code_directory))
+
+    def test_store_opened_once(self):
+        # Проверяет, что без переданного индекса хранилище открывается один раз, а после перепаковки — заново
+        pack_directory(self.code_directory, self.store_path)
+        store = get_entity_store(self.store_path)
+        for _ in range(3):
+            code = build_entity_code('assert my_function() == 1', ['my_function'], self.store_path, 'python')
+            self.assertEqual(code, 'def my_function():\n    return 1')
+        self.assertIs(get_entity_store(self.store_path), store)
+        self.create_entity_file('other.txt', 'def other():\n    return 2\n')
+        pack_directory(self.code_directory, self.store_path)
+        os.utime(self.store_path, ns=(10 ** 18, 10 ** 18))
+        self.assertIn('other', get_entity_store(self.store_path).keywords())
+
+    def test_unpack_roundtrip(self):
+        # Проверяет, что распаковка восстанавливает исходные файлы
+        pack_directory(self.code_directory, self.store_path)
+        restored = os.path.join(self.test_dir, 'restored')
+        self.assertEqual(unpack_store(self.store_path, restored), 2)
+        for file_name in os.listdir(self.code_directory):
+            with open(os.path.join(self.code_directory, file_name), 'rb') as original, \
+                    open(os.path.join(restored, file_name), 'rb') as copy:
+                self.assertEqual(original.read(), copy.read())
+
+    def test_run_batch_with_store(self):
+        # Проверяет, что пакетный режим принимает хранилище вместо директории
+        input_file_path = os.path.join(self.test_dir, 'tests.py')
+        with open(input_file_path, 'w', encoding='utf-8') as f:
+            f.write('def test_one():\n    assert my_function() == 1\n\n'
+                    'def test_two():\n    assert MyClass.name\n')
+        pack_directory(self.code_directory, self.store_path)
+        from_directory = os.path.join(self.test_dir, 'directory.jsonl')
+        from_store = os.path.join(self.test_dir, 'store.jsonl')
+        run_batch(input_file_path, self.code_directory, 'pytest', from_directory, 'python')
+        run_batch(input_file_path, self.store_path, 'pytest', from_store, 'python', workers=2)
+        with open(from_directory, 'rb') as expected, open(from_store, 'rb') as actual:
+            self.assertEqual(expected.read(), actual.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
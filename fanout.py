@@ -0,0 +1,153 @@
+import json
+import threading
+from collections import namedtuple
+from queue import Queue
+from typing import List, Optional
+
+from case_splitter import iter_test_cases
+from dataset_writer import JsonlWriter, is_jsonl_path
+from entity_store import open_entity_source
+from import_resolver import build_import_resolver
+from main import append_records_to_json_file
+from metrics import get_registry
+from process_file import iter_records
+from records import Record
+from validator import RecordValidator, default_quarantine_path
+
+# Цель вывода: фреймворк (меняет только поля prompt и framework) и файл датасета
+FanoutTarget = namedtuple('FanoutTarget', ['framework', 'output_file_path'])
+
+# Поля записи, общие для всех целей; в JSON-объекте записи они идут последними
+SHARED_FIELDS = ('code', 'result')
+
+
+def parse_target(text: str) -> FanoutTarget:
+    """Разбирает цель из строки вида `pytest=pytest_jsons.jsonl`."""
+    framework, separator, output_file_path = text.partition('=')
+    if not separator or not framework or not output_file_path:
+        raise ValueError(f"Цель должна иметь вид <фреймворк>=<файл>: {text}")
+    return FanoutTarget(framework, output_file_path)
+
+
+def target_prefix(framework: str) -> bytes:
+    """Начало строки JSON Lines для фреймворка: поля записи до общих полей, без закрывающей скобки."""
+    json_object = Record('', '', framework).to_json_object()
+    header = {key: value for key, value in json_object.items() if key not in SHARED_FIELDS}
+    return json.dumps(header, ensure_ascii=False)[:-1].encode('utf-8')
+
+
+def record_body(record: Record) -> bytes:
+    """Общая для всех целей часть строки JSON Lines: поля code и result, закрывающая скобка и перевод строки."""
+    json_object = record.to_json_object()
+    body = ''.join(f", {json.dumps(field)}: {json.dumps(json_object[field], ensure_ascii=False)}"
+                   for field in SHARED_FIELDS)
+    return (body + '}\n').encode('utf-8')
+
+
+class _TargetWriter(threading.Thread):
+    """Поток записи одной цели: получает записи из ограниченной очереди и дописывает их в свой файл."""
+
+    def __init__(self, target: FanoutTarget, queue_size: int):
+        super().__init__(name=f"fanout-{target.framework}", daemon=True)
+        self.target = target
+        self.queue = Queue(maxsize=queue_size)
+        self.written = 0
+        self.error: Optional[BaseException] = None
+        # Получен ли уже маркер конца очереди (None)
+        self._finished = False
+
+    def _items(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self._finished = True
+                return
+            yield item
+
+    def run(self) -> None:
+        try:
+            if is_jsonl_path(self.target.output_file_path):
+                self._write_jsonl()
+            else:
+                self._write_json_array()
+        except BaseException as error:
+            self.error = error
+            # Очередь дочитывается до конца, чтобы основной поток не заблокировался на put
+            if not self._finished:
+                for _ in self._items():
+                    pass
+
+    def _write_jsonl(self) -> None:
+        prefix = target_prefix(self.target.framework)
+        with JsonlWriter(self.target.output_file_path) as writer:
+            for _, body in self._items():
+                writer.write_raw(prefix + body)
+            self.written = writer.records_written
+
+    def _write_json_array(self) -> None:
+        json_objects = [record.to_json_object(self.target.framework) for record, _ in self._items()]
+        append_records_to_json_file(json_objects, self.target.output_file_path)
+        self.written = len(json_objects)
+
+
+def run_fanout(input_file_path, code_directory, targets: List[FanoutTarget], language, workers=1, chunk_size=16,
+               word_boundary=False, sidecar_path=None, transitive=False, queue_size=256, validate=False,
+               quarantine_path=None, resolve_imports=False, import_file_path=None) -> List[int]:
+    """
+    Собирает датасеты для нескольких фреймворков за один проход по входному файлу.
+
+    Разбиение, поиск сущностей и сборка их кода выполняются один раз на тестовый случай; общая
+    часть строки JSON Lines (поля code и result) сериализуется один раз, а поток каждой цели
+    только дописывает её после своего префикса с prompt и framework. Потоки записи работают
+    параллельно с обработкой, очереди ограничены, поэтому память не растёт с размером входа.
+
+    Аргументы:
+    input_file_path (str): Путь к входному файлу с тестами.
+    code_directory (str): Директория с файлами сущностей или упакованное хранилище.
+    targets (list): Цели FanoutTarget(фреймворк, выходной файл .jsonl или .json/.txt).
+    language (str): Язык программирования.
+    workers, chunk_size, word_boundary, sidecar_path, transitive: как в process_file.run_batch.
+    queue_size (int): Максимум записей в очереди одной цели.
+    validate, resolve_imports, import_file_path: как в process_file.run_batch; проверка и дополнение
+        импортов выполняются один раз на запись, до раздачи по целям.
+    quarantine_path (str): Файл карантина (по умолчанию — рядом с файлом первой цели).
+
+    Возвращает:
+    list: Количество записанных записей для каждой цели.
+    """
+    if not targets:
+        raise ValueError("Не указано ни одной цели")
+    writers = [_TargetWriter(target, queue_size) for target in targets]
+    for writer in writers:
+        writer.start()
+    needs_body = any(is_jsonl_path(target.output_file_path) for target in targets)
+    quarantine = None
+
+    try:
+        test_cases = get_registry().timed_iter('split', iter_test_cases(input_file_path, language))
+        entity_index = open_entity_source(code_directory, sidecar_path=sidecar_path)
+        records = iter_records(test_cases, entity_index, targets[0].framework, language, workers, chunk_size,
+                               word_boundary, transitive)
+        if resolve_imports or import_file_path:
+            records = build_import_resolver(language, entity_index, import_file_path).resolve_records(records)
+        if validate:
+            validator = RecordValidator(workers)
+            quarantine = JsonlWriter(quarantine_path or default_quarantine_path(targets[0].output_file_path))
+            records = validator.filter(records, quarantine)
+        for record in records:
+            item = (record, record_body(record) if needs_body else None)
+            for writer in writers:
+                writer.queue.put(item)
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+            get_registry().collect('validation_cache', validator)
+        for writer in writers:
+            writer.queue.put(None)
+        for writer in writers:
+            writer.join()
+
+    for writer in writers:
+        if writer.error is not None:
+            raise writer.error
+    return [writer.written for writer in writers]
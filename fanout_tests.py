@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from fanout import FanoutTarget, parse_target, run_fanout
+from process_file import run_batch
+
+
+class TestFanout(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        with open(os.path.join(self.code_directory, 'helper.txt'), 'w', encoding='utf-8') as f:
+            f.write('def helper():\n    return "тест"\n')
+        self.input_file_path = os.path.join(self.test_dir, 'tests.py')
+        with open(self.input_file_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(f'def test_{i}():\n    assert helper() == "тест"\n\n' for i in range(40)))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def read_bytes(self, name):
+        with open(self.path(name), 'rb') as f:
+            return f.read()
+
+    def test_matches_separate_runs(self):
+        # Проверяет, что каждая цель побайтно совпадает с отдельным запуском run_batch
+        targets = [FanoutTarget('pytest', self.path('pytest.jsonl')),
+                   FanoutTarget('unittest', self.path('unittest.jsonl'))]
+        written = run_fanout(self.input_file_path, self.code_directory, targets, 'python', queue_size=4)
+        self.assertListEqual(written, [40, 40])
+        for framework in ('pytest', 'unittest'):
+            run_batch(self.input_file_path, self.code_directory, framework, self.path(f'{framework}_batch.jsonl'),
+                      'python')
+            self.assertEqual(self.read_bytes(f'{framework}.jsonl'), self.read_bytes(f'{framework}_batch.jsonl'))
+
+    def test_validate(self):
+        # Проверяет, что проверка синтаксиса и карантин работают как в run_batch
+        with open(self.input_file_path, 'a', encoding='utf-8') as f:
+            f.write('def test_broken():\n    assert helper( == 1\n')
+        targets = [FanoutTarget('pytest', self.path('pytest.jsonl'))]
+        self.assertListEqual(run_fanout(self.input_file_path, self.code_directory, targets, 'python', validate=True,
+                                        quarantine_path=self.path('fanout.quarantine.jsonl')), [40])
+        run_batch(self.input_file_path, self.code_directory, 'pytest', self.path('batch.jsonl'), 'python',
+                  validate=True, quarantine_path=self.path('batch.quarantine.jsonl'))
+        self.assertEqual(self.read_bytes('pytest.jsonl'), self.read_bytes('batch.jsonl'))
+        self.assertEqual(self.read_bytes('fanout.quarantine.jsonl'), self.read_bytes('batch.quarantine.jsonl'))
+        self.assertEqual(self.read_bytes('fanout.quarantine.jsonl').count(b'\n'), 1)
+
+    def test_resolve_imports(self):
+        # Проверяет, что дополнение импортов работает как в run_batch
+        with open(os.path.join(self.code_directory, 'loader.txt'), 'w', encoding='utf-8') as f:
+            f.write('import json\n\ndef loader(text):\n    return json.loads(text)\n')
+        with open(self.input_file_path, 'a', encoding='utf-8') as f:
+            f.write('def test_loader():\n    assert loader("1") == 1\n')
+        targets = [FanoutTarget('pytest', self.path('pytest.jsonl'))]
+        self.assertListEqual(run_fanout(self.input_file_path, self.code_directory, targets, 'python',
+                                        resolve_imports=True), [41])
+        run_batch(self.input_file_path, self.code_directory, 'pytest', self.path('batch.jsonl'), 'python',
+                  resolve_imports=True)
+        self.assertEqual(self.read_bytes('pytest.jsonl'), self.read_bytes('batch.jsonl'))
+        self.assertIn(b'import json', self.read_bytes('pytest.jsonl'))
+
+    def test_command_line_rejects_unsupported_options(self):
+        # Проверяет, что параметры, не поддерживаемые режимом --target, не игнорируются молча
+        command = [sys.executable, 'process_file.py', '--input', self.input_file_path, '--entities',
+                   self.code_directory, '--target', f"pytest={self.path('pytest.jsonl')}"]
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        for options in (['--dedup-index', self.path('dedup.bin')], ['--shard-records', '10'],
+                        ['--compression', 'gzip']):
+            completed = subprocess.run(command + options, cwd=cwd, capture_output=True, text=True)
+            self.assertEqual(completed.returncode, 2)
+        completed = subprocess.run(command + ['--validate'], cwd=cwd, capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(self.read_bytes('pytest.jsonl').count(b'\n'), 40)
+
+    def test_json_array_target(self):
+        # Проверяет цель в старом формате JSON-массива вместе с целью .jsonl
+        targets = [FanoutTarget('pytest', self.path('pytest.jsonl')), FanoutTarget('nose', self.path('nose.json'))]
+        run_fanout(self.input_file_path, self.code_directory, targets, 'python')
+        with open(self.path('nose.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(len(data), 40)
+        self.assertEqual(data[0]['framework'], 'nose')
+        self.assertIn('nose framework', data[0]['prompt'])
+
+    def test_writer_error_is_raised(self):
+        # Проверяет, что ошибка потока записи не блокирует обработку и передаётся вызывающему
+        targets = [FanoutTarget('pytest', self.path('pytest.jsonl')),
+                   FanoutTarget('jest', os.path.join(self.test_dir, 'missing', 'jest.jsonl'))]
+        with self.assertRaises(OSError):
+            run_fanout(self.input_file_path, self.code_directory, targets, 'python', queue_size=2)
+
+    def test_json_array_error_is_raised(self):
+        # Проверяет, что ошибка записи JSON-массива (после маркера конца очереди) не вешает run_fanout
+        targets = [FanoutTarget('pytest', os.path.join(self.test_dir, 'missing', 'pytest.json'))]
+        errors = []
+
+        def run():
+            try:
+                run_fanout(self.input_file_path, self.code_directory, targets, 'python', queue_size=2)
+            except OSError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+    def test_parse_target(self):
+        self.assertEqual(parse_target('jest=out/jest.jsonl'), FanoutTarget('jest', 'out/jest.jsonl'))
+        with self.assertRaises(ValueError):
+            parse_target('jest')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,366 @@
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from keyword_matcher import KeywordMatcher
+from metrics import get_registry
+from records import Record
+from segmenter import get_segmenter
+
+_PY_IMPORT = re.compile(r'^import\s+(?P<modules>.+)$')
+_PY_FROM = re.compile(r'^from\s+(?P<module>[\w.]+)\s+import\s+(?P<names>.+)$')
+_JS_IMPORT = re.compile(r'''^import\s+(?P<clause>.+?)\s+from\s+(?P<source>(['"]).*?\3)''')
+_JS_REQUIRE = re.compile(r'''^(?:const|let|var)\s+(?P<clause>.+?)\s*=\s*require\s*\(\s*(?P<source>(['"]).*?\3)\s*\)''')
+_JS_NAMED = re.compile(r'\{(?P<names>[^}]*)\}')
+_JAVA_IMPORT = re.compile(r'^import\s+(?P<static>static\s+)?(?P<path>[\w.]+(?:\.\*)?)\s*;')
+_IDENTIFIER = re.compile(r'^[A-Za-z_$][\w$]*$')
+
+
+def _normalize(statement: str, comment: str) -> str:
+    """Склеивает многострочную инструкцию в одну строку и убирает комментарии в её конце."""
+    lines = [line.split(comment, 1)[0] for line in statement.splitlines()]
+    return ' '.join(' '.join(lines).replace('\\', ' ').split())
+
+
+def parse_python_import(statement: str) -> List[Tuple[str, str]]:
+    """
+    Разбирает инструкцию импорта Python на пары (связываемое имя, импорт одного имени).
+
+    `from a import b, c as d` даёт ('b', 'from a import b') и ('d', 'from a import c as d');
+    `import a.b` даёт ('a', 'import a.b'). Импорт `*` пропускается.
+    """
+    statement = _normalize(statement, '#')
+    match = _PY_FROM.match(statement)
+    if match is not None:
+        module = match.group('module')
+        result = []
+        for part in match.group('names').strip('() ').split(','):
+            words = part.split()
+            if not words or words[0] == '*':
+                continue
+            name = words[2] if len(words) == 3 and words[1] == 'as' else words[0]
+            result.append((name, f"from {module} import {' '.join(words)}"))
+        return result
+    match = _PY_IMPORT.match(statement)
+    if match is None:
+        return []
+    result = []
+    for part in match.group('modules').split(','):
+        words = part.split()
+        if not words:
+            continue
+        name = words[2] if len(words) == 3 and words[1] == 'as' else words[0].split('.')[0]
+        result.append((name, f"import {' '.join(words)}"))
+    return result
+
+
+def parse_javascript_import(statement: str) -> List[Tuple[str, str]]:
+    """
+    Разбирает `import ... from '...'` и `const ... = require('...')` на пары
+    (связываемое имя, импорт одного имени). Импорты без связываемых имён (`import 'x'`) пропускаются.
+    """
+    statement = _normalize(statement, '//')
+    match = _JS_IMPORT.match(statement)
+    is_require = match is None
+    if is_require:
+        match = _JS_REQUIRE.match(statement)
+        if match is None:
+            return []
+    clause, source = match.group('clause'), match.group('source')
+    result = []
+    named = _JS_NAMED.search(clause)
+    if named is not None:
+        for part in named.group('names').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            alias = re.split(r'\s*:\s*' if is_require else r'\s+as\s+', part)[-1]
+            if is_require:
+                result.append((alias, f"const {{ {part} }} = require({source});"))
+            else:
+                result.append((alias, f"import {{ {part} }} from {source};"))
+        clause = clause[:named.start()] + clause[named.end():]
+    for part in clause.split(','):
+        part = part.strip()
+        if part.startswith('*'):
+            alias = part.split()[-1]
+            result.append((alias, f"import {part} from {source};"))
+        elif _IDENTIFIER.match(part):
+            if is_require:
+                result.append((part, f"const {part} = require({source});"))
+            else:
+                result.append((part, f"import {part} from {source};"))
+    return result
+
+
+def parse_java_import(statement: str) -> List[Tuple[str, str]]:
+    """Разбирает `import a.b.C;` на пару ('C', инструкция). Импорт `*` пропускается."""
+    match = _JAVA_IMPORT.match(_normalize(statement, '//'))
+    if match is None or match.group('path').endswith('*'):
+        return []
+    return [(match.group('path').rsplit('.', 1)[-1], match.group(0))]
+
+
+IMPORT_PARSERS: Dict[str, Callable[[str], List[Tuple[str, str]]]] = {
+    'python': parse_python_import,
+    'javascript': parse_javascript_import,
+    'typescript': parse_javascript_import,
+    'java': parse_java_import,
+}
+
+
+def get_import_parser(language: str) -> Callable[[str], List[Tuple[str, str]]]:
+    parser = IMPORT_PARSERS.get(language)
+    if parser is None:
+        raise ValueError(f"Неподдерживаемый язык: {language}")
+    return parser
+
+
+_NAME = re.compile(r'[A-Za-z_$][\w$]*')
+
+
+def _leading_names(text: str) -> List[str]:
+    """Имена из списка параметров: первое имя каждого элемента (`x: int = 1` -> x, `*args` -> args)."""
+    names = []
+    for part in text.split(','):
+        match = _NAME.search(re.split(r'[:=]', part, 1)[0])
+        if match is not None:
+            names.append(match.group())
+    return names
+
+
+def _destructured_names(text: str) -> List[str]:
+    """Имена из деструктуризации JavaScript: `a, b: c = 1` -> a, c."""
+    names = []
+    for part in text.split(','):
+        part = part.split('=', 1)[0]
+        match = _NAME.search(part.rsplit(':', 1)[-1])
+        if match is not None:
+            names.append(match.group())
+    return names
+
+
+def _all_names(text: str) -> List[str]:
+    return _NAME.findall(text)
+
+
+# Конструкции, связывающие имена внутри кода (параметры, присваивания, циклы, with/except ... as):
+# такие имена не требуют импорта. Шаблоны применяются к коду без строк и комментариев.
+_BINDINGS_PYTHON = [
+    (re.compile(r'\bdef\s+\w+\s*\(([^)]*)\)'), _leading_names),
+    (re.compile(r'\blambda\b([^:]*):'), _leading_names),
+    (re.compile(r'^[ \t]*([\w \t,\[\]*]+?)[ \t]*(?:[-+*/%&|^@]|//|\*\*|>>|<<)?=(?!=)', re.MULTILINE), _all_names),
+    (re.compile(r'^[ \t]*(\w+)[ \t]*:[^=\n]*=(?!=)', re.MULTILINE), _all_names),
+    (re.compile(r'\bfor\s+([\w\s,()]+?)\s+in\b'), _all_names),
+    (re.compile(r'\bas\s+(\w+)'), _all_names),
+    (re.compile(r'(\w+)\s*:='), _all_names),
+]
+_BINDINGS_JAVASCRIPT = [
+    (re.compile(r'\bfunction\b\s*\*?\s*[\w$]*\s*\(([^)]*)\)'), _leading_names),
+    (re.compile(r'\(([^()]*)\)\s*(?::[^=;]*)?=>'), _leading_names),
+    (re.compile(r'([\w$]+)\s*=>'), _all_names),
+    (re.compile(r'^[ \t]*(?:(?:async|static|get|set)\s+)*(?!(?:if|for|while|switch|catch|function)\b)[\w$]+\s*'
+                r'\(([^)]*)\)\s*\{', re.MULTILINE), _leading_names),
+    (re.compile(r'\b(?:const|let|var)\s+([\w$]+)'), _all_names),
+    (re.compile(r'\b(?:const|let|var)\s*[{\[]([^}\]]*)[}\]]'), _destructured_names),
+    (re.compile(r'\bcatch\s*\(\s*([\w$]+)'), _all_names),
+]
+BINDING_PATTERNS = {
+    'python': _BINDINGS_PYTHON,
+    'javascript': _BINDINGS_JAVASCRIPT,
+    'typescript': _BINDINGS_JAVASCRIPT,
+    'java': [],
+}
+
+
+def load_import_file(file_path: str) -> List[str]:
+    """Читает сохранённый стек импортов (stack_imports.py): одна инструкция на строку."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+class ImportIndex:
+    """
+    Предвычисленный индекс «имя -> инструкция импорта».
+
+    Заполняется из стека импортов (ImportStack или сохранённый файл) и из строк импорта файлов
+    сущностей. Если одно имя импортируется по-разному, остаётся первый вариант, поэтому
+    вручную собранный стек нужно добавлять первым.
+
+    Аргументы:
+    language (str): Язык программирования.
+    """
+
+    def __init__(self, language: str = 'python'):
+        self.language = language
+        self.parse = get_import_parser(language)
+        self._imports: Dict[str, str] = {}
+        self._matcher: Optional[KeywordMatcher] = None
+
+    def __len__(self) -> int:
+        return len(self._imports)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._imports
+
+    def get(self, name: str) -> Optional[str]:
+        return self._imports.get(name)
+
+    def add_statement(self, statement: str) -> int:
+        """Добавляет имена из инструкции импорта. Возвращает количество новых имён."""
+        added = 0
+        for name, single in self.parse(statement):
+            if name not in self._imports:
+                self._imports[name] = single
+                added += 1
+        if added:
+            self._matcher = None
+        return added
+
+    def add_statements(self, statements: Iterable[str]) -> int:
+        return sum(self.add_statement(statement) for statement in statements)
+
+    def add_stack(self, stack) -> int:
+        """Добавляет содержимое стека импортов (stack_imports.ImportStack)."""
+        return self.add_statements(stack.get_stack())
+
+    def add_entity_source(self, entity_source) -> int:
+        """Добавляет строки импорта всех файлов сущностей (EntityIndex или EntityStore)."""
+        segmenter = get_segmenter(self.language)
+        added = 0
+        for name in entity_source.keywords():
+            content = entity_source.get(name)
+            if content:
+                added += self.add_statements(segmenter.outline(content).imports)
+        return added
+
+    @property
+    def matcher(self) -> KeywordMatcher:
+        """Автомат Ахо — Корасик по всем именам индекса (строится заново после изменения индекса)."""
+        if self._matcher is None:
+            self._matcher = KeywordMatcher(list(self._imports), word_boundary=True)
+        return self._matcher
+
+
+class ImportResolver:
+    """
+    Добавление недостающих импортов в поле code записей.
+
+    Имена индекса ищутся за один проход автоматом Ахо — Корасик по коду, в котором строки
+    и комментарии замаскированы сегментатором; имя считается недостающим, если оно не является
+    атрибутом (`obj.name`) и не связано в самом коде импортом, определением, параметром или
+    присваиванием. Недостающие импорты вставляются перед кодом в порядке первого использования
+    имени. Связанные имена собираются по всему коду без учёта областей видимости.
+
+    Аргументы:
+    index (ImportIndex): Индекс импортов.
+    """
+
+    def __init__(self, index: ImportIndex):
+        self.index = index
+        self._segmenter = get_segmenter(index.language)
+        self._bindings = BINDING_PATTERNS.get(index.language, [])
+        self.records_resolved = 0
+        self.imports_added = 0
+
+    def bound_names(self, code: str, masked: Optional[str] = None) -> set:
+        """
+        Имена, уже связанные в коде: импорты, определения, параметры функций, присваивания.
+
+        Аргументы:
+        code (str): Исходный код.
+        masked (str): Код с замаскированными строками и комментариями (None — вычислить).
+        """
+        outline = self._segmenter.outline(code)
+        names = {definition.name for definition in outline.definitions}
+        for statement in outline.imports:
+            names.update(name for name, _ in self.index.parse(statement))
+        if masked is None:
+            masked = self._segmenter.mask_literals(code)
+        for pattern, extract in self._bindings:
+            for match in pattern.finditer(masked):
+                names.update(extract(match.group(1)))
+        return names
+
+    def missing_imports(self, code: str) -> List[str]:
+        """Возвращает инструкции импорта для имён, используемых в коде без импорта."""
+        matcher = self.index.matcher
+        masked = self._segmenter.mask_literals(code)
+        used = []
+        seen = set()
+        for start, keyword_index in matcher.iter_matches(masked):
+            name = matcher.keywords[keyword_index]
+            if name in seen or (start > 0 and masked[start - 1] == '.'):
+                continue
+            seen.add(name)
+            used.append(name)
+        if not used:
+            return []
+        bound = self.bound_names(code, masked)
+        return [self.index.get(name) for name in used if name not in bound]
+
+    def resolve(self, code: str) -> str:
+        """Возвращает код с добавленными недостающими импортами."""
+        imports = self.missing_imports(code)
+        if not imports:
+            return code
+        self.imports_added += len(imports)
+        return '\n'.join(imports) + '\n\n' + code
+
+    def resolve_records(self, records: Iterable[Record]) -> Iterator[Record]:
+        """Дополняет импортами поле code каждой записи потока."""
+        metrics = get_registry()
+        for record in records:
+            added = self.imports_added
+            record.entity_code = self.resolve(record.entity_code)
+            if self.imports_added != added:
+                self.records_resolved += 1
+                metrics.inc('imports_injected', self.imports_added - added)
+            yield record
+
+
+def build_import_resolver(language: str, entity_source=None, import_file_path: Optional[str] = None,
+                          stack=None) -> ImportResolver:
+    """
+    Строит ImportResolver: сначала стек импортов и сохранённый файл стека, затем импорты файлов сущностей.
+
+    Аргументы:
+    language (str): Язык программирования.
+    entity_source: Источник сущностей (open_entity_source) или None.
+    import_file_path (str): Файл со стеком импортов (одна инструкция на строку) или None.
+    stack (ImportStack): Стек импортов из stack_imports.py или None.
+    """
+    index = ImportIndex(language)
+    if stack is not None:
+        index.add_stack(stack)
+    if import_file_path:
+        index.add_statements(load_import_file(import_file_path))
+    if entity_source is not None:
+        index.add_entity_source(entity_source)
+    return ImportResolver(index)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    from dataset_writer import JsonlWriter
+    from entity_store import open_entity_source
+    from record_dedup import iter_dataset
+
+    parser = argparse.ArgumentParser(description='Добавление недостающих импортов в поле code датасета.')
+    parser.add_argument('input', help='Датасет (.jsonl, .json/.txt или директория шардов)')
+    parser.add_argument('output', help='Выходной файл .jsonl (пишется заново)')
+    parser.add_argument('--entities', default=None, help='Директория с файлами сущностей или упакованное хранилище')
+    parser.add_argument('--imports', default=None, help='Файл со стеком импортов (одна инструкция на строку)')
+    parser.add_argument('--language', default='python', choices=sorted(IMPORT_PARSERS))
+    args = parser.parse_args()
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error('Выходной файл должен отличаться от входного')
+
+    source = open_entity_source(args.entities) if args.entities else None
+    resolver = build_import_resolver(args.language, source, args.imports)
+    with JsonlWriter(args.output, fsync_interval=0, truncate=True) as writer:
+        for json_object in iter_dataset(args.input):
+            json_object['code'] = resolver.resolve(json_object['code'])
+            writer.write(json_object)
+    print(f"Импортов добавлено: {resolver.imports_added}")
@@ -0,0 +1,104 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from dataset_writer import JsonlWriter, iter_jsonl
+from entity_index import EntityIndex
+from import_resolver import (ImportIndex, ImportResolver, build_import_resolver, parse_javascript_import,
+                             parse_python_import)
+from records import Record
+
+
+class TestImportResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        self.create_entity_file('load.txt', 'import json\nfrom pathlib import Path\n\n'
+                                            'def load(path):\n    return json.loads(Path(path).read_text())\n')
+        self.create_entity_file('save.txt', 'import json as json\n\ndef save(data):\n    return json.dumps(data)\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content):
+        with open(os.path.join(self.code_directory, file_name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_parse_imports(self):
+        # Проверяет разбиение инструкций импорта на импорты отдельных имён
+        self.assertListEqual(parse_python_import('from a.b import (c,\n    d as e)  # комментарий'),
+                             [('c', 'from a.b import c'), ('e', 'from a.b import d as e')])
+        self.assertListEqual(parse_python_import('import os.path, numpy as np'),
+                             [('os', 'import os.path'), ('np', 'import numpy as np')])
+        self.assertListEqual(parse_javascript_import("import React, { useState as use } from 'react'"),
+                             [('use', "import { useState as use } from 'react';"),
+                              ('React', "import React from 'react';")])
+        self.assertListEqual(parse_javascript_import("const { a } = require('m');"),
+                             [('a', "const { a } = require('m');")])
+
+    def test_missing_imports(self):
+        # Проверяет, что добавляются только используемые и не связанные в коде имена
+        index = ImportIndex('python')
+        index.add_statements(['import os', 'from typing import Dict, List'])
+        resolver = ImportResolver(index)
+        code = 'from typing import Dict\n\ndef f(x: List) -> Dict:\n    return os.sep + x.os\n'
+        self.assertListEqual(resolver.missing_imports(code), ['from typing import List', 'import os'])
+        self.assertListEqual(resolver.missing_imports('def os():\n    return List\n'), ['from typing import List'])
+
+    def test_no_false_positives(self):
+        # Проверяет, что имена в строках, комментариях и документации, параметры и присвоенные имена не импортируются
+        index = ImportIndex('python')
+        index.add_statements(['import os', 'import json', 'from os import path', 'from typing import List'])
+        resolver = ImportResolver(index)
+        self.assertListEqual(resolver.missing_imports('def f(path):\n    """Uses json and os."""\n    return path\n'),
+                             [])
+        code = 'def f(items: List, *rest):\n    # os\n    json = "os"\n    for path in rest:\n        pass\n    return os\n'
+        self.assertListEqual(resolver.missing_imports(code), ['from typing import List', 'import os'])
+
+        javascript = ImportIndex('javascript')
+        javascript.add_statements(["import path from 'path';", "import fs from 'fs';"])
+        code = "function f(path) {\n  // fs\n  const name = 'fs';\n  return [path].map(fs => fs + name);\n}"
+        self.assertListEqual(ImportResolver(javascript).missing_imports(code), [])
+
+    def test_resolve_records(self):
+        # Проверяет сборку индекса из стека и файлов сущностей и пакетное дополнение записей
+        stack_path = os.path.join(self.test_dir, 'stack.txt')
+        with open(stack_path, 'w', encoding='utf-8') as f:
+            f.write('from pathlib import PurePath as Path\n')
+        resolver = build_import_resolver('python', EntityIndex(self.code_directory), stack_path)
+        self.assertEqual(resolver.index.get('Path'), 'from pathlib import PurePath as Path')
+        records = [Record('assert load("a")', 'def load(path):\n    return json.loads(Path(path).read_text())',
+                          'pytest', 'python'),
+                   Record('assert f()', 'def f():\n    return 1', 'pytest', 'python')]
+        resolved = list(resolver.resolve_records(records))
+        self.assertEqual(resolved[0].entity_code,
+                         'import json\nfrom pathlib import PurePath as Path\n\n'
+                         'def load(path):\n    return json.loads(Path(path).read_text())')
+        self.assertEqual(resolved[1].entity_code, 'def f():\n    return 1')
+        self.assertEqual((resolver.records_resolved, resolver.imports_added), (1, 2))
+
+
+    def test_command_line(self):
+        # Проверяет, что дополнение готового датасета переписывает выходной файл, а не дописывает в него
+        input_path = os.path.join(self.test_dir, 'dataset.jsonl')
+        output_path = os.path.join(self.test_dir, 'resolved.jsonl')
+        with JsonlWriter(input_path) as writer:
+            writer.write({'framework': 'pytest', 'code': 'def f(p):\n    return json.loads(p)',
+                          'result': 'assert f("1")'})
+        command = [sys.executable, 'import_resolver.py', input_path, output_path, '--entities', self.code_directory]
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        for _ in range(2):
+            completed = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+            self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertListEqual([record['code'] for record in iter_jsonl(output_path)],
+                             ['import json\n\ndef f(p):\n    return json.loads(p)'])
+        completed = subprocess.run(command[:3] + [input_path], cwd=cwd, capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+from collections import Counter, deque
+
+from case_splitter import iter_test_cases
+from dataset_writer import JsonlWriter, is_jsonl_path
+from entity_graph import EntityGraph
+from entity_store import open_entity_source
+from manifest import Manifest, content_hash, default_manifest_path, truncate_uncommitted
+from process_file import iter_records
+from process_test import find_entities
+
+
+class IncrementalRunner:
+    """
+    Инкрементальная сборка датасета: повторный запуск обрабатывает только изменившиеся тестовые случаи.
+
+    Для каждого тестового случая манифест хранит хэш текста и версии файлов использованных сущностей.
+    Неизменённые случаи пропускаются, изменённые пересобираются, записи удалённых и заменённых случаев
+    удаляются из выходного файла. После сбоя выходной файл обрезается до последней зафиксированной
+    записи. Индекс сущностей, автомат поиска и граф зависимостей хранятся в объекте между запусками.
+
+    Аргументы:
+    code_directory (str): Директория с файлами сущностей или упакованное хранилище.
+    framework (str): Название фреймворка.
+    output_file_path (str): Путь к выходному файлу датасета (только .jsonl).
+    language (str): Язык программирования ('python' или 'javascript').
+    manifest_path (str): Путь к манифесту (по умолчанию — рядом с выходным файлом).
+    workers (int): Количество процессов для пересборки изменившихся случаев.
+    word_boundary (bool): Искать имена сущностей только как целые идентификаторы.
+    transitive (bool): Добавлять транзитивные зависимости найденных сущностей.
+    sidecar_path (str): Файл для сохранения индекса сущностей между запусками.
+    """
+
+    def __init__(self, code_directory, framework, output_file_path, language, manifest_path=None, workers=1,
+                 word_boundary=False, transitive=False, sidecar_path=None):
+        if not is_jsonl_path(output_file_path):
+            raise ValueError("Инкрементальный режим поддерживает только вывод в формате .jsonl")
+        self.framework = framework
+        self.output_file_path = output_file_path
+        self.language = language
+        self.manifest_path = manifest_path or default_manifest_path(output_file_path)
+        self.workers = workers
+        self.word_boundary = word_boundary
+        self.transitive = transitive
+        self.config = {'framework': framework, 'language': language, 'word_boundary': word_boundary,
+                       'transitive': transitive}
+        self.entity_index = open_entity_source(code_directory, sidecar_path=sidecar_path)
+        self.dependency_graph = EntityGraph(self.entity_index) if transitive else None
+        # Манифест читается с диска один раз и дальше поддерживается в памяти
+        self._manifest = None
+
+    def _load_manifest(self):
+        """Читает манифест при первом обращении и обрезает незафиксированный хвост выходного файла."""
+        if self._manifest is None:
+            self._manifest = Manifest(self.manifest_path, self.config)
+            if self._manifest.committed_offset is not None:
+                truncate_uncommitted(self.output_file_path, self._manifest.committed_offset)
+        return self._manifest
+
+    def used_entities(self):
+        """Возвращает имена сущностей, от которых зависят записи манифеста."""
+        names = set()
+        for entry in self._load_manifest().entries.values():
+            names.update(entry['entities'])
+        return names
+
+    def refresh_entities(self, names=None):
+        """
+        Перепроверяет файлы сущностей по mtime; возвращает имена изменившихся сущностей.
+        names — как в EntityIndex.refresh: перепроверить только эти сущности, если набор файлов не менялся.
+        """
+        changed = self.entity_index.refresh(names)
+        if changed and self.dependency_graph is not None:
+            self.dependency_graph.invalidate(changed)
+        return changed
+
+    def run(self, input_file_path, refresh=True):
+        """
+        Обрабатывает входной файл, пропуская неизменённые тестовые случаи.
+
+        Аргументы:
+        input_file_path (str): Путь к входному файлу с тестами.
+        refresh (bool): Перепроверить файлы сущностей перед запуском (False — если вызывающий
+            уже сделал это через refresh_entities(), как режим наблюдения).
+
+        Возвращает:
+        tuple: (записано записей, пропущено случаев, удалено устаревших записей).
+        """
+        if refresh:
+            # Версии сущностей в манифесте сравниваются с текущими, поэтому индекс должен быть свежим
+            self.refresh_entities()
+        manifest = self._load_manifest()
+        prefix = os.path.abspath(input_file_path) + '::'
+        keywords = tuple(self.entity_index.keywords())
+        seen_keys = set()
+        name_counts = Counter()
+        pending = deque()
+        skipped = [0]
+
+        def changed_test_cases():
+            for test_case in iter_test_cases(input_file_path, self.language):
+                # Ключ — имя теста и его порядковый номер среди одноимённых
+                key = f"{prefix}{test_case.name}#{name_counts[test_case.name]}"
+                name_counts[test_case.name] += 1
+                seen_keys.add(key)
+                text_hash = content_hash(test_case.text)
+                names = find_entities(test_case.text, keywords, self.word_boundary, self.dependency_graph)
+                versions = {}
+                for name in names:
+                    version = self.entity_index.version(name)
+                    if version is not None:
+                        versions[name] = list(version)
+                if manifest.is_current(key, text_hash, versions):
+                    skipped[0] += 1
+                    continue
+                pending.append((key, text_hash, versions))
+                yield test_case
+
+        written = 0
+        with JsonlWriter(self.output_file_path) as writer:
+            manifest.open(writer.tell())
+            try:
+                records = iter_records(changed_test_cases(), self.entity_index, self.framework, self.language,
+                                       self.workers, word_boundary=self.word_boundary, transitive=self.transitive)
+                for record in records:
+                    key, text_hash, versions = pending.popleft()
+                    start = writer.tell()
+                    writer.write(record.to_json_object())
+                    # Запись фиксируется в манифесте только после сброса в выходной файл
+                    writer.flush()
+                    manifest.commit(key, text_hash, versions, start, writer.tell())
+                    written += 1
+            finally:
+                manifest.close()
+
+        manifest.forget(key for key in manifest.entries if key.startswith(prefix) and key not in seen_keys)
+        # Устаревшие записи удаляются одним последовательным копированием, только если они есть
+        removed = manifest.compact(self.output_file_path)
+        return written, skipped[0], removed
+
+    def forget_input(self, input_file_path):
+        """Удаляет из манифеста и выходного файла записи удалённого входного файла; возвращает их количество."""
+        manifest = self._load_manifest()
+        prefix = os.path.abspath(input_file_path) + '::'
+        manifest.forget([key for key in manifest.entries if key.startswith(prefix)])
+        return manifest.compact(self.output_file_path)
+
+
+def run_incremental(input_file_path, code_directory, framework, output_file_path, language, **kwargs):
+    """Однократный инкрементальный запуск; аргументы — как у IncrementalRunner."""
+    runner = IncrementalRunner(code_directory, framework, output_file_path, language, **kwargs)
+    return runner.run(input_file_path)
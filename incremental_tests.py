@@ -0,0 +1,134 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from dataset_writer import iter_jsonl
+from incremental import IncrementalRunner, run_incremental
+from manifest import default_manifest_path
+
+
+class TestIncrementalRun(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 1\n')
+        self.create_entity_file('other.txt', 'def other():\n    return 2\n')
+        self.input_file_path = os.path.join(self.test_dir, 'tests.py')
+        self.output_file_path = os.path.join(self.test_dir, 'dataset.jsonl')
+        self.write_tests(['def test_one():\n    assert my_function() == 1\n',
+                          'def test_two():\n    assert other() == 2\n'])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content, mtime_ns=None):
+        file_path = os.path.join(self.code_directory, file_name)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+    def write_tests(self, test_cases):
+        with open(self.input_file_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(test_cases))
+
+    def run_once(self):
+        return run_incremental(self.input_file_path, self.code_directory, 'pytest', self.output_file_path, 'python')
+
+    def results(self):
+        return [record['result'] for record in iter_jsonl(self.output_file_path)]
+
+    def test_rerun_skips_unchanged(self):
+        # Проверяет, что повторный запуск не добавляет дубликатов
+        self.assertTupleEqual(self.run_once(), (2, 0, 0))
+        self.assertTupleEqual(self.run_once(), (0, 2, 0))
+        self.assertEqual(len(self.results()), 2)
+
+    def test_changed_and_deleted_cases(self):
+        # Проверяет пересборку изменённого теста и удаление записи удалённого
+        self.run_once()
+        self.write_tests(['def test_one():\n    assert my_function() != 0\n'])
+        self.assertTupleEqual(self.run_once(), (1, 0, 2))
+        self.assertListEqual(self.results(), ['def test_one():\n    assert my_function() != 0'])
+        self.assertTupleEqual(self.run_once(), (0, 1, 0))
+
+    def test_entity_change_regenerates_dependents(self):
+        # Проверяет, что изменение файла сущности пересобирает только использующие её тесты
+        runner = IncrementalRunner(self.code_directory, 'pytest', self.output_file_path, 'python')
+        runner.run(self.input_file_path)
+        self.create_entity_file('other.txt', 'def other():\n    return 3\n', mtime_ns=10 ** 18)
+        runner.refresh_entities()
+        self.assertTupleEqual(runner.run(self.input_file_path), (1, 1, 1))
+        codes = [record['code'] for record in iter_jsonl(self.output_file_path)]
+        self.assertListEqual(codes, ['def my_function():\n    return 1', 'def other():\n    return 3'])
+
+    def test_entity_edit_without_refresh(self):
+        # Проверяет, что run() сам замечает правку файла сущности на месте, в том числе с сохранённым индексом
+        sidecar_path = os.path.join(self.test_dir, 'entities.index.json')
+        runner = IncrementalRunner(self.code_directory, 'pytest', self.output_file_path, 'python')
+        runner.run(self.input_file_path)
+        self.create_entity_file('other.txt', 'def other():\n    return 222\n', mtime_ns=10 ** 18)
+        self.assertTupleEqual(runner.run(self.input_file_path), (1, 1, 1))
+
+        run_incremental(self.input_file_path, self.code_directory, 'pytest', self.output_file_path, 'python',
+                        sidecar_path=sidecar_path)
+        self.create_entity_file('other.txt', 'def other():\n    return 333\n', mtime_ns=2 * 10 ** 18)
+        self.assertTupleEqual(run_incremental(self.input_file_path, self.code_directory, 'pytest',
+                                              self.output_file_path, 'python', sidecar_path=sidecar_path), (1, 1, 1))
+        codes = [record['code'] for record in iter_jsonl(self.output_file_path)]
+        self.assertListEqual(codes, ['def my_function():\n    return 1', 'def other():\n    return 333'])
+
+    def test_fresh_runner_after_edit(self):
+        # Проверяет, что после пересборки и сжатия новый запуск не обрезает зафиксированные записи
+        self.write_tests([f'def test_{i}():\n    assert my_function() == {i}\n' for i in range(6)]
+                         + ['def test_other():\n    assert other() == 2\n'])
+        self.assertTupleEqual(self.run_once(), (7, 0, 0))
+        self.create_entity_file('other.txt', 'def other():\n    return 3\n', mtime_ns=10 ** 18)
+        self.assertTupleEqual(self.run_once(), (1, 6, 1))
+        self.write_tests([f'def test_{i}():\n    assert my_function() == {i + 1}\n' if i == 0 else
+                          f'def test_{i}():\n    assert my_function() == {i}\n' for i in range(6)]
+                         + ['def test_other():\n    assert other() == 2\n'])
+        self.assertTupleEqual(self.run_once(), (1, 6, 1))
+        self.assertTupleEqual(self.run_once(), (0, 7, 0))
+        self.assertEqual(len(self.results()), 7)
+        self.assertEqual(self.results()[-1], 'def test_0():\n    assert my_function() == 1')
+
+    def test_resume_after_crash(self):
+        # Проверяет, что незафиксированный хвост выходного файла отбрасывается
+        self.run_once()
+        with open(self.output_file_path, 'ab') as f:
+            f.write(b'{"prompt": "incomplete')
+        with open(default_manifest_path(self.output_file_path), 'a', encoding='utf-8') as f:
+            f.write('{"key": "broken')
+        self.assertTupleEqual(self.run_once(), (0, 2, 0))
+        self.assertEqual(len(self.results()), 2)
+        self.assertTupleEqual(self.run_once(), (0, 2, 0))
+
+    def test_command_line(self):
+        # Проверяет запуск инкрементального режима из командной строки
+        command = [sys.executable, 'process_file.py', '--incremental', '--input', self.input_file_path,
+                   '--entities', self.code_directory, '--output', self.output_file_path]
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        for _ in range(2):
+            completed = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+            self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(len(self.results()), 2)
+        # Параметры, не поддерживаемые инкрементальным режимом, отклоняются, а не игнорируются
+        for options in (['--dedup-index', os.path.join(self.test_dir, 'dedup.bin')], ['--validate'],
+                        ['--resolve-imports'], ['--shard-records', '10'], ['--compression', 'gzip']):
+            completed = subprocess.run(command + options, cwd=cwd, capture_output=True, text=True)
+            self.assertEqual(completed.returncode, 2)
+
+    def test_only_jsonl(self):
+        # Проверяет, что инкрементальный режим требует вывода в .jsonl
+        with self.assertRaises(ValueError):
+            IncrementalRunner(self.code_directory, 'pytest', os.path.join(self.test_dir, 'out.json'), 'python')
+
+
+if __name__ == '__main__':
+    unittest.main()
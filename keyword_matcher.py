@@ -0,0 +1,133 @@
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+def is_identifier_char(char: str) -> bool:
+    """Проверяет, может ли символ входить в идентификатор."""
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatcher:
+    """
+    Автомат Ахо — Корасик для одновременного поиска всех ключевых слов за один линейный проход по тексту.
+
+    Автомат строится один раз для директории сущностей и переиспользуется для всех тестовых случаев,
+    поэтому поиск стоит O(L + количество совпадений) вместо O(K × L).
+
+    Аргументы:
+    keywords (Sequence[str]): Ключевые слова (имена сущностей).
+    word_boundary (bool): Искать только целые идентификаторы: `get` не совпадёт внутри `get_user`.
+    """
+
+    def __init__(self, keywords: Sequence[str], word_boundary: bool = False):
+        self.keywords = list(keywords)
+        self.word_boundary = word_boundary
+        # Пустое ключевое слово содержится в любой строке (как у оператора `in`)
+        self._always: List[int] = []
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Индексы ключевых слов, оканчивающихся в состоянии, и длина совпадения
+        self._output: List[List[int]] = [[]]
+        self._depth: List[int] = [0]
+        # Ближайшее по суффиксным ссылкам состояние с непустым выходом
+        self._dict_link: List[int] = [0]
+
+        for index, keyword in enumerate(self.keywords):
+            if keyword:
+                self._add(keyword, index)
+            elif not word_boundary:
+                self._always.append(index)
+        self._build_links()
+
+    def _add(self, keyword: str, index: int) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._depth.append(self._depth[state] + 1)
+                self._dict_link.append(0)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._dict_link[next_state] = fail if self._output[fail] else self._dict_link[fail]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Возвращает пары (начало совпадения, индекс ключевого слова) для всех вхождений."""
+        goto, fail, output, depth, dict_link = self._goto, self._fail, self._output, self._depth, self._dict_link
+        boundary = self.word_boundary
+        text_length = len(text)
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            match_state = state if output[state] else dict_link[state]
+            while match_state:
+                start = position + 1 - depth[match_state]
+                if boundary and ((start > 0 and is_identifier_char(text[start - 1])) or
+                                 (position + 1 < text_length and is_identifier_char(text[position + 1]))):
+                    match_state = dict_link[match_state]
+                    continue
+                for index in output[match_state]:
+                    yield start, index
+                match_state = dict_link[match_state]
+
+    def search(self, text: str) -> List[str]:
+        """Возвращает найденные ключевые слова в порядке их следования в исходном списке."""
+        found = set(self._always)
+        for _, index in self.iter_matches(text):
+            found.add(index)
+        return [self.keywords[index] for index in sorted(found)]
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(keywords: Tuple[str, ...], word_boundary: bool) -> KeywordMatcher:
+    return KeywordMatcher(keywords, word_boundary)
+
+
+# id(кортеж ключевых слов), word_boundary -> (сам кортеж, автомат). Кортеж неизменяем, а ссылка на него
+# не даёт переиспользовать его id, поэтому повторный вызов с тем же кортежем не хэширует его заново.
+_identity_cache: 'OrderedDict[Tuple[int, bool], Tuple[Tuple[str, ...], KeywordMatcher]]' = OrderedDict()
+IDENTITY_CACHE_SIZE = 8
+
+
+def get_keyword_matcher(keywords: Sequence[str], word_boundary: bool = False) -> KeywordMatcher:
+    """
+    Возвращает автомат для набора ключевых слов, строя его только при первом обращении.
+
+    Для кортежа повторный вызов с тем же объектом обходится за O(1), поэтому вызывающие,
+    которые обрабатывают много тестов одним набором, берут снимок tuple(index.keywords()) один
+    раз. Список (его можно изменить на месте) каждый раз ищется в кэше по содержимому за O(K).
+    """
+    if not isinstance(keywords, tuple):
+        return _cached_matcher(tuple(keywords), word_boundary)
+    key = (id(keywords), word_boundary)
+    entry = _identity_cache.get(key)
+    if entry is not None and entry[0] is keywords:
+        _identity_cache.move_to_end(key)
+        return entry[1]
+    matcher = _cached_matcher(keywords, word_boundary)
+    _identity_cache[key] = (keywords, matcher)
+    _identity_cache.move_to_end(key)
+    if len(_identity_cache) > IDENTITY_CACHE_SIZE:
+        _identity_cache.popitem(last=False)
+    return matcher
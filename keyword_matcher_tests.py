@@ -0,0 +1,52 @@
+import random
+import unittest
+from unittest import mock
+
+from keyword_matcher import KeywordMatcher, get_keyword_matcher
+from process_test import search_keywords
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_search_matches_substring_semantics(self):
+        # Проверяет, что результат совпадает с наивным поиском `keyword in text`
+        rng = random.Random(42)
+        alphabet = 'abc_'
+        for _ in range(200):
+            keywords = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(10)]
+            text = ''.join(rng.choice(alphabet + ' ') for _ in range(50))
+            expected = [keyword for keyword in keywords if keyword in text]
+            self.assertListEqual(KeywordMatcher(keywords).search(text), expected)
+
+    def test_overlapping_keywords(self):
+        # Проверяет поиск ключевых слов, являющихся суффиксами и префиксами друг друга
+        matcher = KeywordMatcher(['he', 'she', 'his', 'hers'])
+        self.assertListEqual(matcher.search('ushers'), ['he', 'she', 'hers'])
+
+    def test_word_boundary(self):
+        # Проверяет, что в режиме границ `get` не совпадает внутри `get_user`
+        test_code = 'user = get_user(1)\nassert get(user)\n'
+        self.assertListEqual(search_keywords('x = get_user(1)', ['get', 'get_user']), ['get', 'get_user'])
+        self.assertListEqual(search_keywords('x = get_user(1)', ['get', 'get_user'], word_boundary=True),
+                             ['get_user'])
+        self.assertListEqual(search_keywords(test_code, ['get', 'user', 'use'], word_boundary=True),
+                             ['get', 'user'])
+
+    def test_matcher_is_cached(self):
+        # Проверяет, что автомат строится один раз для одного набора ключевых слов
+        self.assertIs(get_keyword_matcher(['a', 'b']), get_keyword_matcher(['a', 'b']))
+
+        # Повторный вызов с тем же кортежем не обращается к кэшу по содержимому (без хэширования)
+        keywords = tuple(f'name_{i}' for i in range(100))
+        matcher = get_keyword_matcher(keywords)
+        with mock.patch('keyword_matcher._cached_matcher', side_effect=AssertionError('хэширование набора')):
+            self.assertIs(get_keyword_matcher(keywords), matcher)
+
+        # Список, изменённый на месте, не получает устаревший автомат
+        names = ['alpha', 'beta']
+        self.assertListEqual(search_keywords('alpha()', names), ['alpha'])
+        names[0] = 'gamma'
+        self.assertListEqual(search_keywords('gamma()', names), ['gamma'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,26 +1,38 @@
 import json
+import logging
 import os
 
+from dataset_writer import JsonlWriter, is_jsonl_path
+from metrics import get_registry
+from records import format_code, read_record
 
-def format_code(code):
-    # Escape double quotes and preserve newlines
-    return code.replace("\\\\", "\\").replace("\\n", "\n")
+logger = logging.getLogger(__name__)
 
 
-def append_to_json_file(test_code, entity_code, framework_name, file_path):
-    print('start append_to_json_file')
+def build_json_object(test_code, entity_code, framework_name):
     # Format the codes
     formatted_test_code = format_code(test_code)
     formatted_entity_code = format_code(entity_code)
 
     # Create the JSON object
-    json_object = {
+    return {
         "prompt": "Write a unit test using {} framework for this code".format(framework_name),
         "framework": framework_name,
         "code": formatted_entity_code,
         "result": formatted_test_code
     }
 
+
+def append_to_json_file(test_code, entity_code, framework_name, file_path):
+    logger.debug('start append_to_json_file')
+    json_object = build_json_object(test_code, entity_code, framework_name)
+
+    # JSON Lines: append-only, cost does not depend on the file size
+    if is_jsonl_path(file_path):
+        with JsonlWriter(file_path, fsync_interval=0) as writer:
+            writer.write(json_object)
+        return
+
     # Read the existing data from the file if it exists
     if os.path.exists(file_path):
         with open(file_path, 'r', encoding='utf-8') as file:
@@ -37,24 +49,40 @@ def append_to_json_file(test_code, entity_code, framework_name, file_path):
     data.append(json_object)
 
     # Write the updated data back to the file
-    with open(file_path, 'w', encoding='utf-8') as file:
+    with get_registry().timer('write'), open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=4)
+
+
+def append_records_to_json_file(json_objects, file_path):
+    # Write a whole batch of records with a single pass over the output file
+    if is_jsonl_path(file_path):
+        with JsonlWriter(file_path, fsync_interval=0) as writer:
+            for json_object in json_objects:
+                writer.write(json_object)
+        return
+
+    data = []
+    if os.path.exists(file_path):
+        with open(file_path, 'r', encoding='utf-8') as file:
+            try:
+                data = json.load(file)
+                if not isinstance(data, list):
+                    data = [data]
+            except json.JSONDecodeError:
+                data = []
+
+    data.extend(json_objects)
+
+    with get_registry().timer('write'), open(file_path, 'w', encoding='utf-8') as file:
         json.dump(data, file, ensure_ascii=False, indent=4)
 
 
 def main(test_file_path, output_file_path):
     # Read inputs from the file
-    with open(test_file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-        parts = content.split("/////")
-        if len(parts) >= 3:
-            test_code = parts[0].strip()
-            entity_code = parts[1].strip()
-            framework_name = parts[2].strip()
-        else:
-            raise ValueError("Input file is not in the correct format")
+    record = read_record(test_file_path)
 
     # Append the JSON object to the file
-    append_to_json_file(test_code, entity_code, framework_name, output_file_path)
+    append_to_json_file(record.test_code, record.entity_code, record.framework, output_file_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+
+def default_manifest_path(output_file_path: str) -> str:
+    """Путь к манифесту рядом с выходным файлом датасета."""
+    return output_file_path + '.manifest.jsonl'
+
+
+def content_hash(text: str) -> str:
+    """Хэш содержимого тестового случая."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    """
+    Манифест инкрементального запуска: для каждого тестового случая хранит хэш текста,
+    набор использованных сущностей с версиями их файлов и положение записи в выходном файле.
+
+    Манифест — журнал JSON Lines: первая строка содержит параметры запуска, далее по строке
+    на каждую зафиксированную запись (последняя строка для ключа побеждает). Запись фиксируется
+    после того, как она сброшена в выходной файл, поэтому после сбоя выходной файл обрезается
+    до последней зафиксированной записи, и запуск продолжается с неё.
+
+    Аргументы:
+    manifest_path (str): Путь к файлу манифеста.
+    config (dict): Параметры запуска (фреймворк, язык и т.д.); при их изменении манифест сбрасывается.
+    """
+
+    def __init__(self, manifest_path: str, config: Dict[str, Any]):
+        self.manifest_path = manifest_path
+        self.config = config
+        # Ключ тестового случая -> {'text_hash', 'entities', 'start', 'end'}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Размер выходного файла при создании манифеста: данные до него манифестом не управляются
+        self.base_offset: Optional[int] = None
+        # Конец последней зафиксированной записи в выходном файле (None — манифеста ещё нет)
+        self.committed_offset: Optional[int] = None
+        self._needs_rewrite = False
+        # Диапазоны байт выходного файла с устаревшими записями
+        self.superseded: List[Tuple[int, int]] = []
+        self._file = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        if not lines:
+            return
+        header = json.loads(lines[0])
+        self.base_offset = self.committed_offset = header['offset']
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Недописанная строка журнала после сбоя: журнал будет переписан без неё
+                self._needs_rewrite = True
+                break
+            previous = self.entries.get(entry['key'])
+            if previous is not None:
+                self.superseded.append((previous['start'], previous['end']))
+            self.entries[entry['key']] = entry
+            # После compact() строки журнала идут в порядке ключей, а не смещений: берётся наибольший конец
+            self.committed_offset = max(self.committed_offset, entry['end'])
+        if header.get('config') != self.config:
+            # Параметры запуска изменились: все прежние записи устарели
+            self.superseded.extend((entry['start'], entry['end']) for entry in self.entries.values())
+            self.entries = {}
+            self._needs_rewrite = True
+
+    def is_current(self, key: str, text_hash: str, entities: Dict[str, Any]) -> bool:
+        """Проверяет, что тестовый случай и его сущности не изменились с прошлого запуска."""
+        entry = self.entries.get(key)
+        return entry is not None and entry['text_hash'] == text_hash and entry['entities'] == entities
+
+    def open(self, output_offset: int) -> None:
+        """Открывает журнал для дозаписи; если манифеста нет, создаёт его с текущим размером выхода."""
+        if self.committed_offset is None:
+            self.base_offset = self.committed_offset = output_offset
+            self._needs_rewrite = True
+        if self._needs_rewrite:
+            self._rewrite()
+        self._file = open(self.manifest_path, 'a', encoding='utf-8')
+
+    def _rewrite(self) -> None:
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            header = {'version': MANIFEST_VERSION, 'config': self.config, 'offset': self.base_offset}
+            file.write(json.dumps(header, ensure_ascii=False) + '\n')
+            # Записи упорядочены по положению в выходном файле, как при последовательной фиксации
+            for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['start']):
+                file.write(json.dumps(dict(entry, key=key), ensure_ascii=False) + '\n')
+        os.replace(temp_path, self.manifest_path)
+        self._needs_rewrite = False
+
+    def commit(self, key: str, text_hash: str, entities: Dict[str, Any], start: int, end: int) -> None:
+        """Фиксирует запись тестового случая, уже сброшенную в выходной файл."""
+        previous = self.entries.get(key)
+        if previous is not None:
+            self.superseded.append((previous['start'], previous['end']))
+        entry = {'key': key, 'text_hash': text_hash, 'entities': entities, 'start': start, 'end': end}
+        self.entries[key] = entry
+        self.committed_offset = end
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Помечает записи удалённых тестовых случаев как устаревшие."""
+        for key in list(keys):
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.superseded.append((entry['start'], entry['end']))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def compact(self, output_file_path: str) -> int:
+        """
+        Удаляет устаревшие записи из выходного файла одним последовательным копированием
+        и переписывает манифест с новыми смещениями. Возвращает количество удалённых записей.
+        """
+        self.close()
+        removed = sorted(set(self.superseded))
+        if not removed:
+            return 0
+
+        temp_path = output_file_path + '.tmp'
+        with open(output_file_path, 'rb') as infile, open(temp_path, 'wb') as outfile:
+            position = 0
+            for start, end in removed:
+                _copy_range(infile, outfile, position, start)
+                position = max(position, end)
+            _copy_range(infile, outfile, position, None)
+        os.replace(temp_path, output_file_path)
+
+        # Сдвиг каждой записи — суммарная длина удалённых диапазонов перед ней
+        removed_ends = [end for _, end in removed]
+        removed_before = list(accumulate(end - start for start, end in removed))
+        for entry in self.entries.values():
+            count = bisect_right(removed_ends, entry['start'])
+            shift = removed_before[count - 1] if count else 0
+            entry['start'] -= shift
+            entry['end'] -= shift
+        self.committed_offset = os.path.getsize(output_file_path)
+        self.superseded = []
+        self._rewrite()
+        return len(removed)
+
+
+def _copy_range(infile, outfile, start: int, end: Optional[int], block_size: int = 1 << 20) -> None:
+    infile.seek(start)
+    remaining = None if end is None else end - start
+    while remaining is None or remaining > 0:
+        block = infile.read(block_size if remaining is None else min(block_size, remaining))
+        if not block:
+            break
+        outfile.write(block)
+        if remaining is not None:
+            remaining -= len(block)
+
+
+def truncate_uncommitted(output_file_path: str, committed_offset: int) -> None:
+    """Обрезает выходной файл до последней зафиксированной записи (после сбоя)."""
+    if os.path.exists(output_file_path) and os.path.getsize(output_file_path) > committed_offset:
+        with open(output_file_path, 'r+b') as file:
+            file.truncate(committed_offset)
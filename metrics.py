@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+# Этапы конвейера, для которых собираются гистограммы времени
+STAGES = ('split', 'match', 'entity_load', 'dedup', 'write')
+# Верхние границы корзин гистограмм в секундах
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# Источники счётчиков кэша: префикс метрики -> атрибуты источника (попадания, промахи, прочитано байт)
+CACHE_ATTRIBUTES = ('hits', 'misses', 'bytes_read')
+PROMETHEUS_PREFIX = 'autoworker'
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами (как histogram в Prometheus)."""
+    __slots__ = ('buckets', 'counts', 'count', 'total')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # Последняя корзина — значения больше всех границ (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, counts: list, count: int, total: float) -> None:
+        for index, value in enumerate(counts):
+            self.counts[index] += value
+        self.count += count
+        self.total += total
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'started')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик конвейера: счётчики и гистограммы времени этапов.
+
+    Счётчики кэшей (попадания, промахи, прочитанные байты) снимаются с индекса сущностей
+    и дедупликатора как приращения с прошлого снятия, поэтому снимки из рабочих процессов
+    можно складывать через merge(). Итог выгружается в JSON или текстовый формат Prometheus.
+    Счётчики и гистограммы можно обновлять из нескольких потоков (например, потоков записи).
+    """
+    enabled = True
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        # id(источника) -> последние снятые значения его счётчиков
+        self._collected: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._histogram(name).observe(seconds)
+
+    def timer(self, name: str) -> _Timer:
+        """Контекстный менеджер, замеряющий время блока в гистограмму name."""
+        return _Timer(self, name)
+
+    def timed_iter(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Замеряет время получения каждого элемента итератора (например, разбиения файла на тесты)."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - started)
+            yield item
+
+    def collect(self, prefix: str, source: Any) -> None:
+        """Добавляет к счётчикам prefix_hits, prefix_misses, prefix_bytes_read приращения счётчиков source."""
+        values = tuple(getattr(source, attribute, 0) for attribute in CACHE_ATTRIBUTES)
+        previous = self._collected.get((prefix, id(source)), (0,) * len(values))
+        self._collected[(prefix, id(source))] = values
+        for attribute, value, last in zip(CACHE_ATTRIBUTES, values, previous):
+            if value != last:
+                self.inc(f"{prefix}_{attribute}", value - last)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает накопленные значения в виде, пригодном для передачи между процессами."""
+        return {
+            'counters': dict(self.counters),
+            'histograms': {name: (histogram.counts, histogram.count, histogram.total)
+                           for name, histogram in self.histograms.items()},
+        }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Прибавляет снимок другого реестра (например, из рабочего процесса)."""
+        for name, value in snapshot['counters'].items():
+            self.inc(name, value)
+        with self._lock:
+            for name, values in snapshot['histograms'].items():
+                self._histogram(name).merge(*values)
+
+    def reset(self) -> None:
+        self.counters = {}
+        self.histograms = {}
+
+    def summary(self) -> Dict[str, Any]:
+        """Сводка: счётчики, доли попаданий в кэши и статистика времени этапов."""
+        # Кэш, у которого были только промахи, тоже попадает в сводку (с долей 0.0)
+        prefixes = {name[:-len(suffix)] for name in self.counters for suffix in ('_hits', '_misses')
+                    if name.endswith(suffix)}
+        hit_rates = {}
+        for prefix in sorted(prefixes):
+            hits = self.counters.get(f"{prefix}_hits", 0)
+            total = hits + self.counters.get(f"{prefix}_misses", 0)
+            hit_rates[prefix] = hits / total if total else 0.0
+        timings = {}
+        for name, histogram in self.histograms.items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            timings[name] = {
+                'count': histogram.count,
+                'total_seconds': histogram.total,
+                'mean_seconds': histogram.total / histogram.count if histogram.count else 0.0,
+                'buckets': buckets,
+            }
+        return {'counters': dict(self.counters), 'cache_hit_rates': hit_rates, 'timings': timings}
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), ensure_ascii=False, indent=4)
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus (для node_exporter textfile collector)."""
+        summary = self.summary()
+        lines = []
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name}_total counter")
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}_total {value}")
+        if summary['cache_hit_rates']:
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_cache_hit_ratio gauge")
+            for name, value in sorted(summary['cache_hit_rates'].items()):
+                lines.append(f'{PROMETHEUS_PREFIX}_cache_hit_ratio{{cache="{name}"}} {value}')
+        if summary['timings']:
+            metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, timing in sorted(summary['timings'].items()):
+                for bound, count in timing['buckets'].items():
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {timing["total_seconds"]}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {timing["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path: str) -> None:
+        """Записывает сводку в файл: .prom — формат Prometheus, иначе JSON."""
+        content = self.to_prometheus() if file_path.endswith('.prom') else self.to_json()
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temp_path, file_path)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullRegistry:
+    """Отключённые метрики: все методы ничего не делают и ничего не выделяют."""
+    enabled = False
+
+    def inc(self, name: str, value: int = 1) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float) -> None:
+        pass
+
+    def timer(self, name: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def timed_iter(self, name: str, iterable: Iterable[Any]) -> Iterable[Any]:
+        return iterable
+
+    def collect(self, prefix: str, source: Any) -> None:
+        pass
+
+
+NULL_REGISTRY = NullRegistry()
+_registry = NULL_REGISTRY
+
+
+def get_registry():
+    """Возвращает текущий реестр метрик процесса (по умолчанию — отключённый NullRegistry)."""
+    return _registry
+
+
+def enable() -> MetricsRegistry:
+    """Включает сбор метрик в процессе и возвращает реестр."""
+    global _registry
+    if not _registry.enabled:
+        _registry = MetricsRegistry()
+    return _registry
+
+
+def disable() -> None:
+    global _registry
+    _registry = NULL_REGISTRY
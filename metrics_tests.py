@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import metrics
+from metrics import MetricsRegistry, NullRegistry
+from process_file import run_batch
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        metrics.disable()
+        shutil.rmtree(self.test_dir)
+
+    def create_corpus(self):
+        code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(code_directory)
+        with open(os.path.join(code_directory, 'helper.txt'), 'w', encoding='utf-8') as f:
+            f.write('def helper():\n    return 1\n')
+        input_file_path = os.path.join(self.test_dir, 'tests.py')
+        with open(input_file_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(f'def test_{i}():\n    assert helper() == 1\n\n' for i in range(6)))
+        return input_file_path, code_directory
+
+    def test_disabled_by_default(self):
+        # Проверяет, что без включения используется пустой реестр, который не оборачивает итераторы
+        registry = metrics.get_registry()
+        self.assertIsInstance(registry, NullRegistry)
+        items = [1, 2]
+        self.assertIs(registry.timed_iter('split', items), items)
+        with registry.timer('match'):
+            registry.inc('bytes_written', 10)
+
+    def test_summary_and_prometheus(self):
+        # Проверяет гистограммы, долю попаданий в кэш и формат Prometheus
+        registry = MetricsRegistry()
+        registry.observe('match', 0.002)
+        registry.observe('match', 10.0)
+        registry.inc('entity_cache_hits', 3)
+        registry.inc('entity_cache_misses', 1)
+        summary = registry.summary()
+        self.assertEqual(summary['timings']['match']['count'], 2)
+        self.assertEqual(summary['timings']['match']['buckets']['0.0025'], 1)
+        self.assertEqual(summary['timings']['match']['buckets']['+Inf'], 2)
+        self.assertEqual(summary['cache_hit_rates']['entity_cache'], 0.75)
+
+        cold = MetricsRegistry()
+        cold.inc('validation_cache_misses', 4)
+        self.assertDictEqual(cold.summary()['cache_hit_rates'], {'validation_cache': 0.0})
+
+        text = registry.to_prometheus()
+        self.assertIn('autoworker_entity_cache_hits_total 3', text)
+        self.assertIn('autoworker_stage_seconds_count{stage="match"} 2', text)
+        self.assertIn('autoworker_cache_hit_ratio{cache="entity_cache"} 0.75', text)
+
+    def test_collect_adds_increments(self):
+        # Проверяет, что повторное снятие счётчиков источника добавляет только приращение
+        class Source:
+            hits, misses, bytes_read = 2, 1, 100
+
+        registry, source = MetricsRegistry(), Source()
+        registry.collect('entity_cache', source)
+        source.hits = 5
+        registry.collect('entity_cache', source)
+        self.assertEqual(registry.counters['entity_cache_hits'], 5)
+        self.assertEqual(registry.counters['entity_cache_bytes_read'], 100)
+
+    def test_run_batch_records_stages(self):
+        # Проверяет, что пакетный запуск (в том числе с пулом процессов) заполняет метрики всех этапов
+        input_file_path, code_directory = self.create_corpus()
+        for workers in (1, 2):
+            registry = metrics.enable()
+            registry.reset()
+            output_path = os.path.join(self.test_dir, f'out{workers}.jsonl')
+            run_batch(input_file_path, code_directory, 'pytest', output_path, 'python', workers=workers,
+                      chunk_size=2)
+            summary = registry.summary()
+            for stage in ('split', 'match', 'entity_load', 'dedup', 'write'):
+                self.assertEqual(summary['timings'][stage]['count'], 6)
+            self.assertEqual(summary['counters']['bytes_written'], os.path.getsize(output_path))
+            self.assertEqual(summary['counters']['entity_cache_hits'] + summary['counters']['entity_cache_misses'],
+                             6)
+
+        metrics_path = os.path.join(self.test_dir, 'metrics.json')
+        registry.write(metrics_path)
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            self.assertIn('timings', json.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
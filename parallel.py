@@ -0,0 +1,48 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Разбивает последовательность на списки длиной не более chunk_size."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_parallel_map(func: Callable[[List[Any]], List[Any]], items: Iterable[Any], workers: Optional[int] = None,
+                         chunk_size: int = 16, max_pending: Optional[int] = None,
+                         initializer: Optional[Callable[..., None]] = None, initargs: Tuple = ()) -> Iterator[Any]:
+    """
+    Параллельно применяет func к пачкам элементов в пуле процессов и отдаёт результаты в исходном порядке.
+
+    Результаты проходят через потоковый буфер переупорядочивания: в работе одновременно
+    находится не более max_pending пачек, а готовые, но ещё не выданные пачки ждут
+    в очереди, пока не будет выдана предыдущая. Поэтому память ограничена независимо от
+    размера входа, а порядок вывода совпадает с последовательным запуском.
+
+    Аргументы:
+    func: Функция, принимающая список элементов и возвращающая список результатов той же длины.
+        Должна быть определена на уровне модуля, чтобы её можно было передать в процесс.
+    items: Элементы для обработки (может быть генератором).
+    workers (int): Количество процессов (по умолчанию — количество ядер).
+    chunk_size (int): Количество элементов в одной пачке.
+    max_pending (int): Максимум пачек в работе (по умолчанию — workers * 4).
+    initializer, initargs: Инициализация процесса (например, передача индекса сущностей только для чтения).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for chunk in iter_chunks(items, chunk_size):
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -3,10 +3,14 @@ import sys
 import os
 import logging
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+from entity_index import EntityIndex
+from entity_store import get_entity_store, is_entity_store
+
+logger = logging.getLogger(__name__)
 
 def import_and_run(module_path, function_name, *args):
-    logging.debug(f'Импорт модуля из {module_path} и выполнение функции {function_name} с аргументами {args}')
+    # Аргументы форматируются, только если уровень DEBUG включён
+    logger.debug('Импорт модуля из %s и выполнение функции %s с аргументами %r', module_path, function_name, args)
     module_name = os.path.splitext(os.path.basename(module_path))[0]
     spec = importlib.util.spec_from_file_location(module_name, module_path)
     module = importlib.util.module_from_spec(spec)
@@ -14,11 +18,21 @@ def import_and_run(module_path, function_name, *args):
     spec.loader.exec_module(module)
     func = getattr(module, function_name)
     result = func(*args)
-    logging.debug(f'Результат выполнения функции {function_name}: {result}')
+    logger.debug('Результат выполнения функции %s: %r', function_name, result)
     return result
 
-def get_keywords_from_directory(directory):
-    """Получает список ключевых слов из имен файлов в указанной директории."""
+def get_keywords_from_directory(directory, sidecar_path=None):
+    """
+    Получает список ключевых слов из имен файлов в указанной директории.
+
+    Если указан sidecar_path, список берётся из сохранённого индекса сущностей,
+    и директория не сканируется заново, пока её mtime не изменится. Вместо директории
+    можно передать упакованное хранилище сущностей (см. entity_store.py).
+    """
+    if is_entity_store(directory):
+        return get_entity_store(directory).keywords()
+    if sidecar_path:
+        return EntityIndex(directory, sidecar_path=sidecar_path).keywords()
     return [os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith('.txt')]
 
 def main(test_file_path, code_directory, framework, output_file_path, language):
@@ -28,13 +42,14 @@ def main(test_file_path, code_directory, framework, output_file_path, language):
     # Получение ключевых слов из директории
     keywords = get_keywords_from_directory(code_directory)
 
-    logging.info('Запуск первого скрипта: process_test.py')
+    logger.info('Запуск первого скрипта: process_test.py')
     import_and_run(script1_path, 'process_test_file', test_file_path, keywords, code_directory, framework, language)
 
-    logging.info('Запуск второго скрипта: main.py')
+    logger.info('Запуск второго скрипта: main.py')
     import_and_run(script2_path, 'main', test_file_path, output_file_path)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     test_file_path = r'C:\Users\1\OneDrive\Рабочий стол\python\pytest\input.txt'
     keywords = []
     code_directory = r'C:\Users\1\OneDrive\Рабочий стол\python\pytest\entities'
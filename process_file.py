@@ -1,5 +1,33 @@
 import os
-import re
+
+from case_splitter import iter_test_cases
+from dataset_writer import JsonlWriter, is_jsonl_path
+from entity_graph import EntityGraph
+from entity_store import open_entity_source
+from import_resolver import build_import_resolver
+from main import append_records_to_json_file
+from metrics import enable as enable_metrics, get_registry
+from parallel import ordered_parallel_map
+from process_test import build_record
+from record_dedup import RecordDedupIndex
+from sharded import ShardedWriter
+from validator import RecordValidator, default_quarantine_path
+
+
+def split_test_cases(input_file_path, language):
+    """
+    Разбивает входной файл на тестовые случаи.
+
+    Аргументы:
+    input_file_path (str): Путь к входному файлу.
+    language (str): Язык программирования ('python' или 'javascript').
+
+    Возвращает:
+    list: Список текстов тестовых случаев. Для больших файлов используйте генератор
+    case_splitter.iter_test_cases.
+    """
+    return [test_case.text for test_case in iter_test_cases(input_file_path, language)]
+
 
 def process_test_cases(input_file_path, output_file_path, pipeline_script_path, language):
     """
@@ -15,48 +43,256 @@ def process_test_cases(input_file_path, output_file_path, pipeline_script_path,
         """Выполняет указанный скрипт."""
         os.system(f'python {pipeline_script_path}')
 
-    # Регулярные выражения для Python и JavaScript
-    if language == 'python':
-        test_case_pattern = re.compile(r'^\s*(def test|class\s)')
-    elif language == 'javascript':
-        test_case_pattern = re.compile(r'^\s*(it|describe|test)\s*\(')
-
-    # Открываем входной файл для чтения
-    with open(input_file_path, 'r', encoding='utf-8') as infile:
-        lines = infile.readlines()  # Читаем все строки файла
-
-    in_test_case = False  # Флаг, указывающий, находимся ли мы в блоке теста
-    test_case_lines = []  # Список для хранения строк текущего теста
-
-    for line in lines:
-        stripped_line = line.lstrip()  # Удаляем ведущие пробелы для проверки шаблона
-        # Проверяем, начинается ли строка с шаблона для теста
-        if test_case_pattern.match(stripped_line):
-            if in_test_case:
-                # Если мы уже в блоке теста, записываем текущий тест в файл и выполняем скрипт
-                with open(output_file_path, 'w', encoding='utf-8') as outfile:
-                    outfile.writelines(test_case_lines)
-                run_pipeline()
-                test_case_lines = []  # Очищаем список строк для следующего теста
-            in_test_case = True
-        if in_test_case:
-            test_case_lines.append(line)  # Добавляем строку в список текущего теста
-
-    if in_test_case:
-        # После обработки всех строк, если мы все еще в блоке теста, записываем и выполняем скрипт
+    for test_case in iter_test_cases(input_file_path, language):
+        # Записываем текущий тест в файл и выполняем скрипт
         with open(output_file_path, 'w', encoding='utf-8') as outfile:
-            outfile.writelines(test_case_lines)
+            outfile.write(test_case.text)
         run_pipeline()
 
+
+# Состояние рабочего процесса: индекс сущностей только для чтения, передаётся один раз при старте
+_worker_state = {}
+
+
+def _init_worker(entity_index, framework, language, word_boundary, transitive, collect_metrics=False):
+    """Инициализирует рабочий процесс общим индексом сущностей."""
+    if collect_metrics:
+        # При fork процесс наследует реестр родителя вместе с уже накопленными значениями
+        enable_metrics().reset()
+    _worker_state.update(entity_index=entity_index, keywords=tuple(entity_index.keywords()), framework=framework,
+                         language=language, word_boundary=word_boundary,
+                         dependency_graph=EntityGraph(entity_index) if transitive else None)
+
+
+def _build_record(test_case, entity_index, keywords, framework, language, word_boundary, dependency_graph):
+    return build_record(test_case.text, keywords, entity_index.code_directory, framework, language, word_boundary,
+                        entity_index, dependency_graph, (test_case.start_line, test_case.end_line))
+
+
+def _process_chunk(test_cases):
+    """Обрабатывает пачку тестовых случаев в рабочем процессе."""
+    return [_build_record(test_case, **_worker_state) for test_case in test_cases]
+
+
+def _process_chunk_measured(test_cases):
+    """Как _process_chunk, но возвращает одну пару (записи, снимок метрик процесса за пачку)."""
+    records = _process_chunk(test_cases)
+    registry = get_registry()
+    snapshot = registry.snapshot()
+    registry.reset()
+    return [(records, snapshot)]
+
+
+def iter_records(test_cases, entity_index, framework, language, workers=1, chunk_size=16,
+                 word_boundary=False, transitive=False):
+    """
+    Превращает тестовые случаи (case_splitter.TestCase) в записи датасета (records.Record), последовательно
+    или в пуле процессов. Тестовые случаи потребляются по мере чтения входного файла.
+
+    При workers > 1 порядок результатов совпадает с последовательным запуском.
+    """
+    if workers <= 1:
+        # Снимок-кортеж: автомат поиска находится по нему за O(1) на каждый тестовый случай
+        keywords = tuple(entity_index.keywords())
+        dependency_graph = EntityGraph(entity_index) if transitive else None
+        for test_case in test_cases:
+            yield _build_record(test_case, entity_index, keywords, framework, language, word_boundary,
+                                dependency_graph)
+        return
+
+    initargs = (entity_index, framework, language, word_boundary, transitive)
+    registry = get_registry()
+    if not registry.enabled:
+        yield from ordered_parallel_map(_process_chunk, test_cases, workers=workers, chunk_size=chunk_size,
+                                        initializer=_init_worker, initargs=initargs)
+        return
+
+    # Метрики рабочих процессов возвращаются вместе с каждой пачкой и складываются в реестр этого процесса
+    for records, snapshot in ordered_parallel_map(_process_chunk_measured, test_cases, workers=workers,
+                                                  chunk_size=chunk_size, initializer=_init_worker,
+                                                  initargs=initargs + (True,)):
+        registry.merge(snapshot)
+        yield from records
+
+
+def run_batch(input_file_path, code_directory, framework, output_file_path, language, workers=1, chunk_size=16,
+              word_boundary=False, sidecar_path=None, transitive=False, dedup_index_path=None, validate=False,
+              quarantine_path=None, sharding=None, resolve_imports=False, import_file_path=None):
+    """
+    Обрабатывает все тестовые случаи файла в одном процессе, без запуска pipeline.py на каждый тест.
+
+    Файл тестов читается потоком за один проход, ключевые слова загружаются один раз, записи
+    собираются в памяти, а на диск пишется только итоговый результат. Для вывода в
+    .jsonl записи пишутся потоком, и пиковая память ограничена самым большим тестовым случаем.
+
+    Аргументы:
+    input_file_path (str): Путь к входному файлу с тестами.
+    code_directory (str): Директория с файлами сущностей или упакованное хранилище.
+    framework (str): Название фреймворка.
+    output_file_path (str): Путь к выходному файлу датасета (.json/.txt или .jsonl).
+    language (str): Язык программирования ('python' или 'javascript').
+    workers (int): Количество процессов для параллельной обработки (1 — без пула).
+    chunk_size (int): Количество тестовых случаев в одной пачке для рабочего процесса.
+    word_boundary (bool): Искать имена сущностей только как целые идентификаторы.
+    sidecar_path (str): Файл для сохранения индекса сущностей между запусками (None — не сохранять).
+    transitive (bool): Добавлять транзитивные зависимости найденных сущностей.
+    dedup_index_path (str): Файл индекса дубликатов (record_dedup.py); точные и почти точные дубликаты
+        уже записанных записей не пишутся. None — без проверки.
+    validate (bool): Проверять синтаксис полей code и result (validator.py); некорректные записи
+        пишутся не в датасет, а в файл карантина.
+    quarantine_path (str): Файл карантина (по умолчанию — `<output>.quarantine.jsonl`).
+    sharding (dict): Параметры ShardedWriter (sharded.py): max_records, max_bytes, compression, block_records.
+        Если указаны, output_file_path — директория шардированного датасета.
+    resolve_imports (bool): Добавлять в поле code недостающие импорты (import_resolver.py) по индексу,
+        собранному из строк импорта файлов сущностей.
+    import_file_path (str): Сохранённый стек импортов (stack_imports.py); его импорты приоритетнее.
+
+    Возвращает:
+    int: Количество записанных записей.
+    """
+    test_cases = get_registry().timed_iter('split', iter_test_cases(input_file_path, language))
+    entity_index = open_entity_source(code_directory, sidecar_path=sidecar_path)
+    records = iter_records(test_cases, entity_index, framework, language, workers, chunk_size, word_boundary,
+                           transitive)
+    if resolve_imports or import_file_path:
+        records = build_import_resolver(language, entity_index, import_file_path).resolve_records(records)
+    quarantine = None
+    if validate:
+        validator = RecordValidator(workers)
+        quarantine = JsonlWriter(quarantine_path or default_quarantine_path(output_file_path))
+        records = validator.filter(records, quarantine)
+    json_objects = (record.to_json_object() for record in records)
+
+    dedup_index = None
+    if dedup_index_path:
+        dedup_index = RecordDedupIndex(dedup_index_path)
+        json_objects = (json_object for json_object in json_objects if dedup_index.add(json_object))
+
+    try:
+        if sharding is not None:
+            with ShardedWriter(output_file_path, **sharding) as writer:
+                for json_object in json_objects:
+                    writer.write(json_object)
+                written = writer.records_written
+        elif is_jsonl_path(output_file_path):
+            with JsonlWriter(output_file_path) as writer:
+                for json_object in json_objects:
+                    writer.write(json_object)
+                written = writer.records_written
+        else:
+            json_objects = list(json_objects)
+            append_records_to_json_file(json_objects, output_file_path)
+            written = len(json_objects)
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+            get_registry().collect('validation_cache', validator)
+
+    if dedup_index is not None:
+        dedup_index.save()
+    return written
+
+
 if __name__ == "__main__":
+    import argparse
+
     # Путь к входному файлу, содержащему исходный код тестов
     input_file_path = r'C:\Users\Egor\Desktop\work\python\pytest\temp_test_file.txt'
     # Путь к временному выходному файлу, где будут сохраняться тесты для обработки
     output_file_path = r'C:\Users\1\OneDrive\Рабочий стол\python\pytest\input.txt'
     # Путь к скрипту, который будет выполняться после каждого теста
     pipeline_script_path = r'C:\Users\1\OneDrive\Документы\GitHub\AutoWorker\pipeline.py'
-    # Язык программирования
-    language = 'python'  # или 'javascript'
+    # Директория с файлами сущностей и итоговый датасет (для пакетного режима)
+    code_directory = r'C:\Users\1\OneDrive\Рабочий стол\python\pytest\entities'
+    dataset_file_path = r'C:\Users\1\OneDrive\Рабочий стол\python\pytest\pytest_jsons.txt'
+
+    parser = argparse.ArgumentParser(description='Извлечение тестовых случаев и сборка датасета.')
+    parser.add_argument('--input', default=input_file_path, help='Файл с исходным кодом тестов')
+    parser.add_argument('--entities', default=code_directory, help='Директория с файлами сущностей или упакованное хранилище')
+    parser.add_argument('--output', default=dataset_file_path, help='Файл датасета (.txt/.json или .jsonl)')
+    parser.add_argument('--framework', default='pytest')
+    parser.add_argument('--language', default='python', choices=['python', 'javascript'])
+    parser.add_argument('--workers', type=int, default=1, help='Количество процессов для параллельной обработки')
+    parser.add_argument('--word-boundary', action='store_true',
+                        help='Искать имена сущностей только как целые идентификаторы')
+    parser.add_argument('--entity-index', default=None,
+                        help='Файл для сохранения индекса сущностей между запусками')
+    parser.add_argument('--transitive', action='store_true',
+                        help='Добавлять сущности, от которых зависят найденные в тесте')
+    parser.add_argument('--dedup-index', default=None,
+                        help='Файл индекса дубликатов: не записывать точные и почти точные дубликаты')
+    parser.add_argument('--validate', action='store_true',
+                        help='Проверять синтаксис записей; некорректные пишутся в файл карантина')
+    parser.add_argument('--quarantine', default=None,
+                        help='Файл карантина для некорректных записей (по умолчанию <output>.quarantine.jsonl)')
+    parser.add_argument('--resolve-imports', action='store_true',
+                        help='Добавлять в поле code недостающие импорты из файлов сущностей')
+    parser.add_argument('--imports', default=None,
+                        help='Файл со стеком импортов (одна инструкция на строку), сохранённый в stack_imports.py')
+    parser.add_argument('--shard-records', type=int, default=None,
+                        help='Писать датасет в директорию --output шардами не больше указанного числа записей')
+    parser.add_argument('--shard-bytes', type=int, default=None,
+                        help='Писать датасет шардами не больше указанного размера в байтах')
+    parser.add_argument('--shard-block-records', type=int, default=64,
+                        help='Записей в одном сжатом блоке шарда: больше — лучше сжатие, дольше чтение одной записи')
+    parser.add_argument('--compression', default=None, choices=['gzip', 'zstd', 'auto'],
+                        help='Сжатие шардов (auto — zstd, если установлен zstandard, иначе gzip)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Обрабатывать только изменившиеся тестовые случаи (манифест рядом с .jsonl)')
+    parser.add_argument('--target', action='append', default=[],
+                        help='Цель <фреймворк>=<файл> (можно указать несколько): датасеты для всех целей '
+                             'собираются за один проход по входному файлу')
+    parser.add_argument('--metrics', default=None,
+                        help='Файл для сводки метрик этапов (.prom — формат Prometheus, иначе JSON)')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Старый режим: запуск pipeline.py на каждый тестовый случай')
+    args = parser.parse_args()
+    sharded_output = args.shard_records or args.shard_bytes or args.compression
+    if args.incremental:
+        if args.dedup_index:
+            # Пересобранная запись совпала бы с собственной прежней версией в индексе и была бы отброшена
+            parser.error('--dedup-index нельзя использовать вместе с --incremental')
+        if args.validate or args.quarantine:
+            # Отброшенная запись не фиксируется в манифесте и проверялась бы заново при каждом запуске
+            parser.error('--validate и --quarantine нельзя использовать вместе с --incremental')
+        if args.resolve_imports or args.imports:
+            # Манифест не отслеживает строки импорта файлов сущностей, от которых зависит результат
+            parser.error('--resolve-imports и --imports нельзя использовать вместе с --incremental')
+        if sharded_output:
+            parser.error('Инкрементальный режим пишет только в один файл .jsonl; --shard-* и --compression '
+                         'не поддерживаются')
+    elif args.target:
+        if args.dedup_index:
+            parser.error('--dedup-index нельзя использовать вместе с --target')
+        if sharded_output:
+            parser.error('--shard-* и --compression нельзя использовать вместе с --target')
+    registry = enable_metrics() if args.metrics else None
+    sharding = None
+    if sharded_output:
+        sharding = {'max_records': args.shard_records, 'max_bytes': args.shard_bytes,
+                    'compression': args.compression, 'block_records': args.shard_block_records}
 
     # Запуск процесса обработки тестов
-    process_test_cases(input_file_path, output_file_path, pipeline_script_path, language)
+    if args.legacy:
+        process_test_cases(args.input, output_file_path, pipeline_script_path, args.language)
+    elif args.incremental:
+        from incremental import run_incremental
+
+        run_incremental(args.input, args.entities, args.framework, args.output, args.language,
+                        workers=args.workers, word_boundary=args.word_boundary, sidecar_path=args.entity_index,
+                        transitive=args.transitive)
+    elif args.target:
+        from fanout import parse_target, run_fanout
+
+        run_fanout(args.input, args.entities, [parse_target(target) for target in args.target], args.language,
+                   workers=args.workers, word_boundary=args.word_boundary, sidecar_path=args.entity_index,
+                   transitive=args.transitive, validate=args.validate, quarantine_path=args.quarantine,
+                   resolve_imports=args.resolve_imports, import_file_path=args.imports)
+    else:
+        run_batch(args.input, args.entities, args.framework, args.output, args.language, workers=args.workers,
+                  word_boundary=args.word_boundary, sidecar_path=args.entity_index,
+                  transitive=args.transitive, dedup_index_path=args.dedup_index, validate=args.validate,
+                  quarantine_path=args.quarantine, sharding=sharding, resolve_imports=args.resolve_imports,
+                  import_file_path=args.imports)
+    if registry is not None:
+        registry.write(args.metrics)
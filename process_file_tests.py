@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import main
+from case_splitter import iter_test_cases, iter_test_cases_from_lines
+from process_file import run_batch, split_test_cases
+from process_test import process_test_file
+from sharded import ShardedReader
+
+
+class TestProcessFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        self.create_entity_file('MyClass.txt', 'class MyClass:\n    def value(self):\n        return 1\n')
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 2\n')
+
+        self.input_file_path = os.path.join(self.test_dir, 'tests.py')
+        with open(self.input_file_path, 'w', encoding='utf-8') as f:
+            f.write('import pytest\n\n'
+                    'def test_class():\n'
+                    '    assert MyClass().value() == 1\n\n'
+                    'def test_function():\n'
+                    '    assert my_function() == 2\n\n'
+                    'class TestBoth:\n'
+                    '    def test_both(self):\n'
+                    '        assert MyClass().value() + my_function() == 3\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content):
+        with open(os.path.join(self.code_directory, file_name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def legacy_records(self):
+        # Воспроизводит старый путь: input.txt -> process_test_file -> main.main
+        keywords = ['MyClass', 'my_function']
+        input_txt = os.path.join(self.test_dir, 'input.txt')
+        output_path = os.path.join(self.test_dir, 'legacy.json')
+        for test_case in split_test_cases(self.input_file_path, 'python'):
+            with open(input_txt, 'w', encoding='utf-8') as f:
+                f.write(test_case)
+            process_test_file(input_txt, keywords, self.code_directory, 'pytest', 'python')
+            main.main(input_txt, output_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_split_test_cases(self):
+        # Проверяет разбиение файла на тестовые случаи
+        test_cases = split_test_cases(self.input_file_path, 'python')
+        self.assertEqual(len(test_cases), 4)
+        self.assertTrue(test_cases[0].startswith('def test_class'))
+        self.assertTrue(test_cases[2].startswith('class TestBoth'))
+        self.assertTrue(test_cases[3].lstrip().startswith('def test_both'))
+
+    def test_iter_test_cases(self):
+        # Проверяет потоковое разбиение: имена и диапазоны строк тестовых случаев
+        test_cases = list(iter_test_cases(self.input_file_path, 'python'))
+        self.assertListEqual([(case.name, case.start_line, case.end_line) for case in test_cases],
+                             [('test_class', 3, 5), ('test_function', 6, 8), ('TestBoth', 9, 9), ('test_both', 10, 11)])
+        self.assertEqual(test_cases[1].text, 'def test_function():\n    assert my_function() == 2\n\n')
+
+    def test_iter_test_cases_javascript(self):
+        # Проверяет разбиение тестов JavaScript
+        lines = ["const sum = require('./sum');\n",
+                 "describe('sum', () => {\n",
+                 "  test('adds 1 + 2', () => {\n",
+                 "    expect(sum(1, 2)).toBe(3);\n",
+                 "  });\n",
+                 "});\n"]
+        test_cases = list(iter_test_cases_from_lines(lines, 'javascript'))
+        self.assertListEqual([(case.name, case.start_line, case.end_line) for case in test_cases],
+                             [('sum', 2, 2), ('adds 1 + 2', 3, 6)])
+
+    def test_split_unknown_language(self):
+        # Проверяет понятную ошибку для неподдерживаемого языка
+        with self.assertRaises(ValueError):
+            split_test_cases(self.input_file_path, 'cobol')
+
+    def test_run_batch_matches_legacy(self):
+        # Проверяет, что пакетный режим даёт те же записи, что и старый конвейер, в том числе для кода
+        # с литералами \\n и \\\\ (к ним в обоих путях применяется main.format_code)
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return "a\\nb" + "c\\\\d"\n')
+        output_path = os.path.join(self.test_dir, 'batch.json')
+        self.assertEqual(run_batch(self.input_file_path, self.code_directory, 'pytest', output_path, 'python'), 4)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            batch = json.load(f)
+        self.assertListEqual(batch, self.legacy_records())
+
+    def test_run_batch_parallel_matches_serial(self):
+        # Проверяет, что параллельный режим даёт побайтно тот же датасет, что и последовательный
+        serial_path = os.path.join(self.test_dir, 'serial.jsonl')
+        parallel_path = os.path.join(self.test_dir, 'parallel.jsonl')
+        run_batch(self.input_file_path, self.code_directory, 'pytest', serial_path, 'python')
+        run_batch(self.input_file_path, self.code_directory, 'pytest', parallel_path, 'python', workers=2, chunk_size=1)
+        with open(serial_path, 'rb') as serial, open(parallel_path, 'rb') as parallel:
+            self.assertEqual(serial.read(), parallel.read())
+
+    def test_run_batch_resolve_imports(self):
+        # Проверяет, что в поле code добавляются импорты из файлов сущностей
+        self.create_entity_file('helper.txt', 'import math\n\ndef helper():\n    return math.pi\n')
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return math.floor(2.5)\n')
+        output_path = os.path.join(self.test_dir, 'resolved.jsonl')
+        run_batch(self.input_file_path, self.code_directory, 'pytest', output_path, 'python', resolve_imports=True)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            codes = [json.loads(line)['code'] for line in f]
+        self.assertTrue(codes[1].startswith('import math\n\ndef my_function'))
+        self.assertFalse(codes[0].startswith('import math'))
+
+    def test_run_batch_sharded(self):
+        # Проверяет, что шардированный вывод содержит те же записи, что и обычный
+        output_path = os.path.join(self.test_dir, 'shards')
+        written = run_batch(self.input_file_path, self.code_directory, 'pytest', output_path, 'python',
+                            sharding={'max_records': 3, 'compression': 'gzip'})
+        self.assertEqual(written, 4)
+        with ShardedReader(output_path) as reader:
+            self.assertEqual(len(reader.shards), 2)
+            self.assertListEqual(list(reader.iter_records()), self.legacy_records())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,17 @@
+import logging
 import os
-import re
-from typing import List, Set
+from typing import Any, List, Optional, Sequence, Set, Tuple, Union
+
+from entity_dedup import EntityDeduplicator, get_deduplicator
+from entity_graph import EntityGraph
+from entity_index import EntityIndex
+from entity_store import EntityStore, get_entity_store, is_entity_store
+from keyword_matcher import get_keyword_matcher
+from metrics import get_registry
+from records import Record, write_record
+from segmenter import get_segmenter
+
+logger = logging.getLogger(__name__)
 
 def read_file(file_path: str) -> str:
     """Читает содержимое файла и возвращает его как строку."""
@@ -12,90 +23,108 @@ def write_to_file(file_path: str, content: str) -> None:
     with open(file_path, 'w', encoding='utf-8') as file:
         file.write(content)
 
-def search_keywords(test_code: str, keywords: List[str]) -> List[str]:
-    """Ищет ключевые слова в коде теста и возвращает найденные."""
-    found_keywords = []
-    for keyword in keywords:
-        if keyword in test_code:
-            found_keywords.append(keyword)
-    return found_keywords
+def search_keywords(test_code: str, keywords: Sequence[str], word_boundary: bool = False) -> List[str]:
+    """
+    Ищет ключевые слова в коде теста и возвращает найденные.
+
+    Поиск выполняется автоматом Ахо — Корасик, который строится один раз на набор ключевых слов.
+    При word_boundary=True совпадают только целые идентификаторы.
+    """
+    return get_keyword_matcher(keywords, word_boundary).search(test_code)
 
 def extract_entities(content: str, language: str) -> Set[str]:
     """Извлекает названия методов и классов из текста, исключая метод __init__."""
-    entities = set()
-    if language == 'python':
-        pattern = re.compile(r'^\s*(def|class)\s+(\w+)', re.MULTILINE)
-    elif language == 'javascript':
-        pattern = re.compile(r'^\s*(function|class|const|let)\s+(\w+)', re.MULTILINE)
-
-    for match in pattern.finditer(content):
-        entity_name = match.group(2)
-        if entity_name != '__init__':
-            entities.add(entity_name)
-    return entities
+    definitions = get_segmenter(language).outline(content).definitions
+    return {definition.name for definition in definitions if definition.name != '__init__'}
 
 def remove_duplicate_entities(content: str, language: str) -> str:
     """Удаляет дублирующиеся реализации методов и классов из строки."""
-    lines = content.split('\n')
-    if language == 'python':
-        entity_pattern = re.compile(r'^\s*(def|class)\s+(\w+)')
-    elif language == 'javascript':
-        entity_pattern = re.compile(r'^\s*(function|class|const|let)\s+(\w+)')
-    import_pattern = re.compile(r'^\s*from\s+\w+|\s*import\s+|\s*@\w+')
-
-    entities = extract_entities(content, language)
-    seen_entities = set()
-    new_lines = []
-    skip = False
-
-    for i, line in enumerate(lines):
-        match = entity_pattern.match(line)
-        if match:
-            entity_name = match.group(2)
-            if entity_name in seen_entities:
-                skip = True
-            else:
-                seen_entities.add(entity_name)
-                skip = False
-
-        if not skip:
-            new_lines.append(line)
-        elif skip and (import_pattern.match(line) or line.strip() == ''):
-            new_lines.pop()
-
-    return '\n'.join(new_lines)
-
-def process_test_file(test_file_path: str, keywords: List[str], code_directory: str, framework: str, language: str) -> None:
-    """Парсит файл теста, ищет ключевые слова и добавляет соответствующий код в выходной файл, избегая дублирования."""
-    # Чтение кода теста
-    test_code = read_file(test_file_path)
+    deduplicator = EntityDeduplicator(language)
+    return deduplicator.assemble([('', content, None)])
 
+def find_entities(test_code: str, keywords: Sequence[str], word_boundary: bool = False,
+                  dependency_graph: Optional[EntityGraph] = None) -> List[str]:
+    """Возвращает имена сущностей, нужных тесту: найденные в коде и (при наличии графа) их зависимости."""
     # Поиск ключевых слов в коде теста
-    found_keywords = search_keywords(test_code, keywords)
+    found_keywords = search_keywords(test_code, keywords, word_boundary)
+    if dependency_graph is not None:
+        found_keywords = dependency_graph.resolve(found_keywords)
+    return found_keywords
 
+def load_entities(names: List[str], code_directory: str,
+                  entity_index: Optional[Union[EntityIndex, EntityStore]] = None) -> List[Tuple[str, str, Any]]:
+    """Загружает код сущностей; возвращает тройки (имя, код, версия файла или None)."""
     # Множество для отслеживания уже добавленных ключевых слов
     added_keywords: Set[str] = set()
 
     # Обработка найденных ключевых слов
-    entity_code = ""
-    for keyword in found_keywords:
+    entities = []
+    for keyword in names:
         if keyword not in added_keywords:
             keyword_file_path = os.path.join(code_directory, f"{keyword}.txt")
-            if os.path.exists(keyword_file_path):
+            version = None
+            if entity_index is not None:
+                keyword_code = entity_index.get(keyword)
+                version = entity_index.version(keyword)
+            elif os.path.exists(keyword_file_path):
                 keyword_code = read_file(keyword_file_path)
-                entity_code += keyword_code + "\n"
+            else:
+                keyword_code = None
+            if keyword_code is not None:
+                entities.append((keyword, keyword_code, version))
                 added_keywords.add(keyword)
             else:
-                print(f"Файл для ключевого слова '{keyword}' не найден по пути: {keyword_file_path}")
+                logger.warning("Файл для ключевого слова '%s' не найден по пути: %s", keyword, keyword_file_path)
+    return entities
 
-    # Удаление дублирующихся реализаций методов и классов
-    entity_code = remove_duplicate_entities(entity_code.strip(), language)
+def build_entity_code(test_code: str, keywords: List[str], code_directory: str, language: str,
+                      word_boundary: bool = False,
+                      entity_index: Optional[Union[EntityIndex, EntityStore]] = None,
+                      dependency_graph: Optional[EntityGraph] = None) -> str:
+    """
+    Собирает код сущностей, упомянутых в коде теста, и удаляет дублирующиеся реализации.
+
+    Если передан entity_index (индекс директории или упакованное хранилище), код сущностей берётся из него,
+    без обращений к файловой системе. Если code_directory указывает на упакованное хранилище, оно открывается
+    автоматически. Если передан dependency_graph, к найденным сущностям добавляются их транзитивные
+    зависимости.
+    """
+    return build_record(test_code, keywords, code_directory, '', language, word_boundary, entity_index,
+                        dependency_graph).entity_code
+
+def build_record(test_code: str, keywords: List[str], code_directory: str, framework: str, language: str,
+                 word_boundary: bool = False, entity_index: Optional[Union[EntityIndex, EntityStore]] = None,
+                 dependency_graph: Optional[EntityGraph] = None,
+                 source_span: Optional[Tuple[int, int]] = None) -> Record:
+    """Собирает запись датасета для тестового случая в памяти, без промежуточного файла."""
+    if entity_index is None and is_entity_store(code_directory):
+        entity_index = get_entity_store(code_directory)
+
+    metrics = get_registry()
+    with metrics.timer('match'):
+        names = find_entities(test_code, keywords, word_boundary, dependency_graph)
+    with metrics.timer('entity_load'):
+        entities = load_entities(names, code_directory, entity_index)
+
+    # Удаление дублирующихся реализаций методов и классов (разбор каждой сущности кэшируется)
+    deduplicator = get_deduplicator(language)
+    with metrics.timer('dedup'):
+        entity_code = deduplicator.assemble(entities)
+    if metrics.enabled:
+        metrics.collect('entity_cache', entity_index)
+        metrics.collect('dedup_cache', deduplicator)
+    return Record(test_code.strip(), entity_code.strip(), framework, language, source_span,
+                  tuple(name for name, _, _ in entities))
+
+def process_test_file(test_file_path: str, keywords: List[str], code_directory: str, framework: str, language: str) -> None:
+    """Парсит файл теста, ищет ключевые слова и добавляет соответствующий код в выходной файл, избегая дублирования."""
+    # Чтение кода теста
+    test_code = read_file(test_file_path)
 
-    # Формирование нового содержимого файла
-    new_content = f"{test_code.strip()}\n/////\n{entity_code}\n/////\n{framework}"
+    record = build_record(test_code, keywords, code_directory, framework, language)
 
-    # Запись нового содержимого в файл
-    write_to_file(test_file_path, new_content)
+    # Запись в старом текстовом формате (тест ///// сущности ///// фреймворк)
+    write_record(test_file_path, record)
 
 # Пример использования
 if __name__ == "__main__":
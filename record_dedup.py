@@ -0,0 +1,262 @@
+import hashlib
+import json
+import keyword
+import os
+import random
+import re
+import struct
+import zlib
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dataset_writer import JsonlWriter, is_jsonl_path, iter_jsonl
+from sharded import ShardedReader, is_sharded_dataset
+
+# Фреймворки JavaScript; для остальных код считается кодом Python
+JAVASCRIPT_FRAMEWORKS = {'jest', 'mocha', 'jasmine', 'vitest', 'ava', 'cypress', 'playwright'}
+
+JAVASCRIPT_KEYWORDS = {
+    'await', 'break', 'case', 'catch', 'class', 'const', 'continue', 'debugger', 'default', 'delete', 'do',
+    'else', 'export', 'extends', 'false', 'finally', 'for', 'function', 'if', 'import', 'in', 'instanceof',
+    'let', 'new', 'null', 'return', 'super', 'switch', 'this', 'throw', 'true', 'try', 'typeof', 'undefined',
+    'var', 'void', 'while', 'with', 'yield', 'async', 'of', 'static', 'get', 'set',
+}
+PYTHON_KEYWORDS = set(keyword.kwlist) | {'self', 'cls'}
+
+_STRING = r'"(?:\\.|[^"\\])*"|' + r"'(?:\\.|[^'\\])*'"
+# Комментарии распознаются в том же проходе, что и строки, поэтому `#` внутри строки не считается комментарием
+TOKEN_PATTERNS = {
+    'python': re.compile(rf'(?P<comment>#[^\n]*)|(?P<token>{_STRING}|[A-Za-z_]\w*|\d[\w.]*|\S)'),
+    'javascript': re.compile(rf'(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)'
+                             rf'|(?P<token>{_STRING}|`(?:\\.|[^`\\])*`|[A-Za-z_$][\w$]*|\d[\w.]*|\S)'),
+}
+
+INDEX_MAGIC = b'AWDEDUP2'
+INDEX_HEADER = struct.Struct('<8sIIQQ')
+# Размер хэша поля code, входящего в ключ LSH-корзины
+CODE_KEY_SIZE = 8
+MERSENNE_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 5
+
+
+def record_language(json_object: Dict[str, Any]) -> str:
+    """Определяет язык записи по фреймворку."""
+    return 'javascript' if json_object.get('framework', '').lower() in JAVASCRIPT_FRAMEWORKS else 'python'
+
+
+def tokenize(code: str, language: str) -> List[str]:
+    """Разбивает код на токены без комментариев и пробелов."""
+    return [match.group('token') for match in TOKEN_PATTERNS[language].finditer(code) if match.group('token')]
+
+
+def rename_identifiers(tokens: List[str], language: str) -> List[str]:
+    """
+    Заменяет имена переменных на позиционные заглушки (v0, v1, ...).
+
+    Ключевые слова, атрибуты (после точки) и вызываемые имена (перед скобкой) не меняются,
+    поэтому тесты, отличающиеся только именами локальных переменных, дают одинаковые токены.
+    """
+    keywords = PYTHON_KEYWORDS if language == 'python' else JAVASCRIPT_KEYWORDS
+    names: Dict[str, str] = {}
+    renamed = []
+    for index, token in enumerate(tokens):
+        if (token[0].isalpha() or token[0] in '_$') and token not in keywords \
+                and not (index and tokens[index - 1] == '.') \
+                and not (index + 1 < len(tokens) and tokens[index + 1] == '('):
+            token = names.setdefault(token, f"v{len(names)}")
+        renamed.append(token)
+    return renamed
+
+
+class RecordDedupIndex:
+    """
+    Индекс для удаления точных и почти точных дубликатов записей датасета.
+
+    Первый уровень — хэш нормализованного содержимого (без комментариев и различий в пробелах)
+    для точных совпадений. Второй — подписи MinHash по шинглам токенов поля result с переименованными
+    переменными и LSH-корзины для поиска почти дубликатов: кандидаты находятся по корзинам,
+    а не перебором, поэтому поиск остаётся сублинейным при миллионах записей. Ключ корзины
+    включает хэш нормализованного поля code: почти дубликатами считаются только похожие тесты
+    одного и того же кода (разные тесты одной большой сущности различаются только result и
+    не должны сливаться из-за общего code). Индекс можно сохранить в файл и загрузить при
+    следующем запуске.
+
+    Аргументы:
+    index_path (str): Файл индекса (None — индекс только в памяти).
+    num_perm (int): Количество хэш-функций MinHash.
+    bands (int): Количество полос LSH (num_perm должно делиться на bands).
+    threshold (float): Минимальная оценка сходства Жаккара для почти дубликата.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, num_perm: int = 64, bands: int = 16,
+                 threshold: float = 0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.index_path = index_path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = random.Random(num_perm)
+        self._permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                              for _ in range(num_perm)]
+        self._exact = set()
+        # Подписи всех записей подряд в одном массиве: запись i занимает [i * num_perm, (i + 1) * num_perm)
+        self._signatures = array('I')
+        # Хэши поля code записей подряд: запись i занимает [i * CODE_KEY_SIZE, (i + 1) * CODE_KEY_SIZE)
+        self._code_keys = bytearray()
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        if index_path and os.path.exists(index_path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._signatures) // self.num_perm
+
+    def _normalize(self, json_object: Dict[str, Any]) -> Tuple[bytes, bytes, List[str]]:
+        """
+        Возвращает хэш нормализованного содержимого, хэш нормализованного поля code (с фреймворком)
+        и токены поля result для подписи MinHash.
+        """
+        language = record_language(json_object)
+        framework = json_object.get('framework', '')
+        code = '\0'.join([framework, ' '.join(tokenize(json_object.get('code', ''), language))])
+        result_tokens = tokenize(json_object.get('result', ''), language)
+        normalized = '\0'.join([code, ' '.join(result_tokens)])
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+        code_key = hashlib.blake2b(code.encode('utf-8'), digest_size=CODE_KEY_SIZE).digest()
+        return digest, code_key, rename_identifiers(result_tokens, language)
+
+    def _signature(self, tokens: List[str]) -> array:
+        shingles = {zlib.crc32(' '.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8'))
+                    for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))}
+        return array('I', (min(((a * shingle + b) % MERSENNE_PRIME) & 0xFFFFFFFF for shingle in shingles)
+                           for a, b in self._permutations))
+
+    def _band_keys(self, code_key: bytes, signature: array) -> Iterator[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, code_key + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _similarity(self, signature: array, record_id: int) -> float:
+        offset = record_id * self.num_perm
+        matches = sum(1 for i in range(self.num_perm) if self._signatures[offset + i] == signature[i])
+        return matches / self.num_perm
+
+    def _is_near_duplicate(self, code_key: bytes, signature: array) -> bool:
+        checked = set()
+        for band, key in self._band_keys(code_key, signature):
+            for record_id in self._buckets[band].get(key, ()):
+                if record_id not in checked:
+                    checked.add(record_id)
+                    if self._similarity(signature, record_id) >= self.threshold:
+                        return True
+        return False
+
+    def check(self, json_object: Dict[str, Any]) -> Optional[str]:
+        """Возвращает 'exact' или 'near', если запись — дубликат уже известной, иначе None."""
+        digest, code_key, tokens = self._normalize(json_object)
+        if digest in self._exact:
+            return 'exact'
+        return 'near' if self._is_near_duplicate(code_key, self._signature(tokens)) else None
+
+    def add(self, json_object: Dict[str, Any]) -> bool:
+        """Добавляет запись в индекс; возвращает False, если это дубликат (тогда запись не добавляется)."""
+        digest, code_key, tokens = self._normalize(json_object)
+        # Точные дубликаты отсекаются по хэшу, без вычисления подписи MinHash
+        if digest in self._exact:
+            return False
+        signature = self._signature(tokens)
+        if self._is_near_duplicate(code_key, signature):
+            return False
+        self._insert(digest, code_key, signature)
+        return True
+
+    def _insert(self, digest: bytes, code_key: bytes, signature: array) -> None:
+        record_id = len(self)
+        self._exact.add(digest)
+        self._code_keys += code_key
+        self._signatures.extend(signature)
+        for band, key in self._band_keys(code_key, signature):
+            self._buckets[band].setdefault(key, []).append(record_id)
+
+    def save(self, index_path: Optional[str] = None) -> None:
+        """
+        Сохраняет индекс: хэши точных совпадений, хэши поля code и подписи MinHash
+        (корзины LSH строятся при загрузке).
+        """
+        index_path = index_path or self.index_path
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(INDEX_HEADER.pack(INDEX_MAGIC, self.num_perm, self.bands, len(self._exact), len(self)))
+            file.write(b''.join(self._exact))
+            file.write(self._code_keys)
+            self._signatures.tofile(file)
+        os.replace(temp_path, index_path)
+
+    def _load(self) -> None:
+        with open(self.index_path, 'rb') as file:
+            magic, num_perm, bands, exact_count, count = INDEX_HEADER.unpack(file.read(INDEX_HEADER.size))
+            if magic != INDEX_MAGIC or num_perm != self.num_perm or bands != self.bands:
+                raise ValueError(f"Индекс {self.index_path} создан с другими параметрами")
+            exact = file.read(16 * exact_count)
+            self._exact = {exact[i:i + 16] for i in range(0, len(exact), 16)}
+            self._code_keys = bytearray(file.read(CODE_KEY_SIZE * count))
+            self._signatures.fromfile(file, count * num_perm)
+        for record_id in range(count):
+            signature = self._signatures[record_id * num_perm:(record_id + 1) * num_perm]
+            code_key = bytes(self._code_keys[record_id * CODE_KEY_SIZE:(record_id + 1) * CODE_KEY_SIZE])
+            for band, key in self._band_keys(code_key, signature):
+                self._buckets[band].setdefault(key, []).append(record_id)
+
+
+def iter_dataset(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Читает записи датасета в формате JSON Lines, JSON-массива или шардированной директории."""
+    if is_sharded_dataset(file_path):
+        with ShardedReader(file_path) as reader:
+            yield from reader.iter_records()
+        return
+    if is_jsonl_path(file_path):
+        yield from iter_jsonl(file_path)
+        return
+    with open(file_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    yield from (data if isinstance(data, list) else [data])
+
+
+def compact_dataset(input_path: str, output_path: str, index_path: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Удаляет точные и почти точные дубликаты из существующего датасета за один проход.
+
+    Выходной файл пишется заново в формате JSON Lines и не может совпадать с входным. Если указан
+    index_path, индекс загружается из него (записи, уже известные индексу, тоже считаются
+    дубликатами) и сохраняется обратно.
+    Возвращает (оставлено записей, удалено дубликатов).
+    """
+    if os.path.abspath(input_path) == os.path.abspath(output_path):
+        raise ValueError("Выходной файл должен отличаться от входного")
+    index = RecordDedupIndex(index_path)
+    kept = dropped = 0
+    with JsonlWriter(output_path, fsync_interval=0, truncate=True) as writer:
+        for json_object in iter_dataset(input_path):
+            if index.add(json_object):
+                writer.write(json_object)
+                kept += 1
+            else:
+                dropped += 1
+    if index_path:
+        index.save()
+    return kept, dropped
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Удаление дубликатов из датасета.')
+    parser.add_argument('input_path', help='Датасет (.jsonl или JSON-массив)')
+    parser.add_argument('output_path', help='Очищенный датасет (.jsonl)')
+    parser.add_argument('--index', default=None, help='Файл индекса дубликатов для сохранения между запусками')
+    args = parser.parse_args()
+
+    if os.path.abspath(args.input_path) == os.path.abspath(args.output_path):
+        parser.error('Выходной файл должен отличаться от входного')
+    kept, dropped = compact_dataset(args.input_path, args.output_path, args.index)
+    print(f'Оставлено записей: {kept}, удалено дубликатов: {dropped}')
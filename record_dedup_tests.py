@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dataset_writer import JsonlWriter, iter_jsonl
+from record_dedup import RecordDedupIndex, compact_dataset, tokenize
+
+
+class TestRecordDedup(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.record = {
+            'prompt': 'Write a unit test using pytest framework for this code',
+            'framework': 'pytest',
+            'code': 'def add(a, b):\n    return a + b',
+            'result': 'def test_add():\n    result = add(1, 2)\n    assert result == 3\n'
+                      '    total = add(2, 2)\n    assert total == 4',
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def variant(self, result):
+        return dict(self.record, result=result)
+
+    def test_tokenize_skips_comments_not_strings(self):
+        # Проверяет, что комментарии удаляются, а `#` внутри строк сохраняется
+        self.assertListEqual(tokenize('x = "a # b"  # comment', 'python'), ['x', '=', '"a # b"'])
+        self.assertListEqual(tokenize('f("//"); // comment', 'javascript'), ['f', '(', '"//"', ')', ';'])
+
+    def test_exact_and_near_duplicates(self):
+        # Проверяет точные дубликаты (пробелы, комментарии) и почти точные (переименованные переменные)
+        index = RecordDedupIndex()
+        self.assertTrue(index.add(self.record))
+        whitespace = self.variant('def test_add():  # same\n    result = add(1,2)\n    assert result == 3\n'
+                                  '    total = add(2, 2)\n    assert total == 4')
+        renamed = self.variant('def test_add():\n    value = add(1, 2)\n    assert value == 3\n'
+                               '    t = add(2, 2)\n    assert t == 4')
+        different = self.variant('def test_add_negative():\n    assert add(-1, 1) == 0')
+        self.assertEqual(index.check(whitespace), 'exact')
+        self.assertEqual(index.check(renamed), 'near')
+        self.assertIsNone(index.check(different))
+        self.assertTrue(index.add(different))
+        self.assertFalse(index.add(renamed))
+        self.assertEqual(len(index), 2)
+
+    def test_large_shared_entity(self):
+        # Проверяет, что разные тесты одной большой сущности не считаются почти дубликатами из-за общего code
+        code = 'class Calculator:\n    def __init__(self):\n        self.history = []\n' + ''.join(
+            f'\n    def op_{i}(self, a, b):\n        result = a * {i} + b\n        self.history.append(result)\n'
+            f'        return result\n' for i in range(12))
+        tests = ['def test_op():\n    assert Calculator().op_1(2, 3) == 5',
+                 'def test_raises():\n    with pytest.raises(TypeError):\n        Calculator().op_2(None, 1)',
+                 'def test_history():\n    calc = Calculator()\n    calc.op_3(1, 1)\n    assert calc.history == [4]']
+        index = RecordDedupIndex()
+        self.assertListEqual([index.add(dict(self.record, code=code, result=test)) for test in tests],
+                             [True, True, True])
+        renamed = 'def test_history():\n    c = Calculator()\n    c.op_3(1, 1)\n    assert c.history == [4]'
+        self.assertEqual(index.check(dict(self.record, code=code, result=renamed)), 'near')
+        self.assertIsNone(index.check(dict(self.record, result=renamed)))
+
+    def test_persistence(self):
+        # Проверяет сохранение и загрузку индекса
+        index_path = os.path.join(self.test_dir, 'dedup.idx')
+        index = RecordDedupIndex(index_path)
+        index.add(self.record)
+        index.save()
+        loaded = RecordDedupIndex(index_path)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.check(self.record), 'exact')
+
+    def test_compact_dataset(self):
+        # Проверяет офлайн-очистку существующего датасета
+        input_path = os.path.join(self.test_dir, 'dataset.jsonl')
+        with JsonlWriter(input_path) as writer:
+            for _ in range(5):
+                writer.write(self.record)
+            writer.write(self.variant('def test_add_negative():\n    assert add(-1, 1) == 0'))
+        output_path = os.path.join(self.test_dir, 'compacted.jsonl')
+        self.assertTupleEqual(compact_dataset(input_path, output_path), (2, 4))
+        self.assertEqual(len(list(iter_jsonl(output_path))), 2)
+        # Повторная очистка переписывает выходной файл, а не дописывает в него
+        self.assertTupleEqual(compact_dataset(input_path, output_path), (2, 4))
+        self.assertEqual(len(list(iter_jsonl(output_path))), 2)
+        with self.assertRaises(ValueError):
+            compact_dataset(input_path, input_path)
+        self.assertEqual(len(list(iter_jsonl(input_path))), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
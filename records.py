@@ -0,0 +1,79 @@
+from typing import Any, Dict, Optional, Tuple
+
+# Разделитель частей в текстовом формате input.txt
+TEXT_SEPARATOR = "/////"
+
+
+def format_code(code: str) -> str:
+    """
+    Форматирование кода для датасета, как в исходном main.py: литералы `\\\\` и `\\n` заменяются
+    на обратную косую черту и перевод строки. Применяется и в пакетном режиме, чтобы его записи
+    совпадали с записями старого конвейера.
+    """
+    return code.replace("\\\\", "\\").replace("\\n", "\n")
+
+
+class Record:
+    """
+    Запись датасета, передаваемая между этапами конвейера в памяти.
+
+    Аргументы:
+    test_code (str): Код теста (поле result).
+    entity_code (str): Код тестируемых сущностей (поле code).
+    framework (str): Название фреймворка.
+    language (str): Язык программирования.
+    source_span (tuple): Диапазон строк теста во входном файле (start_line, end_line) или None.
+    entities (tuple): Имена сущностей, код которых вошёл в запись.
+    """
+    __slots__ = ('test_code', 'entity_code', 'framework', 'language', 'source_span', 'entities')
+
+    def __init__(self, test_code: str, entity_code: str, framework: str, language: Optional[str] = None,
+                 source_span: Optional[Tuple[int, int]] = None, entities: Tuple[str, ...] = ()):
+        self.test_code = test_code
+        self.entity_code = entity_code
+        self.framework = framework
+        self.language = language
+        self.source_span = source_span
+        self.entities = entities
+
+    def __repr__(self) -> str:
+        return f"Record({self.framework!r}, {self.language!r}, source_span={self.source_span!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Record):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def to_json_object(self, framework: Optional[str] = None) -> Dict[str, Any]:
+        """Возвращает JSON-объект в формате датасета (framework переопределяет фреймворк записи)."""
+        framework = self.framework if framework is None else framework
+        return {
+            "prompt": "Write a unit test using {} framework for this code".format(framework),
+            "framework": framework,
+            "code": format_code(self.entity_code),
+            "result": format_code(self.test_code)
+        }
+
+    def to_text(self) -> str:
+        """Сериализует запись в старый текстовый формат `тест ///// сущности ///// фреймворк`."""
+        return f"{self.test_code}\n{TEXT_SEPARATOR}\n{self.entity_code}\n{TEXT_SEPARATOR}\n{self.framework}"
+
+    @classmethod
+    def from_text(cls, content: str, language: Optional[str] = None) -> 'Record':
+        """Разбирает запись из старого текстового формата."""
+        parts = content.split(TEXT_SEPARATOR)
+        if len(parts) < 3:
+            raise ValueError("Input file is not in the correct format")
+        return cls(parts[0].strip(), parts[1].strip(), parts[2].strip(), language)
+
+
+def read_record(file_path: str, language: Optional[str] = None) -> Record:
+    """Читает запись из файла в текстовом формате (например, input.txt)."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return Record.from_text(file.read(), language)
+
+
+def write_record(file_path: str, record: Record) -> None:
+    """Записывает запись в файл в текстовом формате."""
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(record.to_text())
@@ -0,0 +1,35 @@
+import unittest
+
+from process_test import build_record
+from records import Record
+
+
+class TestRecord(unittest.TestCase):
+
+    def test_text_roundtrip(self):
+        # Проверяет адаптер старого текстового формата
+        record = Record('def test_f():\n    assert f()', 'def f():\n    return 1', 'pytest', 'python')
+        self.assertEqual(record.to_text(), 'def test_f():\n    assert f()\n/////\ndef f():\n    return 1\n/////\npytest')
+        self.assertEqual(Record.from_text(record.to_text(), 'python'), record)
+
+    def test_from_text_invalid(self):
+        # Проверяет ошибку при неверном формате
+        with self.assertRaises(ValueError):
+            Record.from_text('только тест')
+
+    def test_separator_inside_code(self):
+        # Проверяет, что код с разделителем `/////` не ломает запись в памяти
+        record = build_record('def test_sep():\n    assert sep() == "/////"\n', [], '.', 'pytest', 'python',
+                              source_span=(1, 2))
+        json_object = record.to_json_object()
+        self.assertEqual(json_object['result'], 'def test_sep():\n    assert sep() == "/////"')
+        self.assertEqual(json_object['framework'], 'pytest')
+        self.assertEqual(record.source_span, (1, 2))
+
+    def test_slots(self):
+        # Проверяет компактность записи: у неё нет __dict__
+        self.assertFalse(hasattr(Record('', '', 'pytest'), '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
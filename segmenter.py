@@ -0,0 +1,347 @@
+import abc
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern
+
+# Верхнеуровневый фрагмент кода: определение (name задано), импорт или прочий код.
+# Комментарии и пустые строки перед фрагментом относятся к нему; строки нумеруются с 1.
+Segment = namedtuple('Segment', ['name', 'text', 'kind', 'start_line', 'end_line'], defaults=('other', 0, 0))
+# Определение функции, класса и т.п. на любом уровне вложенности
+Definition = namedtuple('Definition', ['name', 'line', 'depth'])
+# Строка исходного кода после сканирования:
+# code — строка начинается вне строкового литерала и комментария;
+# statement_start — с неё начинается новая инструкция (все скобки закрыты);
+# depth — отступ в начале инструкции (Python, -1 внутри инструкции) или глубина скобок (C-подобные языки).
+SourceLine = namedtuple('SourceLine', ['number', 'text', 'code', 'statement_start', 'depth'])
+# Результат разбора кода за один проход
+Outline = namedtuple('Outline', ['segments', 'definitions', 'imports', 'test_cases'])
+
+# Любой символ, кроме перевода строки: им заменяется содержимое литералов при маскировании
+_NOT_NEWLINE = re.compile(r'[^\n]')
+# Окончание строкового литерала для каждой кавычки (с учётом экранирования)
+_QUOTE_ENDS = {quote: re.compile(r'\\.|' + re.escape(quote), re.S) for quote in ('"""', "'''", '"', "'", '`')}
+
+
+def _bracket_balance(line: str) -> int:
+    return line.count('(') + line.count('[') + line.count('{') - line.count(')') - line.count(']') - line.count('}')
+
+
+def _find_quote_end(line: str, position: int, quote: str) -> int:
+    """Возвращает позицию за закрывающей кавычкой или -1, если литерал продолжается на следующей строке."""
+    for match in _QUOTE_ENDS[quote].finditer(line, position):
+        if match.group() == quote:
+            return match.end()
+    return -1
+
+
+class Segmenter(abc.ABC):
+    """
+    Сегментатор исходного кода одного языка.
+
+    Один проход по строкам даёт границы тестовых случаев, верхнеуровневые фрагменты
+    (определения, импорты, прочий код) и все определения с уровнем вложенности. Строковые
+    литералы, комментарии и вложенность скобок учитываются, поэтому текст внутри строк
+    и многострочных выражений не принимается за начало теста или определения.
+
+    Подклассы реализуют начальное состояние и сканирование строки (new_state, scan_line);
+    шаблоны задают язык.
+
+    Аргументы:
+    language (str): Название языка.
+    test_case_pattern (Pattern): Начало тестового случая (группы name или class_name — имя).
+    definition_pattern (Pattern): Определение; первая непустая группа — имя.
+    import_pattern (Pattern): Верхнеуровневая инструкция импорта.
+    """
+    comment_prefixes = ()
+
+    def __init__(self, language: str, test_case_pattern: Pattern, definition_pattern: Pattern,
+                 import_pattern: Pattern):
+        self.language = language
+        self.test_case_pattern = test_case_pattern
+        self.definition_pattern = definition_pattern
+        self.import_pattern = import_pattern
+
+    @abc.abstractmethod
+    def new_state(self) -> list:
+        """Возвращает состояние сканера в начале файла."""
+
+    @abc.abstractmethod
+    def scan_line(self, state: list, number: int, line: str, nesting: bool = True) -> SourceLine:
+        """Сканирует строку, обновляя состояние; nesting=False — не отслеживать вложенность скобок."""
+
+    def mask_literals(self, code: str) -> str:
+        """
+        Заменяет строковые литералы и комментарии пробелами, сохраняя переводы строк и позиции
+        символов: поиск имён по результату затрагивает только код.
+        """
+        return self._literals.sub(lambda match: _NOT_NEWLINE.sub(' ', match.group()), code)
+
+    def iter_lines(self, lines: Iterable[str], nesting: bool = True) -> Iterator[SourceLine]:
+        """
+        Сканирует поток строк; в памяти хранится только состояние сканера.
+
+        При nesting=False отслеживаются только строковые литералы и комментарии (поле code):
+        этого достаточно для границ тестовых случаев, а statement_start и depth не вычисляются.
+        """
+        state = self.new_state()
+        scan_line = self.scan_line
+        for number, line in enumerate(lines, 1):
+            yield scan_line(state, number, line, nesting)
+
+    def match_test_case(self, line: SourceLine):
+        """Возвращает совпадение шаблона начала тестового случая или None."""
+        return self.test_case_pattern.match(line.text.lstrip()) if line.code else None
+
+    def match_definition(self, text: str) -> Optional[str]:
+        match = self.definition_pattern.match(text)
+        if match is None:
+            return None
+        return next((group for group in match.groups() if group), None)
+
+    def is_comment(self, stripped: str) -> bool:
+        return stripped.startswith(self.comment_prefixes)
+
+    def continues_statement(self, stripped: str) -> bool:
+        """Верхнеуровневая строка, продолжающая предыдущую инструкцию (например, else в Python)."""
+        return False
+
+    def outline(self, code: str) -> Outline:
+        """Разбирает код за один проход."""
+        segments: List[Segment] = []
+        definitions: List[Definition] = []
+        imports: List[str] = []
+        test_cases = []
+
+        current: Optional[list] = None  # [имя, вид, первая строка, строки, количество начальных комментариев]
+        pending: List[str] = []  # Пустые строки и комментарии, ещё не отнесённые к фрагменту
+        after_decorator = False
+        number = 0
+
+        def close():
+            if current is not None:
+                name, kind, start_line, lines, leading = current
+                segments.append(Segment(name, ''.join(lines), kind, start_line, start_line + len(lines) - 1))
+                if kind == 'import':
+                    imports.append(''.join(lines[leading:]).strip())
+
+        for line in self.iter_lines(code.splitlines(keepends=True)):
+            number = line.number
+            text = line.text
+            stripped = text.strip()
+            name = None
+            if line.code:
+                name = self.match_definition(text.lstrip())
+                if name is not None:
+                    definitions.append(Definition(name, number, line.depth))
+                match = self.match_test_case(line)
+                if match is not None:
+                    groups = match.groupdict()
+                    test_cases.append((number, groups.get('name') or groups.get('class_name')))
+
+            if line.statement_start and (not stripped or self.is_comment(stripped)) \
+                    or (pending and not line.code):
+                pending.append(text)
+                continue
+
+            top_level = line.statement_start and line.depth == 0
+            if current is None or (top_level and not after_decorator and not self.continues_statement(stripped)):
+                close()
+                kind = 'import' if top_level and self.import_pattern.match(stripped) else \
+                    ('definition' if top_level and name else 'other')
+                current = [name if top_level else None, kind, number - len(pending), pending + [text],
+                           len(pending)]
+            else:
+                if top_level and after_decorator and current[0] is None and name:
+                    current[0], current[1] = name, 'definition'
+                current[3].extend(pending)
+                current[3].append(text)
+            pending = []
+            if top_level:
+                after_decorator = stripped.startswith('@')
+
+        close()
+        if ''.join(pending).strip():
+            segments.append(Segment(None, ''.join(pending), 'other', number - len(pending) + 1, number))
+        return Outline(segments, definitions, imports, test_cases)
+
+    def segments(self, code: str) -> List[Segment]:
+        return self.outline(code).segments
+
+
+class PythonSegmenter(Segmenter):
+    """Сегментатор Python: инструкции определяются по отступам, скобкам, строкам и продолжению через `\\`."""
+    comment_prefixes = ('#',)
+    _tokens = re.compile(r'#|"""|\'\'\'|"|\'|[()\[\]{}]')
+    _literal_tokens = re.compile(r'#|"""|\'\'\'|"|\'')
+    _special = re.compile(r'[#"\']')
+    _continuation = re.compile(r'(?:else|elif|except|finally)\b')
+    _literals = re.compile(r'''#[^\n]*|"""[\s\S]*?(?:"""|\Z)|\'\'\'[\s\S]*?(?:\'\'\'|\Z)'''
+                           r'''|"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?''')
+
+    def new_state(self) -> list:
+        # [глубина скобок, открытая кавычка, продолжение строки через обратную косую черту]
+        return [0, None, False]
+
+    def scan_line(self, state: list, number: int, line: str, nesting: bool = True) -> SourceLine:
+        depth, quote, continuation = state
+        code = quote is None
+        statement_start = nesting and code and depth == 0 and not continuation
+        indent = len(line) - len(line.lstrip(' \t')) if statement_start else -1
+
+        if code and self._special.search(line) is None:
+            # Быстрый путь: без строк и комментариев достаточно посчитать скобки
+            if nesting:
+                state[0] = max(depth + _bracket_balance(line), 0)
+                state[2] = line.rstrip('\r\n').endswith('\\')
+            return SourceLine(number, line, code, statement_start, indent)
+
+        tokens = self._tokens if nesting else self._literal_tokens
+        position = 0
+        comment = False
+        while True:
+            if quote is not None:
+                end = _find_quote_end(line, position, quote)
+                if end < 0:
+                    # Однострочный литерал без продолжения считается закрытым в конце строки
+                    if len(quote) == 1 and not line.rstrip('\r\n').endswith('\\'):
+                        quote = None
+                    break
+                quote = None
+                position = end
+                continue
+            match = tokens.search(line, position)
+            if match is None:
+                break
+            token = match.group()
+            position = match.end()
+            if token == '#':
+                comment = True
+                break
+            if token in ('(', '[', '{'):
+                depth += 1
+            elif token in (')', ']', '}'):
+                depth = max(depth - 1, 0)
+            else:
+                quote = token
+
+        state[0] = depth
+        state[1] = quote
+        state[2] = quote is None and not comment and line.rstrip('\r\n').endswith('\\')
+        return SourceLine(number, line, code, statement_start, indent)
+
+    def continues_statement(self, stripped: str) -> bool:
+        return self._continuation.match(stripped) is not None
+
+
+class BraceSegmenter(Segmenter):
+    """
+    Сегментатор C-подобных языков (JavaScript, TypeScript, Java): инструкция верхнего уровня
+    заканчивается переводом строки, когда все скобки закрыты. Учитываются строки, шаблонные
+    строки и комментарии `//` и `/* */`.
+    """
+    comment_prefixes = ('//', '/*')
+    _tokens = re.compile(r'//|/\*|["\'`]|[()\[\]{}]')
+    _literal_tokens = re.compile(r'//|/\*|["\'`]')
+    _special = re.compile(r'[/"\'`]')
+    _literals = re.compile(r'''//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?'''
+                           r'''|`(?:\\.|[^`\\])*`?''')
+
+    def new_state(self) -> list:
+        # [глубина скобок, открытая кавычка, внутри блочного комментария]
+        return [0, None, False]
+
+    def scan_line(self, state: list, number: int, line: str, nesting: bool = True) -> SourceLine:
+        depth, quote, block_comment = state
+        start_depth = depth if nesting else -1
+        code = quote is None and not block_comment
+        statement_start = nesting and code and depth == 0
+
+        if code and self._special.search(line) is None:
+            if nesting:
+                state[0] = max(depth + _bracket_balance(line), 0)
+            return SourceLine(number, line, code, statement_start, start_depth)
+
+        tokens = self._tokens if nesting else self._literal_tokens
+        position = 0
+        while True:
+            if block_comment:
+                end = line.find('*/', position)
+                if end < 0:
+                    break
+                block_comment = False
+                position = end + 2
+                continue
+            if quote is not None:
+                end = _find_quote_end(line, position, quote)
+                if end < 0:
+                    if quote != '`' and not line.rstrip('\r\n').endswith('\\'):
+                        quote = None
+                    break
+                quote = None
+                position = end
+                continue
+            match = tokens.search(line, position)
+            if match is None:
+                break
+            token = match.group()
+            position = match.end()
+            if token == '//':
+                break
+            if token == '/*':
+                block_comment = True
+            elif token in ('(', '[', '{'):
+                depth += 1
+            elif token in (')', ']', '}'):
+                depth = max(depth - 1, 0)
+            else:
+                quote = token
+
+        state[0] = depth
+        state[1] = quote
+        state[2] = block_comment
+        return SourceLine(number, line, code, statement_start, start_depth)
+
+
+_JS_DEFINITION = (r'^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?'
+                  r'(?:function\*?|class|const|let|var{extra})\s+([\w$]+)')
+_JS_TEST_CASE = re.compile(r'''^\s*(?:it|describe|test)\s*\(\s*(?:(['"`])(?P<name>.*?)\1)?''')
+_JS_IMPORT = re.compile(r'^(?:import\b|(?:const|let|var)\s+[\w${}\s,:]+=\s*require\s*\()')
+_JAVA_MODIFIERS = r'(?:(?:public|private|protected|static|final|abstract|sealed|synchronized|native|default)\s+)'
+
+SEGMENTERS: Dict[str, Segmenter] = {}
+
+
+def register_segmenter(segmenter: Segmenter) -> Segmenter:
+    """Регистрирует сегментатор языка (новый язык подключается без изменения остальных модулей)."""
+    SEGMENTERS[segmenter.language] = segmenter
+    return segmenter
+
+
+def get_segmenter(language: str) -> Segmenter:
+    """Возвращает сегментатор для указанного языка."""
+    segmenter = SEGMENTERS.get(language)
+    if segmenter is None:
+        raise ValueError(f"Неподдерживаемый язык: {language}")
+    return segmenter
+
+
+register_segmenter(PythonSegmenter(
+    'python',
+    re.compile(r'^\s*(?:def (?P<name>test\w*)|class\s+(?P<class_name>\w*))'),
+    re.compile(r'^(?:async\s+)?(?:def|class)\s+(\w+)'),
+    re.compile(r'^(?:import|from)\s'),
+))
+register_segmenter(BraceSegmenter(
+    'javascript', _JS_TEST_CASE, re.compile(_JS_DEFINITION.format(extra='')), _JS_IMPORT,
+))
+register_segmenter(BraceSegmenter(
+    'typescript', _JS_TEST_CASE, re.compile(_JS_DEFINITION.format(extra='|interface|type|enum|namespace')),
+    _JS_IMPORT,
+))
+register_segmenter(BraceSegmenter(
+    'java',
+    re.compile(r'^\s*@(?:Test|ParameterizedTest|RepeatedTest)\b'),
+    re.compile(rf'^{_JAVA_MODIFIERS}*(?:class|interface|enum|record|@interface)\s+(\w+)'
+               rf'|^{_JAVA_MODIFIERS}+(?:<[^>]*>\s*)?[\w<>\[\],.? ]+\s+(\w+)\s*\('),
+    re.compile(r'^import\s'),
+))
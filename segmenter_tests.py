@@ -0,0 +1,113 @@
+import re
+import unittest
+
+from case_splitter import iter_test_cases_from_lines
+from process_test import extract_entities
+from segmenter import Segmenter, get_segmenter
+
+
+class TestSegmenter(unittest.TestCase):
+
+    def test_python_outline(self):
+        # Проверяет, что один проход даёт фрагменты, определения, импорты и начала тестов
+        code = ('import os\n'
+                'from typing import (\n'
+                '    List,\n'
+                ')\n\n'
+                'def test_one():\n'
+                '    text = """\n'
+                'def test_fake():\n'
+                '"""\n'
+                '    assert helper(\n'
+                '        1) == 1\n\n'
+                'if os.sep:\n'
+                '    x = 1\n'
+                'else:\n'
+                '    x = 2\n'
+                '# конец\n')
+        outline = get_segmenter('python').outline(code)
+        self.assertListEqual([(segment.name, segment.kind) for segment in outline.segments],
+                             [(None, 'import'), (None, 'import'), ('test_one', 'definition'), (None, 'other'),
+                              (None, 'other')])
+        self.assertEqual(''.join(segment.text for segment in outline.segments), code)
+        self.assertListEqual(outline.imports, ['import os', 'from typing import (\n    List,\n)'])
+        self.assertListEqual(outline.test_cases, [(6, 'test_one')])
+        self.assertListEqual([(definition.name, definition.depth) for definition in outline.definitions],
+                             [('test_one', 0)])
+        self.assertEqual(outline.segments[2].start_line, 5)
+
+    def test_javascript_outline(self):
+        # Проверяет учёт вложенных скобок, строк и комментариев в JavaScript
+        code = ("import { a } from './a';\n"
+                "const b = require('b');\n"
+                "// describe('comment', () => {\n"
+                "describe('suite', () => {\n"
+                "    const s = '}';\n"
+                "    it('works', () => {\n"
+                "        expect(a()).toBe(1);\n"
+                "    });\n"
+                "});\n")
+        outline = get_segmenter('javascript').outline(code)
+        self.assertListEqual([segment.kind for segment in outline.segments], ['import', 'import', 'other'])
+        self.assertListEqual(outline.imports, ["import { a } from './a';", "const b = require('b');"])
+        self.assertListEqual(outline.test_cases, [(4, 'suite'), (6, 'works')])
+        self.assertIn(('s', 2), [(definition.name, definition.depth) for definition in outline.definitions])
+
+    def test_test_cases_skip_literals(self):
+        # Проверяет, что строки внутри многострочного литерала не начинают тестовый случай
+        lines = ['def test_a():\n', '    doc = """\n', 'def test_inside():\n', '"""\n', 'def test_b():\n',
+                 '    pass\n']
+        test_cases = list(iter_test_cases_from_lines(lines, 'python'))
+        self.assertListEqual([(test_case.name, test_case.start_line) for test_case in test_cases],
+                             [('test_a', 1), ('test_b', 5)])
+
+    def test_mask_literals(self):
+        # Проверяет, что строки и комментарии заменяются пробелами с сохранением позиций
+        code = 'x = "a#b"  # c\ny = """d\ne"""\n'
+        masked = get_segmenter('python').mask_literals(code)
+        self.assertEqual(len(masked), len(code))
+        self.assertEqual(masked.split('\n'), ['x =' + ' ' * 11, 'y =' + ' ' * 5, ' ' * 4, ''])
+        self.assertEqual(get_segmenter('javascript').mask_literals("f('a'); /* b */ g(`c`) // d"),
+                         'f(   );         g(   )     ')
+
+    def test_other_languages(self):
+        # Проверяет зарегистрированные сегментаторы TypeScript и Java
+        outline = get_segmenter('typescript').outline('export interface Item {\n    id: number;\n}\n'
+                                                      'test("item", () => {});\n')
+        self.assertListEqual([segment.name for segment in outline.segments], ['Item', None])
+        self.assertListEqual(outline.test_cases, [(4, 'item')])
+
+        java = ('import org.junit.Test;\n\n'
+                'public class ItemTest {\n'
+                '    @Test\n'
+                '    public void testGet() {\n'
+                '        return;\n'
+                '    }\n'
+                '}\n')
+        outline = get_segmenter('java').outline(java)
+        self.assertListEqual(outline.imports, ['import org.junit.Test;'])
+        self.assertListEqual([definition.name for definition in outline.definitions], ['ItemTest', 'testGet'])
+        self.assertListEqual(outline.test_cases, [(4, None)])
+        self.assertEqual(extract_entities(java, 'java'), {'ItemTest', 'testGet'})
+
+    def test_abstract_segmenter(self):
+        # Проверяет, что подкласс без сканирования строки нельзя создать
+        class IncompleteSegmenter(Segmenter):
+            def new_state(self):
+                return []
+
+        with self.assertRaises(TypeError):
+            IncompleteSegmenter('python', re.compile('x'), re.compile('x'), re.compile('x'))
+
+    def test_unknown_language(self):
+        # Проверяет понятную ошибку вместо несвязанной переменной шаблона
+        with self.assertRaises(ValueError):
+            get_segmenter('cobol')
+        with self.assertRaises(ValueError):
+            extract_entities('def f(): pass', 'cobol')
+        with self.assertRaises(ValueError):
+            list(iter_test_cases_from_lines(['def test_a():\n'], 'cobol'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,301 @@
+import gzip
+import io
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import get_registry
+from parallel import ordered_parallel_map
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+META_NAME = 'index.json'
+INDEX_NAME = 'index.bin'
+INDEX_MAGIC = b'AWSHARD2'
+# Запись индекса: номер шарда, смещение и длина (в сжатом виде) блока в файле шарда,
+# смещение и длина записи внутри распакованного блока
+INDEX_ENTRY = struct.Struct('<IQIII')
+SHARD_EXTENSIONS = {None: '.jsonl', 'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+
+
+def resolve_compression(compression: Optional[str]) -> Optional[str]:
+    """Проверяет вид сжатия; 'auto' выбирает zstd, если установлен пакет zstandard, иначе gzip."""
+    if compression == 'auto':
+        return 'zstd' if zstandard is not None else 'gzip'
+    if compression not in SHARD_EXTENSIONS:
+        raise ValueError(f"Неизвестный вид сжатия: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("Для сжатия zstd нужен пакет zstandard")
+    return compression
+
+
+def is_sharded_dataset(path: str) -> bool:
+    """Проверяет, что путь — директория шардированного датасета."""
+    return os.path.isfile(os.path.join(path, META_NAME))
+
+
+class ShardedWriter:
+    """
+    Запись датасета в шарды JSON Lines с индексом смещений.
+
+    Новый шард начинается, когда в текущем набралось max_records записей или его размер превысил бы
+    max_bytes. Записи собираются в блоки по block_records записей (или block_bytes байт), и при сжатии
+    каждый блок сжимается одним кадром gzip или zstd: файл шарда остаётся корректным потоком (кадры
+    идут подряд), а сжатие работает на всём блоке, а не на отдельной короткой строке. Для каждой записи
+    в index.bin дописывается (шард, смещение и длина блока, смещение и длина записи в блоке), поэтому
+    читатель получает запись i за O(1), распаковывая один блок. Если в директории уже есть датасет,
+    запись продолжается в новом шарде.
+
+    Аргументы:
+    directory (str): Директория датасета.
+    max_records (int): Максимум записей в шарде (None — без ограничения).
+    max_bytes (int): Максимальный размер файла шарда в байтах (None — без ограничения).
+    compression (str): None, 'gzip', 'zstd' или 'auto'.
+    compression_level (int): Уровень сжатия (None — по умолчанию для алгоритма).
+    block_records (int): Максимум записей в блоке: больше — лучше сжатие, но дольше чтение одной записи.
+    block_bytes (int): Максимальный размер блока до сжатия в байтах.
+    """
+
+    def __init__(self, directory: str, max_records: Optional[int] = None, max_bytes: Optional[int] = None,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None,
+                 buffer_size: int = 1 << 16, block_records: int = 64, block_bytes: int = 1 << 16):
+        self.directory = directory
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.block_records = block_records
+        self.block_bytes = block_bytes
+        self.compression = resolve_compression(compression)
+        self.buffer_size = buffer_size
+        if self.compression == 'gzip':
+            level = 6 if compression_level is None else compression_level
+            self._compress = lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+        elif self.compression == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=3 if compression_level is None else compression_level)
+            self._compress = compressor.compress
+        else:
+            self._compress = None
+
+        os.makedirs(directory, exist_ok=True)
+        self.shards: List[str] = []
+        self.records_written = 0
+        self._total_records = 0
+        meta_path = os.path.join(directory, META_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            if meta['compression'] != self.compression:
+                raise ValueError(f"Датасет {directory} записан со сжатием {meta['compression']}")
+            self.shards = meta['shards']
+        index_path = os.path.join(directory, INDEX_NAME)
+        if os.path.exists(index_path) and os.path.getsize(index_path):
+            with open(index_path, 'rb') as file:
+                if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    raise ValueError(f"Датасет {directory} записан в другом формате индекса")
+        self._index = open(index_path, 'ab', buffering=buffer_size)
+        if self._index.tell() == 0:
+            self._index.write(INDEX_MAGIC)
+        self._total_records = (self._index.tell() - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+        self._shard = None
+        self._shard_records = 0
+        self._shard_bytes = 0
+        # Несжатые строки текущего блока и их суммарный размер
+        self._block: List[bytes] = []
+        self._block_bytes = 0
+
+    def _open_shard(self) -> None:
+        self._close_shard()
+        name = f"part-{len(self.shards):05d}{SHARD_EXTENSIONS[self.compression]}"
+        self.shards.append(name)
+        self._shard = open(os.path.join(self.directory, name), 'wb', buffering=self.buffer_size)
+        self._shard_records = 0
+        self._shard_bytes = 0
+        self._write_meta()
+
+    def _close_shard(self) -> None:
+        if self._shard is not None:
+            self._shard.close()
+            self._shard = None
+
+    def _write_meta(self) -> None:
+        meta = {'version': 2, 'compression': self.compression, 'shards': self.shards,
+                'records': self._total_records}
+        temp_path = os.path.join(self.directory, META_NAME + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self.directory, META_NAME))
+
+    def _flush_block(self) -> None:
+        """Записывает накопленный блок одним кадром и дописывает записи индекса для его строк."""
+        if not self._block:
+            return
+        frame = b''.join(self._block)
+        if self._compress is not None:
+            frame = self._compress(frame)
+        self._shard.write(frame)
+        shard = len(self.shards) - 1
+        offset = 0
+        for line in self._block:
+            self._index.write(INDEX_ENTRY.pack(shard, self._shard_bytes, len(frame), offset, len(line)))
+            offset += len(line)
+        get_registry().inc('bytes_written', len(frame))
+        self._shard_bytes += len(frame)
+        self._block = []
+        self._block_bytes = 0
+
+    def write(self, json_object: Dict[str, Any]) -> None:
+        """Дописывает запись в текущий блок (открывая новый шард при превышении ограничений)."""
+        with get_registry().timer('write'):
+            data = json.dumps(json_object, ensure_ascii=False).encode('utf-8') + b'\n'
+            # Размер несжатого блока — верхняя оценка его размера в шарде
+            if self._shard is None or self._shard_records and (
+                    self.max_records and self._shard_records >= self.max_records
+                    or self.max_bytes and self._shard_bytes + self._block_bytes + len(data) > self.max_bytes):
+                self._flush_block()
+                self._open_shard()
+            self._block.append(data)
+            self._block_bytes += len(data)
+            self._shard_records += 1
+            self._total_records += 1
+            self.records_written += 1
+            if len(self._block) >= self.block_records or self._block_bytes >= self.block_bytes:
+                self._flush_block()
+
+    def close(self) -> None:
+        if self._index.closed:
+            return
+        if self._shard is not None:
+            self._flush_block()
+        self._close_shard()
+        # Индекс сбрасывается после шардов: каждая запись индекса указывает на уже записанные данные
+        self._index.close()
+        self._write_meta()
+
+    def __enter__(self) -> 'ShardedWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class ShardedReader:
+    """
+    Чтение шардированного датасета: запись i за O(1) через отображённый в память индекс
+    и последовательный или параллельный (по шардам) обход.
+
+    Аргументы:
+    directory (str): Директория датасета.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_NAME), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        self.compression = meta['compression']
+        self.shards: List[str] = meta['shards']
+        if self.compression == 'zstd':
+            if zstandard is None:
+                raise ValueError("Для чтения датасета со сжатием zstd нужен пакет zstandard")
+            self._decompressor = zstandard.ZstdDecompressor()
+        with open(os.path.join(directory, INDEX_NAME), 'rb') as file:
+            self._index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{directory} не является шардированным датасетом")
+        self._count = (len(self._index) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+        self._shard_maps: Dict[int, mmap.mmap] = {}
+        # Последний распакованный блок: соседние записи обычно читаются из одного блока
+        self._frame_key: Optional[Tuple[int, int]] = None
+        self._frame = b''
+
+    def __len__(self) -> int:
+        return self._count
+
+    def entry(self, index: int) -> Tuple[int, int, int, int, int]:
+        """Возвращает (шард, смещение блока, длина блока, смещение записи в блоке, длина записи)."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return INDEX_ENTRY.unpack_from(self._index, len(INDEX_MAGIC) + index * INDEX_ENTRY.size)
+
+    def _shard_map(self, shard: int) -> mmap.mmap:
+        shard_map = self._shard_maps.get(shard)
+        if shard_map is None:
+            with open(os.path.join(self.directory, self.shards[shard]), 'rb') as file:
+                shard_map = self._shard_maps[shard] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return shard_map
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self.compression == 'gzip':
+            return gzip.decompress(data)
+        if self.compression == 'zstd':
+            return self._decompressor.decompress(data)
+        return data
+
+    def read_bytes(self, index: int) -> bytes:
+        """Возвращает строку JSON записи index, распаковывая только её блок."""
+        shard, frame_offset, frame_length, offset, length = self.entry(index)
+        if self.compression is None:
+            start = frame_offset + offset
+            return self._shard_map(shard)[start:start + length]
+        if self._frame_key != (shard, frame_offset):
+            self._frame = self._decompress(self._shard_map(shard)[frame_offset:frame_offset + frame_length])
+            self._frame_key = (shard, frame_offset)
+        return self._frame[offset:offset + length]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return json.loads(self.read_bytes(index))
+
+    def _open_text(self, shard: int):
+        path = os.path.join(self.directory, self.shards[shard])
+        if self.compression == 'gzip':
+            return gzip.open(path, 'rt', encoding='utf-8')
+        if self.compression == 'zstd':
+            stream = self._decompressor.stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+            return io.TextIOWrapper(stream, encoding='utf-8')
+        return open(path, 'r', encoding='utf-8')
+
+    def iter_shard(self, shard: int) -> Iterator[Dict[str, Any]]:
+        """Последовательно читает все записи шарда."""
+        with self._open_text(shard) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_records(self, workers: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Обходит все записи в порядке записи. При workers > 1 шарды читаются и распаковываются
+        параллельно в пуле процессов; одновременно в памяти не больше workers * 2 шардов.
+        """
+        if workers <= 1:
+            for shard in range(len(self.shards)):
+                yield from self.iter_shard(shard)
+            return
+        tasks = [(self.directory, shard) for shard in range(len(self.shards))]
+        yield from ordered_parallel_map(_read_shards, tasks, workers=workers, chunk_size=1,
+                                        max_pending=workers * 2)
+
+    def close(self) -> None:
+        for shard_map in self._shard_maps.values():
+            shard_map.close()
+        self._shard_maps = {}
+        self._index.close()
+
+    def __enter__(self) -> 'ShardedReader':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _read_shards(tasks: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    """Читает шарды в рабочем процессе."""
+    records = []
+    for directory, shard in tasks:
+        with ShardedReader(directory) as reader:
+            records.extend(reader.iter_shard(shard))
+    return records
@@ -0,0 +1,91 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from record_dedup import iter_dataset
+from sharded import ShardedReader, ShardedWriter, resolve_compression, zstandard
+
+
+class TestSharded(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dataset_dir = os.path.join(self.test_dir, 'dataset')
+        self.records = [{"prompt": "p", "framework": "pytest", "code": f"def f{i}():\n    return 'ё'",
+                         "result": f"assert f{i}() == {i}"} for i in range(25)]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, records, **options):
+        with ShardedWriter(self.dataset_dir, **options) as writer:
+            for record in records:
+                writer.write(record)
+        return writer
+
+    def test_rollover_by_records(self):
+        # Проверяет, что шарды содержат не больше max_records записей и читаются по порядку
+        writer = self.write(self.records, max_records=10)
+        self.assertEqual(len(writer.shards), 3)
+        with ShardedReader(self.dataset_dir) as reader:
+            self.assertEqual(len(reader), 25)
+            self.assertEqual(len(list(reader.iter_shard(2))), 5)
+            self.assertListEqual(list(reader.iter_records()), self.records)
+
+    def test_rollover_by_bytes(self):
+        # Проверяет, что размер шарда не превышает max_bytes (кроме шарда из одной записи)
+        writer = self.write(self.records, max_bytes=300)
+        for name in writer.shards:
+            self.assertLessEqual(os.path.getsize(os.path.join(self.dataset_dir, name)), 300)
+        self.assertListEqual(list(iter_dataset(self.dataset_dir)), self.records)
+
+    def test_random_access_gzip(self):
+        # Проверяет доступ к записи по номеру и то, что сжатый шард читается как обычный gzip
+        writer = self.write(self.records, max_records=8, compression='gzip')
+        with ShardedReader(self.dataset_dir) as reader:
+            for index in (0, 7, 8, 24, -1):
+                self.assertDictEqual(reader[index], self.records[index])
+            with self.assertRaises(IndexError):
+                reader[25]
+        with gzip.open(os.path.join(self.dataset_dir, writer.shards[0]), 'rt', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 8)
+
+    def test_block_compression(self):
+        # Проверяет, что записи сжимаются блоками: файл меньше, чем при кадре на запись, а доступ по номеру сохранён
+        self.write(self.records, compression='gzip', block_records=1)
+        per_record = os.path.getsize(os.path.join(self.dataset_dir, 'part-00000.jsonl.gz'))
+        shutil.rmtree(self.dataset_dir)
+        writer = self.write(self.records, compression='gzip', block_records=10)
+        self.assertLess(os.path.getsize(os.path.join(self.dataset_dir, writer.shards[0])), per_record / 2)
+        with ShardedReader(self.dataset_dir) as reader:
+            self.assertEqual(reader.entry(13)[:3], reader.entry(19)[:3])
+            self.assertNotEqual(reader.entry(9)[1], reader.entry(10)[1])
+            for index in (24, 13, 0, 19, 10):
+                self.assertDictEqual(reader[index], self.records[index])
+
+    def test_append_and_parallel_read(self):
+        # Проверяет дозапись в существующий датасет и параллельное чтение шардов
+        self.write(self.records[:12], max_records=5, compression='gzip')
+        self.write(self.records[12:], max_records=5, compression='gzip')
+        with ShardedReader(self.dataset_dir) as reader:
+            self.assertEqual(len(reader), 25)
+            self.assertDictEqual(reader[12], self.records[12])
+            self.assertListEqual(list(reader.iter_records(workers=2)), self.records)
+        with self.assertRaises(ValueError):
+            ShardedWriter(self.dataset_dir, compression=None)
+
+    def test_zstd(self):
+        # Проверяет сжатие zstd (если установлен пакет zstandard)
+        if zstandard is None:
+            self.assertEqual(resolve_compression('auto'), 'gzip')
+            self.skipTest('zstandard не установлен')
+        self.write(self.records, max_records=10, compression='zstd')
+        with ShardedReader(self.dataset_dir) as reader:
+            self.assertDictEqual(reader[13], self.records[13])
+            self.assertListEqual(list(reader.iter_records()), self.records)
+
+
+if __name__ == '__main__':
+    unittest.main()
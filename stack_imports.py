@@ -1,16 +1,36 @@
 import tkinter as tk
-from tkinter import simpledialog, messagebox
+from tkinter import simpledialog, messagebox, filedialog
+from collections import deque
 import re
 
+# Сколько последних действий хранится для отмены (Back)
+HISTORY_LIMIT = 1000
+# Проверка на наличие 'from ... import ...' или 'import ...'
+IMPORT_PATTERN = re.compile(r"^(from\s+\w+(\.\w+)*\s+import\s+[\w\s,]+|import\s+\w+(\.\w+)*)$")
+
+
+def expand_import(import_text):
+    """Разбивает `from a import b, c` на отдельные импорты каждого имени."""
+    if "import" in import_text:
+        import_parts = import_text.split("import")
+        base_import = import_parts[0].strip() + " import"
+        entities = import_parts[1].strip().split(',')
+        return [f"{base_import} {entity.strip()}" for entity in entities]
+    return [import_text]
+
 
 class ImportStack:
-    def __init__(self):
+    def __init__(self, history_limit=HISTORY_LIMIT):
         self.stack = []
-        self.history = []
+        # Старые действия вытесняются, поэтому память истории ограничена
+        self.history = deque(maxlen=history_limit)
 
     def push(self, item):
         self.stack.append(item)
 
+    def push_many(self, items):
+        self.stack.extend(items)
+
     def pop(self):
         if self.stack:
             item = self.stack.pop()
@@ -24,6 +44,7 @@ class ImportStack:
             action, item = self.history.pop()
             if action == "pop":
                 self.stack.append(item)
+                return item
         else:
             messagebox.showerror("Error", "История пуста!")
 
@@ -37,6 +58,11 @@ class ImportStack:
     def get_history(self):
         return self.history
 
+    def save(self, file_path):
+        """Сохраняет стек в файл (одна инструкция на строку) для import_resolver.py."""
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.writelines(f"{item}\n" for item in self.stack)
+
 
 class StackApp:
     def __init__(self, root, stack):
@@ -59,6 +85,12 @@ class StackApp:
         self.add_button = tk.Button(self.frame, text="Добавить импорт", command=self.add_import)
         self.add_button.pack(pady=5)
 
+        self.bulk_text = tk.Text(self.frame, height=5, width=50)
+        self.bulk_text.pack(pady=5)
+
+        self.bulk_button = tk.Button(self.frame, text="Добавить список импортов", command=self.add_imports_bulk)
+        self.bulk_button.pack(pady=5)
+
         self.pop_button = tk.Button(self.frame, text="Pop", command=self.pop_import)
         self.pop_button.pack(pady=5)
 
@@ -71,40 +103,63 @@ class StackApp:
         self.clear_button = tk.Button(self.frame, text="Очистить стек и историю", command=self.clear_stack)
         self.clear_button.pack(pady=5)
 
+        self.save_button = tk.Button(self.frame, text="Сохранить в файл", command=self.save_stack)
+        self.save_button.pack(pady=5)
+
         self.update_stack_view()
 
     def add_import(self):
         import_text = self.import_entry.get().strip()
         if self.validate_import(import_text):
-            if "import" in import_text:
-                import_parts = import_text.split("import")
-                base_import = import_parts[0].strip() + " import"
-                entities = import_parts[1].strip().split(',')
-                for entity in entities:
-                    self.stack.push(f"{base_import} {entity.strip()}")
-            else:
-                self.stack.push(import_text)
+            self.push_items(expand_import(import_text))
             self.import_entry.delete(0, tk.END)
-            self.update_stack_view()
         else:
             messagebox.showerror("Error", "Неправильный формат импорта")
 
+    def add_imports_bulk(self):
+        # Вставленный список (по инструкции на строку) добавляется одним обновлением Listbox
+        items = []
+        invalid = []
+        for line in self.bulk_text.get("1.0", tk.END).splitlines():
+            import_text = line.strip()
+            if not import_text:
+                continue
+            if self.validate_import(import_text):
+                items.extend(expand_import(import_text))
+            else:
+                invalid.append(import_text)
+        self.push_items(items)
+        self.bulk_text.delete("1.0", tk.END)
+        if invalid:
+            self.bulk_text.insert("1.0", "\n".join(invalid))
+            messagebox.showerror("Error", f"Неправильный формат импорта: {len(invalid)} строк оставлено в поле")
+
+    def push_items(self, items):
+        # В Listbox дописываются только новые элементы, без перестроения всего списка
+        if items:
+            self.stack.push_many(items)
+            self.stack_listbox.insert(tk.END, *items)
+
     def validate_import(self, import_text):
-        # Проверка на наличие 'from ... import ...' или 'import ...'
-        pattern = r"^(from\s+\w+(\.\w+)*\s+import\s+[\w\s,]+|import\s+\w+(\.\w+)*)$"
-        return re.match(pattern, import_text)
+        return IMPORT_PATTERN.match(import_text)
 
     def pop_import(self):
-        self.stack.pop()
-        self.update_stack_view()
+        if self.stack.pop() is not None:
+            self.stack_listbox.delete(tk.END)
 
     def back_import(self):
-        self.stack.back()
-        self.update_stack_view()
+        item = self.stack.back()
+        if item is not None:
+            self.stack_listbox.insert(tk.END, item)
 
     def clear_stack(self):
         self.stack.clear()
-        self.update_stack_view()
+        self.stack_listbox.delete(0, tk.END)
+
+    def save_stack(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".txt")
+        if file_path:
+            self.stack.save(file_path)
 
     def show_history(self):
         history_window = tk.Toplevel(self.root)
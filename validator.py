@@ -0,0 +1,261 @@
+import hashlib
+import re
+import textwrap
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dataset_writer import JsonlWriter
+from metrics import get_registry
+from parallel import iter_chunks
+from records import Record
+
+# Токены для проверки JavaScript: комментарии, строки, идентификаторы и числа, отдельные символы.
+# Незакрытые строки и комментарии не совпадают с первыми вариантами и попадают в \S.
+JS_TOKEN_PATTERN = re.compile(r'''//[^\n]*|/\*[\s\S]*?\*/|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|[\w$]+|\S''')
+# Текст шаблонной строки до закрывающей кавычки или подстановки ${
+JS_TEMPLATE_TEXT_PATTERN = re.compile(r'(?:\\[\s\S]|[^`\\$]|\$(?!\{))*')
+# Литерал регулярного выражения с классами символов и флагами
+JS_REGEX_PATTERN = re.compile(r'/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*')
+# Токены, после которых '/' начинает регулярное выражение, а не деление
+JS_REGEX_PRECEDING = set('(,=:[!&|?{};+-*%<>~^') | {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new',
+                                                       'delete', 'void', 'throw', 'yield', 'await'}
+CLOSING_BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+
+def default_quarantine_path(output_file_path: str) -> str:
+    """Путь к файлу карантина рядом с выходным файлом датасета."""
+    return output_file_path + '.quarantine.jsonl'
+
+
+def check_python(code: str) -> Optional[str]:
+    """Компилирует код Python; возвращает описание ошибки или None."""
+    try:
+        # Тестовые методы, вырезанные из класса, имеют отступ
+        compile(textwrap.dedent(code), '<record>', 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError) as error:
+        return f"{type(error).__name__}: {error}"
+    return None
+
+
+def check_javascript(code: str) -> Optional[str]:
+    """
+    Проверяет JavaScript токенизатором: закрытые строки, комментарии, шаблонные строки
+    и регулярные выражения, парные скобки (в том числе внутри подстановок ${...}).
+    """
+    def line(position: int) -> int:
+        return code.count('\n', 0, position) + 1
+
+    # Открытые скобки, шаблонные строки ('`') и подстановки ('${') с позициями
+    stack: List[Tuple[str, int]] = []
+    position = 0
+    previous = None
+    while True:
+        if stack and stack[-1][0] == '`':
+            position = JS_TEMPLATE_TEXT_PATTERN.match(code, position).end()
+            if code.startswith('`', position):
+                stack.pop()
+                position += 1
+                previous = '`'
+            elif code.startswith('${', position):
+                stack.append(('${', position))
+                position += 2
+                previous = '{'
+            else:
+                return f"Незакрытая шаблонная строка в строке {line(stack[-1][1])}"
+            continue
+
+        match = JS_TOKEN_PATTERN.search(code, position)
+        if match is None:
+            break
+        token, start = match.group(), match.start()
+        position = match.end()
+        if token.startswith(('//', '/*')):
+            continue
+        if token == '/':
+            if code.startswith('/*', start):
+                return f"Незакрытый комментарий в строке {line(start)}"
+            if previous is None or previous in JS_REGEX_PRECEDING:
+                regex = JS_REGEX_PATTERN.match(code, start)
+                if regex is None:
+                    return f"Незакрытое регулярное выражение в строке {line(start)}"
+                position = regex.end()
+                token = '/regex/'
+        elif token in ('"', "'"):
+            return f"Незакрытая строка в строке {line(start)}"
+        elif token == '`':
+            stack.append((token, start))
+        elif token in '([{':
+            stack.append((token, start))
+        elif token in ('+', '-') and previous == token:
+            # После инкремента и декремента '/' — деление
+            token += token
+        elif token in CLOSING_BRACKETS:
+            expected = CLOSING_BRACKETS[token]
+            if stack and token == '}' and stack[-1][0] == '${':
+                # Конец подстановки: дальше снова текст шаблонной строки
+                stack.pop()
+                continue
+            if not stack or stack[-1][0] != expected:
+                return f"Непарная скобка '{token}' в строке {line(start)}"
+            stack.pop()
+        previous = token
+    if stack:
+        bracket, position = stack[-1]
+        if bracket == '`':
+            return f"Незакрытая шаблонная строка в строке {line(position)}"
+        return f"Незакрытая скобка '{bracket}' в строке {line(position)}"
+    return None
+
+
+CHECKERS: Dict[str, Callable[[str], Optional[str]]] = {
+    'python': check_python,
+    'javascript': check_javascript,
+    'typescript': check_javascript,
+}
+
+
+def check_code(language: str, code: str) -> Optional[str]:
+    """Проверяет код на указанном языке; для языков без проверки возвращает None."""
+    checker = CHECKERS.get(language)
+    return checker(code) if checker is not None else None
+
+
+def _check_chunk(items: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """Проверяет пачку пар (язык, код) в рабочем процессе."""
+    return [check_code(language, code) for language, code in items]
+
+
+class RecordValidator:
+    """
+    Проверка синтаксиса записей перед записью в датасет.
+
+    Поля code и result каждой записи проверяются в том виде, в каком они попадут в датасет:
+    compile() для Python и токенизатором для JavaScript. Результаты кэшируются по хэшу содержимого, поэтому повторяющийся код сущностей
+    проверяется один раз. Промахи кэша проверяются в пуле процессов пачками; в работе одновременно
+    находится ограниченное число пачек, а записи выдаются в исходном порядке, поэтому проверка
+    идёт параллельно со сборкой и записью, не останавливая их.
+
+    Аргументы:
+    workers (int): Количество процессов (1 — проверка в текущем процессе).
+    chunk_size (int): Количество записей в пачке.
+    max_cache_entries (int): Ограничение размера кэша результатов.
+    """
+
+    def __init__(self, workers: int = 1, chunk_size: int = 64, max_cache_entries: int = 1 << 18):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_cache_entries = max_cache_entries
+        # Хэш (язык, код) -> описание ошибки или None
+        self._cache: 'OrderedDict[bytes, Optional[str]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(language: str, code: str) -> bytes:
+        return hashlib.blake2b(f"{language}\0{code}".encode('utf-8'), digest_size=16).digest()
+
+    def _lookup(self, key: bytes):
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return True, self._cache[key]
+        self.misses += 1
+        return False, None
+
+    def _store(self, key: bytes, error: Optional[str]) -> None:
+        self._cache[key] = error
+        if len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+
+    def check(self, language: str, code: str) -> Optional[str]:
+        """Проверяет код с использованием кэша; возвращает описание ошибки или None."""
+        key = self._key(language, code)
+        found, error = self._lookup(key)
+        if not found:
+            error = check_code(language, code)
+            self._store(key, error)
+        return error
+
+    @staticmethod
+    def _fields(record: Record) -> Tuple[Tuple[str, str], ...]:
+        """Поля code и result в том виде, в каком они попадут в датасет (после format_code)."""
+        json_object = record.to_json_object()
+        return ('code', json_object['code']), ('result', json_object['result'])
+
+    def errors(self, record: Record) -> List[str]:
+        """Возвращает ошибки полей записи (пустой список для корректной записи)."""
+        language = record.language or 'python'
+        errors = []
+        for field, code in self._fields(record):
+            error = self.check(language, code)
+            if error is not None:
+                errors.append(f"{field}: {error}")
+        return errors
+
+    def _prepare(self, records: List[Record]):
+        """
+        Разрешает поля пачки по кэшу. Возвращает ключи полей, найденные в кэше результаты
+        и уникальные промахи (ключ -> (язык, код)).
+        """
+        keys = []
+        known: Dict[bytes, Optional[str]] = {}
+        missing: Dict[bytes, Tuple[str, str]] = {}
+        for record in records:
+            language = record.language or 'python'
+            for _, code in self._fields(record):
+                key = self._key(language, code)
+                keys.append(key)
+                if key in known or key in missing:
+                    continue
+                found, error = self._lookup(key)
+                if found:
+                    known[key] = error
+                else:
+                    missing[key] = (language, code)
+        return keys, known, missing
+
+    @staticmethod
+    def _resolve(records: List[Record], keys: List[bytes], results: Dict[bytes, Optional[str]]):
+        for index, record in enumerate(records):
+            fields = zip(('code', 'result'), keys[2 * index:2 * index + 2])
+            yield record, [f"{field}: {results[key]}" for field, key in fields if results[key] is not None]
+
+    def validate(self, records: Iterable[Record]) -> Iterator[Tuple[Record, List[str]]]:
+        """Отдаёт пары (запись, ошибки) в исходном порядке."""
+        if self.workers <= 1:
+            for record in records:
+                yield record, self.errors(record)
+            return
+
+        max_pending = self.workers * 4
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            def complete():
+                chunk, keys, results, missing, future = pending.popleft()
+                if future is not None:
+                    for key, error in zip(missing, future.result()):
+                        self._store(key, error)
+                        results[key] = error
+                yield from self._resolve(chunk, keys, results)
+
+            for chunk in iter_chunks(records, self.chunk_size):
+                keys, known, missing = self._prepare(chunk)
+                future = executor.submit(_check_chunk, list(missing.values())) if missing else None
+                pending.append((chunk, keys, known, missing, future))
+                if len(pending) >= max_pending:
+                    yield from complete()
+            while pending:
+                yield from complete()
+
+    def filter(self, records: Iterable[Record], quarantine: JsonlWriter) -> Iterator[Record]:
+        """Отдаёт корректные записи, а некорректные дописывает в карантин вместе с описанием ошибок."""
+        for record, errors in self.validate(records):
+            if errors:
+                json_object = record.to_json_object()
+                json_object['errors'] = errors
+                quarantine.write(json_object)
+                get_registry().inc('records_quarantined')
+            else:
+                yield record
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dataset_writer import iter_jsonl
+from process_file import run_batch
+from records import Record
+from validator import RecordValidator, check_javascript, check_python
+
+
+class TestValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_check_python(self):
+        # Проверяет компиляцию кода, в том числе тестового метода с отступом
+        self.assertIsNone(check_python('    def test_x(self):\n        assert 1\n'))
+        self.assertIn('SyntaxError', check_python('def f(:\n    pass\n'))
+
+    def test_check_javascript(self):
+        # Проверяет парность скобок без учёта строк и комментариев
+        self.assertIsNone(check_javascript('function f() {\n    return "}"; // )\n}\n'))
+        self.assertIn('строке 2', check_javascript('function f() {\n    return g(];\n}\n'))
+        self.assertIsNotNone(check_javascript('function f() {\n    return 1;\n'))
+        self.assertIsNotNone(check_javascript('const s = "abc;\n'))
+
+        # Регулярные выражения и вложенные шаблонные строки
+        self.assertIsNone(check_javascript('const s = x.replace(/\'/g, "");'))
+        self.assertIsNone(check_javascript('const r = /[(]/;\nif (a) { b = [/}/gi, c / 2 / d, i++ / 2]; }'))
+        self.assertIsNone(check_javascript('const s = `a ${"`"} b ${f({x: `${y}`})}`;'))
+        self.assertIsNotNone(check_javascript('const s = `a ${b`;'))
+        self.assertIsNotNone(check_javascript('const r = x.match(/abc);'))
+        self.assertIsNotNone(check_javascript('/* comment'))
+
+    def test_validates_written_fields(self):
+        # Проверяет, что проверяется текст после format_code: литерал \\n в строке становится переводом строки
+        record = Record('def test_f():\n    assert f()', 'def f():\n    return "a\\nb"', 'pytest', 'python')
+        self.assertIsNone(check_python(record.entity_code))
+        errors = RecordValidator().errors(record)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith('code: SyntaxError'))
+
+    def test_cache_and_parallel_order(self):
+        # Проверяет, что одинаковый код проверяется один раз, а пул сохраняет порядок записей
+        entity_code = 'def helper():\n    return 1'
+        records = [Record(f'def test_{i}():\n    assert helper() == 1' if i % 3 else 'def test_(:', entity_code,
+                          'pytest', 'python') for i in range(30)]
+        sequential = RecordValidator()
+        expected = [(record.test_code, errors) for record, errors in sequential.validate(records)]
+        self.assertEqual(sequential.misses, 22)
+        self.assertEqual(sequential.hits, 38)
+
+        parallel = RecordValidator(workers=2, chunk_size=4)
+        actual = [(record.test_code, errors) for record, errors in parallel.validate(records)]
+        self.assertListEqual(actual, expected)
+        self.assertEqual(sum(1 for _, errors in actual if errors), 10)
+
+    def test_run_batch_quarantine(self):
+        # Проверяет, что запись с некомпилируемым кодом сущности попадает в карантин, а не в датасет
+        code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(code_directory)
+        with open(os.path.join(code_directory, 'good.txt'), 'w', encoding='utf-8') as f:
+            f.write('def good():\n    return 1\n')
+        with open(os.path.join(code_directory, 'bad.txt'), 'w', encoding='utf-8') as f:
+            f.write('def bad(:\n    return 2\n')
+        input_file_path = os.path.join(self.test_dir, 'tests.py')
+        with open(input_file_path, 'w', encoding='utf-8') as f:
+            f.write('def test_good():\n    assert good() == 1\n\ndef test_bad():\n    assert bad() == 2\n')
+
+        output_path = os.path.join(self.test_dir, 'out.jsonl')
+        written = run_batch(input_file_path, code_directory, 'pytest', output_path, 'python', validate=True)
+        self.assertEqual(written, 1)
+        self.assertIn('test_good', next(iter_jsonl(output_path))['result'])
+        quarantined = list(iter_jsonl(output_path + '.quarantine.jsonl'))
+        self.assertEqual(len(quarantined), 1)
+        self.assertTrue(quarantined[0]['errors'][0].startswith('code: SyntaxError'))
+
+
+if __name__ == '__main__':
+    unittest.main()
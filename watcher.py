@@ -0,0 +1,114 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from incremental import IncrementalRunner
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """
+    Режим наблюдения: держит индекс сущностей, автомат поиска и манифест в памяти и пересобирает
+    записи, как только меняются файлы тестов или сущностей.
+
+    Изменения отслеживаются опросом mtime (без внешних зависимостей): входные файлы проверяются
+    одним stat. Директория сущностей перечитывается scandir, только если изменился её mtime (файлы
+    добавлены или удалены); иначе stat выполняется лишь для сущностей, которые используют записи
+    манифеста, — правки остальных файлов на записи не влияют. Перезапускаются только изменённые
+    входные файлы, а внутри них — только тестовые случаи, чей текст или сущности изменились.
+    Записи удалённого входного файла удаляются из датасета.
+
+    Аргументы:
+    input_files (list): Файлы с тестами.
+    code_directory (str): Директория с файлами сущностей или упакованное хранилище.
+    framework (str): Название фреймворка.
+    output_file_path (str): Путь к выходному файлу датасета (.jsonl).
+    language (str): Язык программирования ('python' или 'javascript').
+    interval (float): Период опроса в секундах.
+    runner_options: Дополнительные аргументы IncrementalRunner (workers, word_boundary, transitive...).
+    """
+
+    def __init__(self, input_files: List[str], code_directory: str, framework: str, output_file_path: str,
+                 language: str, interval: float = 0.5, **runner_options):
+        self.input_files = list(input_files)
+        self.interval = interval
+        self.runner = IncrementalRunner(code_directory, framework, output_file_path, language, **runner_options)
+        self._mtimes: Dict[str, Optional[int]] = {}
+        # Сущности, используемые записями манифеста (None — пересчитать после изменений датасета)
+        self._used_entities: Optional[Set[str]] = None
+
+    def _changed_inputs(self) -> Tuple[List[str], List[str]]:
+        """Возвращает изменённые и удалённые входные файлы."""
+        changed = []
+        deleted = []
+        for input_file in self.input_files:
+            try:
+                mtime = os.stat(input_file).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._mtimes.get(input_file, -1):
+                self._mtimes[input_file] = mtime
+                (changed if mtime is not None else deleted).append(input_file)
+        return changed, deleted
+
+    def poll_once(self) -> int:
+        """Проверяет изменения и обрабатывает их; возвращает количество записанных записей."""
+        changed_inputs, deleted_inputs = self._changed_inputs()
+        for input_file in deleted_inputs:
+            removed = self.runner.forget_input(input_file)
+            if removed:
+                self._used_entities = None
+                logger.info('%s: файл удалён, удалено записей %d', input_file, removed)
+
+        if self._used_entities is None:
+            self._used_entities = self.runner.used_entities()
+        changed_entities = self.runner.refresh_entities(self._used_entities)
+        # При изменении сущностей проверяются все входные файлы: манифест отфильтрует незатронутые тесты
+        inputs = self.input_files if changed_entities else changed_inputs
+
+        written = 0
+        for input_file in inputs:
+            if self._mtimes.get(input_file) is None:
+                continue
+            started = time.perf_counter()
+            file_written, skipped, removed = self.runner.run(input_file, refresh=False)
+            written += file_written
+            if file_written or removed:
+                self._used_entities = None
+                logger.info('%s: записано %d, пропущено %d, удалено %d за %.1f мс', input_file, file_written,
+                            skipped, removed, (time.perf_counter() - started) * 1000)
+        return written
+
+    def run_forever(self, stop_event=None) -> None:
+        """Опрашивает файлы до остановки (Ctrl+C или установка stop_event)."""
+        try:
+            while stop_event is None or not stop_event.is_set():
+                self.poll_once()
+                if stop_event is not None:
+                    stop_event.wait(self.interval)
+                else:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Наблюдение за тестами и сущностями с пересборкой датасета.')
+    parser.add_argument('--input', action='append', required=True, help='Файл с тестами (можно указать несколько)')
+    parser.add_argument('--entities', required=True, help='Директория с файлами сущностей или упакованное хранилище')
+    parser.add_argument('--output', required=True, help='Файл датасета (.jsonl)')
+    parser.add_argument('--framework', default='pytest')
+    parser.add_argument('--language', default='python', choices=['python', 'javascript'])
+    parser.add_argument('--interval', type=float, default=0.5, help='Период опроса в секундах')
+    parser.add_argument('--word-boundary', action='store_true')
+    parser.add_argument('--transitive', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    watcher = Watcher(args.input, args.entities, args.framework, args.output, args.language, args.interval,
+                      word_boundary=args.word_boundary, transitive=args.transitive)
+    watcher.run_forever()
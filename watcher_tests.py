@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dataset_writer import iter_jsonl
+from entity_index import EntityIndex
+from watcher import Watcher
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.code_directory = os.path.join(self.test_dir, 'entities')
+        os.makedirs(self.code_directory)
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 1\n')
+        self.create_entity_file('other.txt', 'def other():\n    return 2\n')
+        self.create_entity_file('unused.txt', 'def unused():\n    return 3\n')
+        self.input_file_path = os.path.join(self.test_dir, 'tests.py')
+        self.output_file_path = os.path.join(self.test_dir, 'dataset.jsonl')
+        self.write_tests(self.input_file_path, ['def test_one():\n    assert my_function() == 1\n',
+                                                'def test_two():\n    assert other() == 2\n'])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_entity_file(self, file_name, content, mtime_ns=None):
+        file_path = os.path.join(self.code_directory, file_name)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+    @staticmethod
+    def write_tests(file_path, test_cases):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(test_cases))
+
+    def results(self):
+        return [record['result'] for record in iter_jsonl(self.output_file_path)]
+
+    def watcher(self, input_files=None):
+        return Watcher(input_files or [self.input_file_path], self.code_directory, 'pytest', self.output_file_path,
+                       'python')
+
+    def test_watcher_poll(self):
+        # Проверяет, что режим наблюдения обрабатывает только изменения
+        watcher = self.watcher()
+        self.assertEqual(watcher.poll_once(), 2)
+        self.assertEqual(watcher.poll_once(), 0)
+        self.write_tests(self.input_file_path, ['def test_one():\n    assert my_function() == 1\n',
+                                                'def test_two():\n    assert other() > 0\n'])
+        os.utime(self.input_file_path, ns=(10 ** 18, 10 ** 18))
+        self.assertEqual(watcher.poll_once(), 1)
+        self.create_entity_file('my_function.txt', 'def my_function():\n    return 5\n', mtime_ns=10 ** 18)
+        self.assertEqual(watcher.poll_once(), 1)
+        self.assertEqual(len(self.results()), 2)
+
+    def test_deleted_input(self):
+        # Проверяет, что записи удалённого входного файла удаляются из датасета и манифеста
+        second_input_path = os.path.join(self.test_dir, 'more_tests.py')
+        self.write_tests(second_input_path, ['def test_three():\n    assert other() != 0\n'])
+        watcher = self.watcher([self.input_file_path, second_input_path])
+        self.assertEqual(watcher.poll_once(), 3)
+        os.remove(self.input_file_path)
+        self.assertEqual(watcher.poll_once(), 0)
+        self.assertListEqual(self.results(), ['def test_three():\n    assert other() != 0'])
+        self.assertTrue(all(second_input_path in key for key in watcher.runner._manifest.entries))
+
+        self.write_tests(self.input_file_path, ['def test_one():\n    assert my_function() == 1\n'])
+        self.assertEqual(watcher.poll_once(), 1)
+        self.assertEqual(len(self.results()), 2)
+
+    def test_poll_does_not_scan_directory(self):
+        # Проверяет, что без добавления и удаления файлов опрос перепроверяет только используемые сущности
+        watcher = self.watcher()
+        watcher.poll_once()
+        with mock.patch.object(EntityIndex, '_scan', side_effect=AssertionError('повторное сканирование')):
+            self.assertEqual(watcher.poll_once(), 0)
+            self.create_entity_file('unused.txt', 'def unused():\n    return 4\n', mtime_ns=10 ** 18)
+            self.assertEqual(watcher.poll_once(), 0)
+            self.create_entity_file('other.txt', 'def other():\n    return 5\n', mtime_ns=10 ** 18)
+            self.assertEqual(watcher.poll_once(), 1)
+        self.create_entity_file('added.txt', 'def added():\n    return 6\n')
+        os.utime(self.code_directory, ns=(10 ** 18, 10 ** 18))
+        self.assertEqual(watcher.poll_once(), 0)
+        self.assertIn('added', watcher.runner.entity_index)
+
+
+if __name__ == '__main__':
+    unittest.main()